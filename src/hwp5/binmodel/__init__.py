@@ -24,11 +24,16 @@ from itertools import takewhile
 import json
 import logging
 import inspect
+import struct
+
+import six
 
 from .. import recordstream
 from ..bintype import ERROREVENT
+from ..bintype import decode_type
 from ..bintype import resolve_type_events
 from ..bintype import resolve_values_from_stream
+from ..dataio import Eof
 from ..dataio import ParseError
 from ..dataio import dumpbytes
 from ..recordstream import nth
@@ -277,6 +282,57 @@ def parse_models(context, records):
         yield model
 
 
+def select_records_for_tagids(records, tagids):
+    ''' 주어진 tagids의 레코드들과, 이들을 파싱하는 데 필요한 레코드들만
+    순서대로 골라낸다.
+
+    모델의 파싱은 조상 모델들과, 같은 부모 아래의 앞선 형제 모델들(부모의
+    on_child()를 통해)에 의존하므로 이들도 함께 고른다. 그 밖의 레코드들은
+    payload를 디코드하지 않고 건너뛴다.
+    '''
+    records = list(records)
+
+    parents = []
+    positions = []
+    children = {-1: []}
+    stack = []
+    for i, record in enumerate(records):
+        level = record['level']
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        parent = stack[-1][1] if stack else -1
+        parents.append(parent)
+        positions.append(len(children[parent]))
+        children[parent].append(i)
+        children[i] = []
+        stack.append((level, i))
+
+    selected = [False] * len(records)
+    selected_upto = dict()
+    for i, record in enumerate(records):
+        if record['tagid'] not in tagids:
+            continue
+        while i != -1:
+            parent = parents[i]
+            upto = positions[i] + 1
+            done = selected_upto.get(parent, 0)
+            if upto <= done:
+                break
+            for sibling in children[parent][done:upto]:
+                selected[sibling] = True
+            selected_upto[parent] = upto
+            i = parent
+
+    return list(record for record, selected
+                in zip(records, selected) if selected)
+
+
+def filter_models_by_tagids(models, tagids):
+    for model in models:
+        if model['tagid'] in tagids:
+            yield model
+
+
 def parse_models_intern(context, records):
     context_models = ((init_record_parsing_context(context, record), record)
                       for record in records)
@@ -300,24 +356,61 @@ def parse_models_with_parent(context_models):
         yield context, model
 
 
+# 컴파일된 decoder가 잘못되거나 모자란 데이터에서 일으키는 예외들. 그 밖의
+# 예외는 decoder의 버그이므로 그대로 일으킨다.
+DECODE_ERRORS = (Eof, ParseError, IndexError, ValueError, struct.error)
+
+
 def parse_model(context, model):
     ''' HWPTAG로 모델 결정 후 기본 파싱 '''
 
     stream = context['stream']
+    if context.get('compiled'):
+        offset = stream.tell()
+        try:
+            decode_model(context, model)
+        except DECODE_ERRORS as e:
+            # 이벤트 해석기로 다시 파싱하여 ParseError를 만들도록 한다.
+            logger.warning('compiled decoder failed, parsing again: %r', e)
+            stream.seek(offset)
+        else:
+            notify_parent(context, model)
+            logger.debug('model: %s', model['type'].__name__)
+            logger.debug('%s', model['content'])
+            return
+
+    offset = stream.tell()
     context['resolve_values'] = resolve_values_from_stream(stream)
     events = resolve_model_events(context, model)
-    events = raise_on_errorevent(context, events)
-    model['binevents'] = list(events)
+    if context.get('keep_binevents', True):
+        events = raise_on_errorevent(context, events, list())
+        model['binevents'] = list(events)
+    else:
+        try:
+            for _ in raise_on_errorevent(context, events):
+                pass
+        except ParseError:
+            # binevents를 포함한 ParseError를 만들기 위해 다시 파싱한다.
+            stream.seek(offset)
+            events = resolve_model_events(context, model)
+            list(raise_on_errorevent(context, events, list()))
+            raise
 
     logger.debug('model: %s', model['type'].__name__)
     logger.debug('%s', model['content'])
 
 
-def raise_on_errorevent(context, events):
-    binevents = list()
+def raise_on_errorevent(context, events, binevents=None):
+    ''' raise ParseError on an ERROREVENT
+
+    :param binevents: a list to collect the events so far into, which will
+        be available as ParseError.binevents. If None, events are not
+        collected.
+    '''
     for ev, item in events:
         yield ev, item
-        binevents.append((ev, item))
+        if binevents is not None:
+            binevents.append((ev, item))
         if ev is ERROREVENT:
             e = item['exception']
             msg = 'can\'t parse %s' % item['type']
@@ -384,6 +477,31 @@ def resolve_model_events(context, model):
                 model['content'].update(content)
             model['type'] = extension
 
+    notify_parent(context, model)
+
+
+def decode_model(context, model):
+    ''' resolve_model_events()와 같은 모델을 만들되, binevents 없이
+    컴파일된 decoder로 디코드한다. parent의 on_child()는 호출하지 않는다.
+    '''
+    stream = context['stream']
+
+    model['type'] = model_type = tag_models.get(model['tagid'],
+                                                UnknownTagModel)
+    model['content'] = decode_type(model_type, context, stream)
+
+    extension_types = getattr(model['type'], 'extension_types', None)
+    if extension_types:
+        key = model['type'].get_extension_key(context, model)
+        extension = extension_types.get(key)
+        if extension is not None:
+            for cls in get_extension_mro(extension, model['type']):
+                content = decode_type(cls, context, stream)
+                model['content'].update(content)
+            model['type'] = extension
+
+
+def notify_parent(context, model):
     if 'parent' in context:
         parent = context['parent']
         parent_context, parent_model = parent
@@ -431,34 +549,137 @@ def chain_iterables(iterables):
             yield item
 
 
+PLAIN_CONTEXT_TYPES = ((bool, float, bytes, six.text_type, tuple) +
+                       six.integer_types)
+
+
+def parse_treegroups_in_buffer(context, buf, seqno, treegroup):
+    ''' parse models of the top-level tree groups in a record buffer
+
+    :param buf: a buffer starting with the first record of a tree group
+    :param seqno: seqno of the first record in `buf`
+    :param treegroup: index of the first tree group in `buf`
+    '''
+    records = recordstream.read_records_from_buffer(buf, 0, seqno)
+    groups = recordstream.group_records_by_toplevel(records)
+    for records in groups:
+        context['treegroup'] = treegroup
+        for model in parse_models(context, records):
+            yield model
+        treegroup += 1
+
+
+def parse_treegroups_in_worker(task):
+    ''' parse_treegroups_in_buffer() in a worker process
+
+    :returns: list of the models, or None if failed
+    '''
+    try:
+        models = list(parse_treegroups_in_buffer(*task))
+    except Exception as e:
+        logger.debug('parsing tree groups failed: %r', e)
+        return None
+    for model in models:
+        model['payload'] = model['payload'].tobytes()
+    return models
+
+
 class ModelStream(recordstream.RecordStream):
 
     def models(self, **kwargs):
+        ''' iterable of the models in this stream
+
+        The keyword arguments are used as the parsing context. Besides
+        `treegroup`, following options are recognized:
+
+        - compiled: decode with the compiled decoders (default: False)
+        - keep_binevents: keep the binary parse events of each model in
+          model['binevents'] (default: True)
+        - tagids: yield only the models of these tagids; records not
+          needed to parse them are skipped without being decoded
+        '''
         # prepare binmodel parsing context
         kwargs.setdefault('version', self.version)
         try:
             kwargs.setdefault('path', self.path)
         except AttributeError:
             pass
+        workers = kwargs.pop('workers', None)
         treegroup = kwargs.get('treegroup', None)
         if treegroup is not None:
+            tagids = kwargs.pop('tagids', None)
             records = self.records_treegroup(treegroup)  # TODO: kwargs
+            if tagids is not None:
+                records = select_records_for_tagids(records, tagids)
             models = parse_models(kwargs, records)
+            if tagids is not None:
+                models = filter_models_by_tagids(models, tagids)
+        elif (workers and workers > 1 and 'tagids' not in kwargs and
+              not kwargs.get('keep_binevents', True)):
+            models = self.models_in_parallel(workers, kwargs)
         else:
             groups = self.models_treegrouped(**kwargs)
             models = chain_iterables(groups)
         return models
 
+    def models_in_parallel(self, workers, context):
+        ''' parse the top-level tree groups in a process pool
+
+        트리 그룹들을 바이트 크기가 비슷한 덩어리들로 나누고, 레코드 버퍼의
+        조각들을 워커 프로세스들에 보내 파싱한 뒤, 모델들을 순서대로
+        내보냅니다. 워커에서 실패한 조각은 이 프로세스에서 다시 파싱하여
+        ParseError 등을 그대로 일으킵니다.
+        '''
+        from multiprocessing import Pool
+
+        buf = memoryview(self.buffer)
+
+        # 워커에는 pickle할 수 있는 값들만 넘긴다.
+        context = dict((k, v) for k, v in context.items()
+                       if v is None or isinstance(v, PLAIN_CONTEXT_TYPES))
+        chunks = self.index.treegroup_chunks(len(buf), workers * 4)
+        tasks = list((context, buf[start:end].tobytes(), seqno, treegroup)
+                     for start, end, seqno, treegroup in chunks)
+
+        pool = Pool(workers)
+        try:
+            results = pool.imap(parse_treegroups_in_worker, tasks)
+            for task, models in zip(tasks, results):
+                if models is None:
+                    models = parse_treegroups_in_buffer(*task)
+                for model in models:
+                    yield model
+            pool.close()
+            pool.join()
+        finally:
+            pool.terminate()
+
     def models_treegrouped(self, **kwargs):
         ''' iterable of iterable of the models, grouped by the top-level tree
+
+        If `tagids` is given, the groups without any record of them are
+        skipped.
         '''
         kwargs.setdefault('version', self.version)
+        tagids = kwargs.pop('tagids', None)
         for group_idx, records in enumerate(self.records_treegrouped()):
             kwargs['treegroup'] = group_idx
-            yield parse_models(kwargs, records)
+            if tagids is None:
+                yield parse_models(kwargs, records)
+                continue
+            records = select_records_for_tagids(records, tagids)
+            if records:
+                models = parse_models(kwargs, records)
+                yield filter_models_by_tagids(models, tagids)
 
     def model(self, idx):
-        return nth(self.models(), idx)
+        index = self.index
+        if idx >= len(index):
+            return None
+        treegroup = index.treegroup_of(idx)
+        start = index.groups[treegroup]
+        models = self.models(treegroup=treegroup)
+        return nth(models, idx - start)
 
     def models_json(self, **kwargs):
         models = self.models(**kwargs)
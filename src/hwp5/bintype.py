@@ -22,10 +22,12 @@ from __future__ import unicode_literals
 from collections import deque
 from pprint import pprint
 import logging
+import operator
 import struct
 import sys
 
 from .dataio import BSTR
+from .dataio import Eof
 from .dataio import FixedArrayType
 from .dataio import FlagsType
 from .dataio import ParseError
@@ -33,6 +35,7 @@ from .dataio import SelectiveType
 from .dataio import StructType
 from .dataio import VariableLengthArrayType
 from .dataio import X_ARRAY
+from .dataio import decode_utf16le_with_hypua
 from .dataio import readn
 from .treeop import STARTEVENT, ENDEVENT
 from .treeop import iter_subevents
@@ -455,6 +458,399 @@ def read_type(type, context, stream, binevents=None):
     return item['value']
 
 
+def typedef_events_to_tree(typedef_events):
+    ''' build (item, children) tree from typedef events
+
+    children is None for leaf items.
+    '''
+    root = []
+    stack = [root]
+    for ev, item in typedef_events:
+        item = dict(item)
+        if ev is STARTEVENT:
+            node = item, []
+            stack[-1].append(node)
+            stack.append(node[1])
+        elif ev is ENDEVENT:
+            stack.pop()
+        else:
+            stack[-1].append((item, None))
+    return root[0]
+
+
+class DecoderCompiler(object):
+    ''' Generate python source of a decoder function from typedef events.
+
+    The generated function has the signature::
+
+        decode(context, buf, offset, stream) -> (value, offset)
+
+    where `buf` is the whole payload buffer and `stream` is a file-like
+    object on the same buffer, used for the types which can only be read
+    through their own `read()`. A decoder raises an exception (e.g. `Eof`
+    or `struct.error`) whenever the buffer does not suffice; it does not
+    produce binevents nor ParseError on its own.
+    '''
+
+    array_types = (X_ARRAY, VariableLengthArrayType, FixedArrayType)
+
+    def __init__(self, name):
+        self.name = name
+        self.lines = []
+        self.namespace = dict(Eof=Eof,
+                              decode_utf16le=decode_utf16le_with_hypua,
+                              unpack_array=unpack_array,
+                              iter_unpack_from=iter_unpack_from,
+                              unpack_uint16=struct.Struct(str('<H')))
+        self.serial = 0
+
+    def compile(self, typedef_events):
+        root = typedef_events_to_tree(typedef_events)
+        self.emit(0, 'def decode(context, buf, offset, stream):')
+        self.emit_node(1, root, None, self.collect_into_result)
+        self.emit(1, 'return result, offset')
+
+        source = '\n'.join(self.lines) + '\n'
+        filename = str('<decoder of {}>'.format(self.name))
+        code = compile(source, filename, 'exec')
+        namespace = dict(self.namespace)
+        exec(code, namespace)
+        decoder = namespace['decode']
+        decoder.source = source
+        return decoder
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def emit_block(self, indent, emit_body):
+        ''' emit a block body; emit `pass` if it turns out to be empty '''
+        nlines = len(self.lines)
+        emit_body(indent)
+        if len(self.lines) == nlines:
+            self.emit(indent, 'pass')
+
+    def new_name(self, prefix):
+        self.serial += 1
+        return '{}{}'.format(prefix, self.serial)
+
+    def const(self, prefix, value):
+        name = self.new_name('_' + prefix)
+        self.namespace[name] = value
+        return name
+
+    def collect_into_result(self, indent, item, expr):
+        self.emit(indent, 'result = {}'.format(expr))
+
+    def collect_into_struct(self, var):
+        def collect(indent, item, expr):
+            if not item.get('dontcollect', False):
+                self.emit(indent, '{}[{!r}] = {}'.format(var,
+                                                         str(item['name']),
+                                                         expr))
+        return collect
+
+    def collect_into_array(self, var):
+        def collect(indent, item, expr):
+            if not item.get('dontcollect', False):
+                self.emit(indent, '{}.append({})'.format(var, expr))
+        return collect
+
+    def emit_node(self, indent, node, parent_var, collect):
+        item, children = node
+        item_type = item['type']
+
+        if isinstance(item_type, SelectiveType):
+            self.emit_selective(indent, node, parent_var, collect)
+            return
+
+        if 'condition' in item:
+            condition = self.const('condition', item.pop('condition'))
+            self.emit(indent, 'if {}(context, {}):'.format(condition,
+                                                           parent_var))
+            self.emit_block(indent + 1, lambda indent: self.emit_node(
+                indent, node, parent_var, collect))
+            return
+
+        if children is None:
+            self.emit_value(indent, item)
+            collect(indent, item, 'x')
+        elif isinstance(item_type, StructType):
+            var = self.new_name('struct')
+            self.emit(indent, '{} = {{}}'.format(var))
+            self.emit_members(indent, children, var)
+            collect(indent, item, var)
+        elif isinstance(item_type, self.array_types):
+            self.emit_array(indent, node, parent_var, collect)
+        else:
+            assert False, 'unexpected composite type: %r' % item_type
+
+    def emit_members(self, indent, children, var):
+        ''' emit struct members, coalescing each maximal run of the
+        unconditional fixed-size members into a single unpack_from() call.
+        '''
+        collect = self.collect_into_struct(var)
+        run = []
+        for child in children:
+            if self.fixed_format(child) is not None:
+                run.append(child)
+                continue
+            self.emit_fixed_run(indent, run, collect)
+            run = []
+            self.emit_node(indent, child, var, collect)
+        self.emit_fixed_run(indent, run, collect)
+
+    def emit_fixed_run(self, indent, run, collect):
+        if len(run) == 0:
+            return
+        if len(run) == 1 and run[0][1] is None:
+            self.emit_value(indent, run[0][0])
+            collect(indent, run[0][0], 'x')
+            return
+        binfmt = '<' + ''.join(self.fixed_format(node) for node in run)
+        unpacker = struct.Struct(str(binfmt))
+        name = self.const('unpack', unpacker)
+        self.emit(indent, 'values = {}.unpack_from(buf, offset)'.format(name))
+        self.emit(indent, 'offset += {}'.format(unpacker.size))
+        index = 0
+        for item, children in run:
+            expr, index = self.fixed_value_expr((item, children), index)
+            collect(indent, item, expr)
+
+    def fixed_format(self, node):
+        ''' struct format (without byte order) of a node, if it is an
+        unconditional fixed-size primitive or a struct/array thereof;
+        None otherwise.
+        '''
+        item, children = node
+        if 'condition' in item or 'select_when' in item:
+            return
+        item_type = item['type']
+        if children is None:
+            binfmt = getattr(item.get('bin_type', item_type), 'binfmt', None)
+            if binfmt is None or len(binfmt) != 2 or binfmt[0] != '<':
+                return
+            return binfmt[1]
+        elif isinstance(item_type, StructType):
+            formats = list(self.fixed_format(child) for child in children)
+            if None in formats:
+                return
+            return ''.join(formats)
+        elif isinstance(item_type, FixedArrayType):
+            child, = children
+            binfmt = self.fixed_format(child)
+            if binfmt is None:
+                return
+            return binfmt * item_type.size
+
+    def fixed_value_expr(self, node, index):
+        ''' python expression to build the value of a fixed-size node from
+        the unpacked `values`, starting at `index`
+        '''
+        item, children = node
+        item_type = item['type']
+        if children is None:
+            expr = 'values[{}]'.format(index)
+            flags_type = item.get('flags_type')
+            if flags_type is not None:
+                flags_type = self.const('flags', flags_type)
+                expr = '{}({})'.format(flags_type, expr)
+            return expr, index + 1
+        elif isinstance(item_type, StructType):
+            members = []
+            for child in children:
+                expr, index = self.fixed_value_expr(child, index)
+                members.append('{!r}: {}'.format(str(child[0]['name']),
+                                                 expr))
+            return '{' + ', '.join(members) + '}', index
+        else:
+            child, = children
+            elements = []
+            for _ in range(0, item_type.size):
+                expr, index = self.fixed_value_expr(child, index)
+                elements.append(expr + ',')
+            return '(' + ' '.join(elements) + ')', index
+
+    def emit_selective(self, indent, node, parent_var, collect):
+        item, children = node
+        selector = self.const('selector', item['type'].selector_reference)
+        select_key = self.new_name('select_key')
+        self.emit(indent, '{} = {}(context, {})'.format(select_key, selector,
+                                                        parent_var))
+        keyword = 'if'
+        for child_item, grandchildren in children:
+            child_item = dict(child_item)
+            select_when = self.const('select_when',
+                                     child_item.pop('select_when'))
+            self.emit(indent, '{} {} == {}:'.format(keyword, select_key,
+                                                    select_when))
+            child = child_item, grandchildren
+            self.emit_block(indent + 1, lambda indent: self.emit_node(
+                indent, child, parent_var, collect))
+            keyword = 'elif'
+
+    def emit_array(self, indent, node, parent_var, collect):
+        item, children = node
+        item_type = item['type']
+        count = self.new_name('count')
+        if isinstance(item_type, X_ARRAY):
+            count_reference = self.const('count_reference',
+                                         item_type.count_reference)
+            self.emit(indent, '{} = {}(context, {})'.format(count,
+                                                            count_reference,
+                                                            parent_var))
+        elif isinstance(item_type, VariableLengthArrayType):
+            self.emit_value(indent, dict(type=item_type.counttype))
+            self.emit(indent, '{} = x'.format(count))
+        else:
+            self.emit(indent, '{} = {}'.format(count, item_type.size))
+
+        var = self.new_name('array')
+        child, = children
+        if self.fixed_format(child) is not None:
+            self.emit_fixed_array(indent, child, count, var)
+        else:
+            self.emit(indent, '{} = []'.format(var))
+            self.emit(indent, 'for _ in range(0, {}):'.format(count))
+            self.emit_block(indent + 1, lambda indent: self.emit_node(
+                indent, child, var, self.collect_into_array(var)))
+        if isinstance(item_type, FixedArrayType):
+            self.emit(indent, '{0} = tuple({0})'.format(var))
+        collect(indent, item, var)
+
+    def emit_fixed_array(self, indent, child, count, var):
+        ''' emit statements to decode a whole array of fixed-size items at
+        once, instead of decoding the items one by one.
+        '''
+        item, children = child
+        binfmt = self.fixed_format(child)
+        unpacker = struct.Struct(str('<' + binfmt))
+        if children is None:
+            self.emit(indent, 'values = unpack_array({!r}, {}, buf, '
+                      'offset)'.format(str(binfmt), count))
+            flags_type = item.get('flags_type')
+            if flags_type is None:
+                self.emit(indent, '{} = list(values)'.format(var))
+            else:
+                flags_type = self.const('flags', flags_type)
+                self.emit(indent, '{} = list({}(x) for x in values)'.format(
+                    var, flags_type))
+        else:
+            name = self.const('unpack', unpacker)
+            iter_values = 'iter_unpack_from({}, {}, buf, offset)'.format(
+                name, count)
+            expr, _ = self.fixed_value_expr(child, 0)
+            if expr == '(' + ' '.join('values[{}],'.format(i)
+                                      for i in range(0, len(binfmt))) + ')':
+                # items are tuples as they are unpacked
+                self.emit(indent, '{} = list({})'.format(var, iter_values))
+            else:
+                self.emit(indent, '{} = list({} for values in {})'.format(
+                    var, expr, iter_values))
+        self.emit(indent, 'offset += {} * {}'.format(count, unpacker.size))
+
+    def emit_value(self, indent, item):
+        ''' emit statements to decode a primitive value into `x'
+
+        The order of the type tests follows resolve_value_from_stream().
+        '''
+        item_type = item.get('bin_type', item['type'])
+        if hasattr(item_type, 'binfmt'):
+            unpacker = struct.Struct(str(item_type.binfmt))
+            name = self.const('unpack', unpacker)
+            self.emit(indent, 'x = {}.unpack_from(buf, offset)[0]'.format(
+                name))
+            self.emit(indent, 'offset += {}'.format(unpacker.size))
+        elif item_type is BSTR:
+            self.emit(indent, 'x = unpack_uint16.unpack_from(buf, offset)[0]')
+            self.emit(indent, 'offset += 2')
+            self.emit(indent, 'if x == 0:')
+            self.emit(indent + 1, 'x = u""')
+            self.emit(indent, 'else:')
+            self.emit(indent + 1, 'size = 2 * x')
+            self.emit(indent + 1, 'x = buf[offset:offset + size]')
+            self.emit(indent + 1, 'if len(x) != size:')
+            self.emit(indent + 2, 'raise Eof(offset)')
+            self.emit(indent + 1, 'offset += size')
+            self.emit(indent + 1, 'x = decode_utf16le(x)')
+        elif hasattr(item_type, 'fixed_size'):
+            size = item_type.fixed_size
+            self.emit(indent, 'x = buf[offset:offset + {}]'.format(size))
+            self.emit(indent, 'if len(x) != {}:'.format(size))
+            self.emit(indent + 1, 'raise Eof(offset)')
+            self.emit(indent, 'offset += {}'.format(size))
+            if hasattr(item_type, 'decode'):
+                decode = self.const('decode', item_type.decode)
+                self.emit(indent, 'x = {}(x)'.format(decode))
+        else:
+            assert hasattr(item_type, 'read')
+            read = self.const('read', item_type.read)
+            self.emit(indent, 'stream.seek(offset)')
+            self.emit(indent, 'x = {}(stream)'.format(read))
+            self.emit(indent, 'offset = stream.tell()')
+
+        flags_type = item.get('flags_type')
+        if flags_type is not None:
+            flags_type = self.const('flags', flags_type)
+            self.emit(indent, 'x = {}(x)'.format(flags_type))
+
+
+def unpack_array(binfmt, count, buf, offset):
+    ''' unpack `count` values of a single-value format at once '''
+    binfmt = str('<{}{}'.format(operator.index(count), binfmt))
+    return struct.unpack_from(binfmt, buf, offset)
+
+
+def iter_unpack_from(unpacker, count, buf, offset):
+    ''' iterate tuples of `count` consecutive structs at once '''
+    size = unpacker.size * operator.index(count)
+    chunk = memoryview(buf)[offset:offset + size]
+    if len(chunk) != size:
+        raise Eof(offset)
+    if hasattr(unpacker, 'iter_unpack'):
+        return unpacker.iter_unpack(chunk)
+    return (unpacker.unpack_from(chunk, i)
+            for i in range(0, size, unpacker.size))
+
+
+def compile_decoder(type, typedef_events):
+    compiler = DecoderCompiler(type.__name__)
+    return compiler.compile(typedef_events)
+
+
+compiled_decoders = dict()
+
+
+def get_compiled_decoder(type, version=None):
+    ''' get a decoder function of the type, compiled from its typedef
+
+    :param type: a type to decode
+    :param version: a file format version; None for no version filtering
+    :returns: a decoder function. See `DecoderCompiler`.
+    '''
+    key = type, version
+    if key not in compiled_decoders:
+        if version is None:
+            typedef_events = get_compiled_typedef(type)
+        else:
+            typedef_events = get_compiled_typedef_with_version(type, version)
+        logger.info('compile decoder of %s with version %s', type, version)
+        compiled_decoders[key] = compile_decoder(type, typedef_events)
+    return compiled_decoders[key]
+
+
+def decode_type(type, context, stream):
+    ''' decode a value of the type with its compiled decoder
+
+    This is an alternative to read_type(), which does not produce any
+    binevents. `stream` should be an in-memory stream (i.e. BytesIO) and
+    is positioned at the end of the decoded value on return.
+    '''
+    decoder = get_compiled_decoder(type, context.get('version'))
+    value, offset = decoder(context, stream.getvalue(), stream.tell(), stream)
+    stream.seek(offset)
+    return value
+
+
 def dump_events(events):
     def prefix_level(event_prefixed_items):
         level = 0
@@ -26,7 +26,9 @@ from .plat import xsltproc
 from .plat import xmllint
 from .storage import ExtraItemStorage
 from .storage import open_storage_item
+from .storage.fs import StreamCache
 from .storage.ole import OleStorage
+from . import filestructure
 from .xmlmodel import Hwp5File
 
 
@@ -84,6 +86,18 @@ def init_with_environ():
         xmllint.enable()
 
 
+def init_stream_cache():
+    ''' Cache decompressed streams in the directory of PYHWP_STREAM_CACHE. '''
+    path = os.environ.get('PYHWP_STREAM_CACHE')
+    if not path:
+        return
+    kwargs = dict()
+    max_size = os.environ.get('PYHWP_STREAM_CACHE_SIZE')
+    if max_size:
+        kwargs['max_size'] = int(max_size)
+    filestructure.Hwp5File.stream_cache = StreamCache(path, **kwargs)
+
+
 def open_hwpfile(args):
     filename = args.hwp5file
     if args.ole:
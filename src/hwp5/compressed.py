@@ -21,11 +21,14 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from io import BytesIO
 import codecs
-import zlib
 
+from .plat import get_zlib
 from .utils import GeneratorReader
 
 
+zlib = get_zlib()
+
+
 class ZLibIncrementalDecoder(codecs.IncrementalDecoder):
     def __init__(self, errors='strict', wbits=15):
         assert errors == 'strict'
@@ -62,18 +65,181 @@ def decompress_experimental(source, bufsize=4096):
     return GeneratorReader(decompress_gen(source, bufsize))
 
 
+class DecompressingReader(object):
+    ''' a file-like reader which inflates a raw deflate stream on demand
+
+    At most `bufsize` bytes of the compressed input and `bufsize` bytes of
+    inflated output are held at a time. It supports read(), tell() and
+    seek(). Seeking backward restarts inflating from the beginning, hence
+    it is supported only when the source is seekable.
+
+        f = DecompressingReader(source, head)
+
+    `head` is the data already read from the source, if any.
+    '''
+
+    def __init__(self, source, head=b'', bufsize=65536):
+        self.source = source
+        self.bufsize = bufsize
+        try:
+            self.origin = source.tell() - len(head)
+        except (AttributeError, IOError):
+            self.origin = None
+        self.reset(head)
+
+    def reset(self, head=b''):
+        self.decompressobj = zlib.decompressobj(-15)
+        self.input = head
+        self.output = b''
+        self.pos = 0
+        self.finished = False
+
+    def inflate(self, size):
+        ''' inflate at most `size` bytes; returns b'' at the end '''
+        dec = self.decompressobj
+        while not self.finished:
+            data = dec.unconsumed_tail or self.input
+            self.input = b''
+            if not data:
+                data = self.source.read(self.bufsize)
+                if not data:
+                    self.finished = True
+                    return dec.flush()
+            output = dec.decompress(data, size)
+            if dec.unused_data:
+                # 압축 스트림이 끝난 뒤의 데이터는 무시한다.
+                self.finished = True
+            if output:
+                return output
+        return b''
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = [self.output]
+            self.output = b''
+            while True:
+                chunk = self.inflate(self.bufsize)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b''.join(chunks)
+            self.pos += len(data)
+            return data
+
+        chunks = []
+        while size > 0:
+            if not self.output:
+                self.output = self.inflate(min(size, self.bufsize))
+                if not self.output:
+                    break
+            chunk, self.output = self.output[:size], self.output[size:]
+            chunks.append(chunk)
+            size -= len(chunk)
+        data = b''.join(chunks)
+        self.pos += len(data)
+        return data
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence != 0:
+            raise IOError('unsupported whence: %r' % whence)
+        if offset < 0:
+            raise IOError('negative seek position: %d' % offset)
+        if offset < self.pos:
+            if self.origin is None:
+                raise IOError('backward seek on unseekable source')
+            self.source.seek(self.origin)
+            self.reset()
+        while self.pos < offset:
+            if not self.read(min(offset - self.pos, self.bufsize)):
+                break
+        return self.pos
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+        self.source = self.decompressobj = None
+        self.input = self.output = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 def decompress(stream):
     ''' decompress inputstream
 
         stream: a file-like readable
         returns a file-like readable
+
+    The whole stream is inflated at once into a BytesIO, so that the
+    readers can take its buffer with getvalue().
     '''
-    
-    # #176 참고. #175의 임시방편을 사용한다.
+
+    # #176 참고. #175의 임시방편을 사용한다: 압축이 풀리지 않는 스트림은
+    # 그대로 반환한다.
     compressed_maybe = stream.read()
     try:
-        decompressed = zlib.decompress(compressed_maybe, -15)  # without gzip header
+        # without gzip header
+        decompressed = zlib.decompress(compressed_maybe, -15)
     except zlib.error:
         return BytesIO(compressed_maybe)
     else:
         return BytesIO(decompressed)
+
+
+def decompress_streaming(stream, bufsize=65536):
+    ''' decompress inputstream on demand
+
+        stream: a file-like readable
+        returns a file-like readable
+
+    A stream larger than `bufsize` is inflated on demand with a
+    DecompressingReader, so that the memory use does not grow with the
+    size of the stream. A smaller one is inflated at once into a BytesIO.
+
+    Only the first `bufsize` bytes are tested whether they inflate; a
+    stream that goes bad after them raises zlib.error while being read.
+    '''
+
+    # #176 참고.
+    head = stream.read(bufsize)
+    if len(head) < bufsize:
+        try:
+            decompressed = zlib.decompress(head, -15)  # without gzip header
+        except zlib.error:
+            return BytesIO(head)
+        else:
+            return BytesIO(decompressed)
+
+    if not inflates(head, bufsize):
+        try:
+            stream.seek(-len(head), 1)
+        except (AttributeError, IOError):
+            return BytesIO(head + stream.read())
+        return stream
+    return DecompressingReader(stream, head, bufsize)
+
+
+def inflates(data, bufsize=65536):
+    ''' test whether `data` begins a raw deflate stream '''
+    dec = zlib.decompressobj(-15)
+    try:
+        dec.decompress(data, bufsize)
+        while dec.unconsumed_tail and not dec.unused_data:
+            dec.decompress(dec.unconsumed_tail, bufsize)
+    except zlib.error:
+        return False
+    return True
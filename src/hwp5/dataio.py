@@ -28,6 +28,7 @@ import struct
 import sys
 
 from six import with_metaclass
+from six.moves import copyreg
 
 
 PY3 = sys.version_info.major == 3
@@ -285,9 +286,86 @@ def _parse_flags_args(args):
 
 
 def Flags(basetype, *args):
-    attrs = dict(_parse_flags_args(args))
-    attrs['basetype'] = basetype
-    return FlagsType('Flags', (), attrs)
+    bitfields = tuple(sorted(_parse_flags_args(args)))
+    return make_value_type(('Flags', basetype, bitfields))
+
+
+#: Flags()나 Enum()으로 만든 타입들. 구조체의 속성인 타입은 그 이름(모듈과
+#: 속성 경로)으로 pickle하고, 이름이 없는 타입은 그 정의로 pickle한다. 받는
+#: 프로세스에서는 같은 정의로 처음 만들어진 타입을 쓰므로, 이 표는 서로 다른
+#: 정의의 수만큼만 커진다.
+value_types = dict()
+
+
+def make_value_type(definition):
+    ''' make a Flags or an Enum type of `definition`
+
+    :param definition: ('Flags', basetype, bitfields) or ('Enum', items,
+        moreitems), where bitfields and moreitems are tuples of
+        (name, value) pairs.
+    '''
+    kind = definition[0]
+    if kind == 'Flags':
+        attrs = dict(definition[2])
+        attrs['basetype'] = definition[1]
+        cls = FlagsType('Flags', (), attrs)
+    elif kind == 'Enum':
+        attrs = dict(items=definition[1], moreitems=dict(definition[2]))
+        cls = EnumType('Enum', (int,), attrs)
+    else:
+        raise ValueError('unknown value type: %r' % (kind,))
+    cls.value_type_definition = definition
+    cls.value_type_name = None
+    value_types.setdefault(value_type_key(definition), cls)
+    return cls
+
+
+def value_type_key(definition):
+    ''' `definition` with the nested value types replaced by the first ones
+    made with the same definitions '''
+    if definition[0] != 'Flags':
+        return definition
+    bitfields = tuple((name, (lsb, msb, canonical_value_type(t)))
+                      for name, (lsb, msb, t) in definition[2])
+    return definition[:2] + (bitfields,)
+
+
+def canonical_value_type(t):
+    definition = getattr(t, 'value_type_definition', None)
+    if definition is None:
+        return t
+    return value_types.get(value_type_key(definition), t)
+
+
+def get_value_type(definition):
+    ''' the type of `definition`, which may have been made in another
+    process '''
+    cls = value_types.get(value_type_key(definition))
+    if cls is None:
+        cls = make_value_type(definition)
+    return cls
+
+
+def get_value_type_by_name(module, path):
+    __import__(module)
+    value = sys.modules[module]
+    for name in path.split('.'):
+        value = getattr(value, name)
+    return value
+
+
+def reduce_value_type(cls):
+    name = cls.value_type_name
+    if name is not None:
+        try:
+            found = get_value_type_by_name(*name)
+        except (ImportError, AttributeError):
+            found = None
+        if found is cls:
+            return get_value_type_by_name, name
+        # 모듈에서 찾을 수 없는 구조체(함수 안에서 만든 것 등)의 속성
+        cls.value_type_name = None
+    return get_value_type, (cls.value_type_definition,)
 
 
 enum_type_instances = set()
@@ -375,8 +453,11 @@ class EnumType(type):
 
 
 def Enum(*items, **moreitems):
-    attrs = dict(items=items, moreitems=moreitems)
-    return EnumType('Enum', (int,), attrs)
+    return make_value_type(('Enum', items, tuple(moreitems.items())))
+
+
+copyreg.pickle(FlagsType, reduce_value_type)
+copyreg.pickle(EnumType, reduce_value_type)
 
 
 class CompoundType(type):
@@ -553,6 +634,10 @@ class StructType(CompoundType):
                 v.scoping_struct = cls
             elif isinstance(v, FlagsType):
                 v.__name__ = k
+            else:
+                continue
+            if v.value_type_name is None:
+                v.value_type_name = cls.__module__, name + '.' + k
 
     def parse_members(cls, context, getvalue):
         if 'attributes' not in cls.__dict__:
@@ -19,15 +19,19 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+from functools import partial
 from io import BytesIO
+import hashlib
 import logging
 import sys
 
 from .bintype import read_type
 from .compressed import decompress
+from .compressed import decompress_streaming
 from .dataio import UINT32, Flags, Struct
 from .errors import InvalidOleStorageError
 from .errors import InvalidHwp5FileError
+from .plat.mmap_cfb import MAGIC as OLE2_MAGIC
 from .storage import ItemWrapper
 from .storage import StorageWrapper
 from .storage import ItemConversionStorage
@@ -115,18 +119,76 @@ def storage_is_hwp5file(stg):
         return False
 
 
+def is_olefile_data(stg):
+    ''' Test whether `stg` is a buffer holding an OLE2 file. '''
+    if not isinstance(stg, (bytes, bytearray, memoryview)):
+        return False
+    return bytes(stg[:len(OLE2_MAGIC)]) == OLE2_MAGIC
+
+
+def is_olefile_source(stg):
+    ''' Test whether `stg` is a filename, a file object or a buffer to open
+    as an OleStorage, rather than a storage itself. '''
+    if isinstance(stg, (basestring, bytes, bytearray, memoryview)):
+        return True
+    return hasattr(stg, 'read')
+
+
 class CompressedStream(ItemWrapper):
+    ''' decompress a stream
+
+    :param cache: a StreamCache to keep the decompressed stream in, under the
+        digest of the compressed one.
+    :param streaming: inflate the stream on demand, rather than at once into
+        memory. Record streams are read faster from memory, so it is meant
+        for BinData streams.
+    '''
+
+    def __init__(self, wrapped, cache=None, streaming=False):
+        ItemWrapper.__init__(self, wrapped)
+        self.cache = cache
+        self.streaming = streaming
 
     def open(self):
+        if self.cache is not None:
+            return self.cache.open(self.digest, self.open_decompressed,
+                                   in_memory=not self.streaming)
+        return self.open_decompressed()
+
+    def open_decompressed(self):
+        if self.streaming:
+            return decompress_streaming(self.wrapped.open())
         return decompress(self.wrapped.open())
 
+    def get_digest(self):
+        ''' SHA-1 hex digest of the compressed stream '''
+        sha1 = hashlib.sha1()
+        f = self.wrapped.open()
+        try:
+            while True:
+                data = f.read(65536)
+                if not data:
+                    break
+                sha1.update(data)
+        finally:
+            f.close()
+        return sha1.hexdigest()
+
+    digest = cached_property(get_digest)
+
 
 class CompressedStorage(StorageWrapper):
     ''' decompress streams in the underlying storage '''
+
+    def __init__(self, wrapped, cache=None, streaming=False):
+        StorageWrapper.__init__(self, wrapped)
+        self.cache = cache
+        self.streaming = streaming
+
     def __getitem__(self, name):
         item = self.wrapped[name]
         if is_stream(item):
-            return CompressedStream(item)
+            return CompressedStream(item, self.cache, self.streaming)
         else:
             return item
 
@@ -178,12 +240,13 @@ class Hwp5FileBase(ItemConversionStorage):
     `fileheader` property.
 
     :param stg: an OLE2 structured storage.
-    :type stg: an instance of storage, OleFileIO or filename
+    :type stg: an instance of storage, OleFileIO, filename, a binary file
+        object or a buffer (bytes, bytearray or memoryview) of the file.
     :raises InvalidHwp5FileError: `stg` is not a valid HWP format v5 document.
     '''
 
     def __init__(self, stg):
-        if isinstance(stg, basestring):
+        if is_olefile_source(stg):
             try:
                 stg = OleStorage(stg)
             except InvalidOleStorageError:
@@ -275,15 +338,25 @@ class Hwp5DistDoc(ItemConversionStorage):
 
 
 class Hwp5Compression(ItemConversionStorage):
-    ''' handle compressed streams in HWPv5 files '''
+    ''' handle compressed streams in HWPv5 files
+
+    :param cache: an optional StreamCache for the decompressed streams.
+    '''
+
+    def __init__(self, stg, cache=None):
+        ItemConversionStorage.__init__(self, stg)
+        self.cache = cache
 
     def resolve_conversion_for(self, name):
-        if name in ('BinData', 'BodyText', 'ViewText'):
-            return CompressedStorage
+        if name == 'BinData':
+            return partial(CompressedStorage, cache=self.cache,
+                           streaming=True)
+        elif name in ('BodyText', 'ViewText'):
+            return partial(CompressedStorage, cache=self.cache)
         elif name == 'DocInfo':
-            return CompressedStream
+            return partial(CompressedStream, cache=self.cache)
         elif name == 'Scripts':
-            return CompressedStorage
+            return partial(CompressedStorage, cache=self.cache)
 
 
 class PreviewText(object):
@@ -528,12 +601,18 @@ class HwpSummaryInfo(VersionSensitiveItem):
 class Hwp5File(ItemConversionStorage):
     ''' represents HWPv5 File
 
-        Hwp5File(stg)
+        Hwp5File(stg, stream_cache=None)
 
         stg: an instance of Storage
+        stream_cache: a StreamCache for the decompressed streams; defaults to
+            the `stream_cache` class attribute.
     '''
 
-    def __init__(self, stg):
+    stream_cache = None
+
+    def __init__(self, stg, stream_cache=None):
+        if stream_cache is not None:
+            self.stream_cache = stream_cache
         stg = Hwp5FileBase(stg)
 
         if stg.header.flags.password:
@@ -549,10 +628,19 @@ class Hwp5File(ItemConversionStorage):
             stg = Hwp5DistDoc(stg)
 
         if stg.header.flags.compressed:
-            stg = Hwp5Compression(stg)
+            stg = Hwp5Compression(stg, self.stream_cache)
 
         ItemConversionStorage.__init__(self, stg)
 
+    @classmethod
+    def from_bytes(cls, buf, *args, **kwargs):
+        ''' Open an HWP document from its bytes in memory.
+
+        :param buf: bytes, bytearray or memoryview of the document. It is
+            read in place, without being copied or written to a file.
+        '''
+        return cls(buf, *args, **kwargs)
+
     def resolve_conversion_for(self, name):
         if name == 'DocInfo':
             return self.with_version(self.docinfo_class)
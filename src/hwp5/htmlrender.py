@@ -0,0 +1,1158 @@
+# -*- coding: utf-8 -*-
+#
+#   pyhwp : hwp file format parser in python
+#   Copyright (C) 2010-2023 mete0r <https://github.com/mete0r>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+''' Render HWPv5 documents into XHTML and CSS without XSLT.
+
+The output is the same as of xsl/hwp5html.xsl and xsl/hwp5css.xsl, but
+the BodyText is rendered from its events as they go: only a top-level
+paragraph at a time is built as a tree, instead of the whole xhwp5.
+
+The XHTML is written as the xslt engine writes it with lxml, without a
+newline after the DOCTYPE or at the end. Some other XSLT processors write
+these two newlines, e.g. the ones the fixtures in the tests were made
+with.
+'''
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from itertools import chain
+from xml.etree.ElementTree import Element
+from xml.etree.ElementTree import TreeBuilder
+import logging
+import math
+import re
+
+from .binmodel.controlchar import CHID
+from .binmodel import Footer
+from .binmodel import Header
+from .binmodel import PageDef
+from .binmodel import SectionDef
+from .tagids import HWPTAG_CTRL_HEADER
+from .treeop import STARTEVENT, ENDEVENT
+from .treeop import iter_subevents
+from .utils import cached_property
+from .xmlformat import xmlevents_to_treebuilder
+from .xmlmodel import modelevents_to_xmlevents
+
+
+logger = logging.getLogger(__name__)
+
+
+XHTML_PROLOG = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" '
+    '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">'
+    '<html xmlns="http://www.w3.org/1999/xhtml">'
+)
+
+# 내용이 없으면 <br /> 처럼 닫는 XHTML 원소들
+XHTML_EMPTY_ELEMENTS = frozenset([
+    'area', 'base', 'basefont', 'br', 'col', 'frame', 'hr', 'img', 'input',
+    'isindex', 'link', 'meta', 'param',
+])
+
+# xsl/hwp5css.xsl 의 고정된 규칙들
+PAPER_CSS_RULES = (
+    ('body', (
+        ('background-color', '#eee'),
+        ('padding', '4px'),
+        ('margin', '0'),
+    )),
+    ('.Paper', (
+        ('background-color', '#fff'),
+        ('border', '1px solid black'),
+        ('margin', '1em auto'),
+    )),
+    ('.Paper:first-child', (
+        ('margin-top', '0'),
+    )),
+    ('.Paper:last-child', (
+        ('margin-bottom', '0'),
+    )),
+)
+
+LANGS = ('ko', 'en', 'cn', 'jp', 'other', 'symbol', 'user')
+
+FONT_FAMILY_GENERIC_BY_NAME = (
+    ('바탕', 'serif'),
+    ('돋움', 'sans-serif'),
+    ('명조', 'serif'),
+    ('고딕', 'sans-serif'),
+)
+
+BORDER_WIDTHS = {
+    '0.1mm': '1px',
+    '0.12mm': '1px',
+    '0.15mm': '1px',
+    '0.2mm': '1px',
+    '0.25mm': '1px',
+    '0.4mm': '2px',
+    '0.5mm': '2px',
+}
+
+BORDER_STYLES = {
+    'none': 'none',
+    'solid': 'solid',
+    'dashed': 'dashed',
+    'dotted': 'dotted',
+    'dash-dot': 'dashed',
+    'dash-dot-dot': 'dashed',
+    'long-dash': 'dahsed',
+    'large-dot': 'dotted',
+    'double': 'double',
+    'double-2': 'double',
+    'double-3': 'double',
+    'triple': 'double',
+    'wave': 'solid',
+    'double-wave': 'double',
+    'inset': 'inset',
+    'outset': 'outset',
+    'groove': 'groove',
+    'ridge': 'ridge',
+}
+
+UNDERLINES = {
+    'underline': 'underline',
+    'overline': 'overline',
+    'line_through': 'line-through',
+}
+
+UNDERLINE_STYLES = {
+    'solid': 'solid',
+    'dashed': 'dashed',
+    'dotted': 'dotted',
+    'dash_dot': 'dashed',
+    'dash_dot_dot': 'dashed',
+    'long_dashed': 'dashed',
+    'large_dotted': 'dotted',
+    'double': 'double',
+    'lower_weighted': 'double',
+    'upper_weighted': 'double',
+    'middle_weighted': 'double',
+}
+
+TEXT_ALIGNS = {
+    'center': 'center',
+    'left': 'left',
+    'right': 'right',
+    'both': 'justify',
+}
+
+# 8x8 patterns in PNG, as in xsl/hwp5css-common.xsl
+FILL_PATTERNS = {
+    'horizontal': 'iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAQAAABuBnYAAAAAAmJLR0QA/4ePzL8AAAAJcEhZcwAAAEgAAABIAEbJaz4AAAATSURBVAjXY2AgGTAy/CddEyEAAFOKAQGTpJ5ZAAAAJXRFWHRkYXRlOmNyZWF0ZQAyMDE0LTExLTA1VDE1OjM3OjA3KzA5OjAwrbX03gAAACV0RVh0ZGF0ZTptb2RpZnkAMjAxNC0xMS0wNVQxNTozNzowNyswOTowMNzoTGIAAAAASUVORK5CYII=',  # noqa
+    'vertical': 'iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAQAAABuBnYAAAAAAmJLR0QA/4ePzL8AAAAJcEhZcwAAAEgAAABIAEbJaz4AAAAVSURBVAjXY2CAgP9QmoGJAQ3QRwAAg8ABDm14IFwAAAAldEVYdGRhdGU6Y3JlYXRlADIwMTQtMTEtMDVUMTU6Mzc6MzcrMDk6MDAjOvM9AAAAJXRFWHRkYXRlOm1vZGlmeQAyMDE0LTExLTA1VDE1OjM3OjM3KzA5OjAwUmdLgQAAAABJRU5ErkJggg==',  # noqa
+    'backslash': 'iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAQAAABuBnYAAAAAAmJLR0QA/4ePzL8AAAAJcEhZcwAAAEgAAABIAEbJaz4AAAAQSURBVAjXY2D4z4ABBkAIABqKB/lrzYhNAAAAJXRFWHRkYXRlOmNyZWF0ZQAyMDE0LTExLTA1VDE1OjM4OjE0KzA5OjAwofy1UAAAACV0RVh0ZGF0ZTptb2RpZnkAMjAxNC0xMS0wNVQxNTozODoxNCswOTowMNChDewAAAAASUVORK5CYII=',  # noqa
+    'slash': 'iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAQAAABuBnYAAAAAAmJLR0QA/4ePzL8AAAAJcEhZcwAAAEgAAABIAEbJaz4AAAAPSURBVAjXY2BABf8HiAsAGooH+VFK23UAAAAldEVYdGRhdGU6Y3JlYXRlADIwMTQtMTEtMDVUMTU6Mzg6MzUrMDk6MDBFrrmZAAAAJXRFWHRkYXRlOm1vZGlmeQAyMDE0LTExLTA1VDE1OjM4OjM1KzA5OjAwNPMBJQAAAABJRU5ErkJggg==',  # noqa
+    'grid': 'iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAQAAABuBnYAAAAAAmJLR0QA/4ePzL8AAAAJcEhZcwAAAEgAAABIAEbJaz4AAAAVSURBVAjXY2T4z4AG0ASY0OVpIgAA/d8CDKGA4lwAAAAldEVYdGRhdGU6Y3JlYXRlADIwMTQtMTEtMDVUMTU6MzQ6MzUrMDk6MDBfklkXAAAAJXRFWHRkYXRlOm1vZGlmeQAyMDE0LTExLTA1VDE1OjM0OjM1KzA5OjAwLs/hqwAAAABJRU5ErkJggg==',  # noqa
+    'cross': 'iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAQAAABuBnYAAAAAAmJLR0QA/4ePzL8AAAAJcEhZcwAAAEgAAABIAEbJaz4AAAAeSURBVAjXY2CAgP9QmoGJAQ1gCDAiFKMCEszAEAAAEWMDCQJfExIAAAAldEVYdGRhdGU6Y3JlYXRlADIwMTQtMTEtMDVUMTU6Mzk6NDErMDk6MDBU5v+tAAAAJXRFWHRkYXRlOm1vZGlmeQAyMDE0LTExLTA1VDE1OjM5OjQxKzA5OjAwJbtHEQAAAABJRU5ErkJggg==',  # noqa
+}
+
+NAN = float('nan')
+INF = float('inf')
+
+XPATH_NUMBER = re.compile(r'^\s*-?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?\s*$')
+
+
+def xpath_number(value):
+    ''' number() of an attribute value; None if the attribute is absent '''
+    if value is None or not XPATH_NUMBER.match(value):
+        return NAN
+    return float(value)
+
+
+def xpath_string(number):
+    ''' string() of a number, formatted as libxml2 does '''
+    if number != number:
+        return 'NaN'
+    if number in (INF, -INF):
+        return 'Infinity' if number > 0 else '-Infinity'
+    if number == 0:
+        return '0'
+    if -2147483648 < number < 2147483647 and number == int(number):
+        return '%d' % number
+    absolute = abs(number)
+    if absolute > 1E9 or absolute < 1E-5:
+        mantissa, exponent = ('%.14e' % number).split('e')
+        return mantissa.rstrip('0').rstrip('.') + 'e' + exponent
+    integer_place = int(math.log10(absolute))
+    if integer_place > 0:
+        fraction_place = 15 - integer_place - 1
+    else:
+        fraction_place = 15 - integer_place
+    return ('%.*f' % (fraction_place, number)).rstrip('0').rstrip('.')
+
+
+def xpath_floor(number):
+    if number != number or number in (INF, -INF):
+        return number
+    return float(math.floor(number))
+
+
+def nth(elements, position):
+    ''' elements[position], with a 1-based position as XPath predicates '''
+    if position != position or position != int(position):
+        return None
+    position = int(position)
+    if 0 < position <= len(elements):
+        return elements[position - 1]
+    return None
+
+
+def attr(element, name):
+    ''' value-of an attribute of an element which may be absent '''
+    if element is None:
+        return ''
+    return element.get(name, '')
+
+
+def attr_number(element, name):
+    if element is None:
+        return NAN
+    return xpath_number(element.get(name))
+
+
+def attr_equals(a, b, name):
+    ''' whether @name of both elements exist and equal '''
+    if a is None or b is None:
+        return False
+    value = a.get(name)
+    return value is not None and value == b.get(name)
+
+
+def hwpunit_to_mm(hwpunit):
+    mm = xpath_floor(hwpunit / 100 * 0.352777778 * 100 + 0.5) / 100
+    return xpath_string(mm) + 'mm'
+
+
+def hwpunit_to_pt(hwpunit):
+    return xpath_string(hwpunit / 100) + 'pt'
+
+
+def css_rule(selector, declarations):
+    return selector + ' {\n' + declarations + '}\n'
+
+
+def css_declaration(property, value):
+    return '  ' + property + ': ' + value + ';\n'
+
+
+def escape_text(text):
+    ''' escape a text node, as libxml2 serializes it '''
+    return text.replace(
+        '&', '&amp;'
+    ).replace(
+        '<', '&lt;'
+    ).replace(
+        '>', '&gt;'
+    ).replace(
+        '\r', '&#13;'
+    )
+
+
+def escape_attribute(value):
+    ''' escape an attribute value, as libxml2 serializes it '''
+    return escape_text(value).replace(
+        '"', '&quot;'
+    ).replace(
+        '\n', '&#10;'
+    ).replace(
+        '\t', '&#9;'
+    )
+
+
+def xhtml_element(name, attributes, content):
+    ''' serialize an element in the XHTML compatible syntax '''
+    start = '<' + name + ''.join(' %s="%s"' % (n, escape_attribute(v))
+                                 for n, v in attributes)
+    if content:
+        return start + '>' + content + '</' + name + '>'
+    if name in XHTML_EMPTY_ELEMENTS:
+        return start + ' />'
+    return start + '></' + name + '>'
+
+
+def normalize_text(text):
+    ''' as an XML parser reads the xhwp5; see xmlevents_to_treebuilder() '''
+    text = text.replace('\x00', '')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def build_element(xmlevents):
+    ''' build an element from the xml events of a subtree '''
+    return xmlevents_to_treebuilder(xmlevents, TreeBuilder())
+
+
+def subtree_xmlevents(item, xmlevents):
+    ''' xml events of a subtree, whose start `item` is just consumed '''
+    return chain([(STARTEVENT, item)], iter_subevents(xmlevents))
+
+
+def count_headers_footers(section):
+    ''' count Header/Footer controls in a section, from its records only '''
+    chids = (CHID.HEADER, CHID.FOOTER)
+    count = 0
+    for record in section.records(tagids=(HWPTAG_CTRL_HEADER,)):
+        if CHID.decode(record['payload'][:4]) in chids:
+            count += 1
+    return count
+
+
+def section_heads(section, section_idx):
+    ''' Collect the SectionDef, with its PageDef, and the Header/Footer
+    subtrees of a section as elements.
+
+    It stops as soon as they are all collected: the records of the section
+    are counted first to know how many Header/Footer are there.
+
+    :returns: a tuple of the SectionDef, and a list of Header/Footer
+    '''
+    remaining = count_headers_footers(section)
+    sectiondef = None
+    headersfooters = []
+
+    events = section.events(section_idx=section_idx, fused=True)
+    for event, item in events:
+        if event is not STARTEVENT:
+            continue
+        model = item[0]
+        if model is SectionDef and sectiondef is None:
+            captured = [(STARTEVENT, item)]
+            for event, child in events:
+                captured.append((event, child))
+                if event is ENDEVENT and child[0] is PageDef:
+                    break
+            captured.append((ENDEVENT, item))
+            sectiondef = build_element(modelevents_to_xmlevents(captured))
+        elif model is Header or model is Footer:
+            captured = subtree_xmlevents(item, events)
+            captured = modelevents_to_xmlevents(captured)
+            headersfooters.append(build_element(captured))
+            remaining -= 1
+        if sectiondef is not None and remaining <= 0:
+            break
+    return sectiondef, headersfooters
+
+
+class HTMLRenderer(object):
+    ''' Render an HWPv5 document into XHTML and CSS, as xsl/hwp5html.xsl and
+    xsl/hwp5css.xsl do.
+
+    The DocInfo, the summary and the Header/Footer are small and are built
+    as trees first. Then the BodyText is rendered in one pass over its
+    events, a top-level paragraph at a time, and written as it goes.
+    '''
+
+    def __init__(self, hwp5file, embedbin=False):
+        self.hwp5file = hwp5file
+        self.embedbin = embedbin
+
+    @cached_property
+    def docinfo(self):
+        kwargs = dict()
+        if self.embedbin and 'BinData' in self.hwp5file:
+            kwargs['embedbin'] = self.hwp5file['BinData']
+        xmlevents = self.hwp5file.docinfo.xmlevents(**kwargs)
+        return build_element(xmlevents)
+
+    @cached_property
+    def idmappings(self):
+        idmappings = self.docinfo.find('IdMappings')
+        if idmappings is None:
+            idmappings = Element('IdMappings')
+        return idmappings
+
+    @cached_property
+    def styles(self):
+        return self.idmappings.findall('Style')
+
+    @cached_property
+    def parashapes(self):
+        return self.idmappings.findall('ParaShape')
+
+    @cached_property
+    def charshapes(self):
+        return self.idmappings.findall('CharShape')
+
+    @cached_property
+    def facenames(self):
+        return self.idmappings.findall('FaceName')
+
+    @cached_property
+    def bindatas(self):
+        return self.idmappings.findall('BinData')
+
+    @cached_property
+    def facename_bases(self):
+        ''' positions of the first FaceNames of each languages '''
+        bases = dict()
+        base = 1
+        for lang in LANGS:
+            bases[lang] = base
+            base = base + attr_number(self.idmappings, lang + '-fonts')
+        return bases
+
+    @cached_property
+    def title(self):
+        ''' the title in the summary info, or None if there is no summary
+        info '''
+        if '\x05HwpSummaryInformation' not in self.hwp5file:
+            return None
+        summaryinfo = build_element(self.hwp5file.summaryinfo.xmlevents())
+        prop = summaryinfo.find(".//Property[@id-label='PIDSI_TITLE']")
+        return attr(prop, 'value')
+
+    @cached_property
+    def sections_heads(self):
+        ''' SectionDefs and Header/Footers of the BodyText '''
+        sectiondefs = []
+        headers = []
+        footers = []
+        text = self.hwp5file.text
+        for idx in text.section_indexes():
+            section = text.section(idx)
+            sectiondef, headersfooters = section_heads(section, idx)
+            if sectiondef is not None:
+                sectiondefs.append(sectiondef)
+            for element in headersfooters:
+                if element.tag == 'Header':
+                    headers.append(element)
+                else:
+                    footers.append(element)
+        return sectiondefs, headers, footers
+
+    # CSS
+
+    def write_css(self, output):
+        for chunk in self.css_chunks():
+            output.write(chunk.encode('utf-8'))
+
+    def css_chunks(self):
+        for selector, declarations in PAPER_CSS_RULES:
+            yield css_rule(selector, ''.join(css_declaration(p, v)
+                                             for p, v in declarations))
+        for chunk in self.idmappings_css_rules():
+            yield chunk
+
+    def idmappings_css_rules(self):
+        idmappings = self.idmappings
+        yield '/* Styles */\n'
+        for style in self.styles:
+            yield self.style_css_rule(style)
+        yield '/* Paragraph attributes */\n'
+        for position, parashape in enumerate(self.parashapes):
+            yield self.parashape_css_rule(parashape, position)
+        yield '/* Text attributes */\n'
+        for position, charshape in enumerate(self.charshapes):
+            selector = 'span.charshape-%d' % position
+            yield self.charshape_css_rule(charshape, selector)
+        for position, borderfill in enumerate(idmappings.findall('BorderFill'),
+                                              1):
+            yield self.borderfill_css_rule(borderfill, position)
+        for position, bullet in enumerate(idmappings.findall('Bullet'), 1):
+            yield self.bullet_css_rule(bullet, position)
+
+    def style_css_rule(self, style):
+        paragraph_selector = '.' + attr(style, 'name').replace(' ', '-')
+        spans_selector = paragraph_selector + ' > span'
+        rules = []
+        if style.get('kind') == 'paragraph':
+            parashape = nth(self.parashapes,
+                            attr_number(style, 'parashape-id') + 1)
+            declarations = '/* @parashape-id = %s*/\n' % attr(style,
+                                                              'parashape-id')
+            if parashape is not None:
+                declarations += self.parashape_css_declarations(parashape)
+            rules.append(css_rule(paragraph_selector, declarations))
+            declarations = ''
+            if parashape is not None:
+                declarations = self.parashape_span_css_declarations(parashape)
+            rules.append(css_rule(spans_selector, declarations))
+        rules.append('/* @charshape-id = %s*/\n' % attr(style, 'charshape-id'))
+        charshape = nth(self.charshapes,
+                        attr_number(style, 'charshape-id') + 1)
+        if charshape is not None:
+            rules.append(self.charshape_css_rule(charshape, spans_selector))
+        return ''.join(rules)
+
+    def parashape_css_rule(self, parashape, position):
+        paragraph_selector = 'p.parashape-%d' % position
+        spans_selector = paragraph_selector + ' > span'
+        return (
+            css_rule(paragraph_selector,
+                     self.parashape_css_declarations(parashape)) +
+            css_rule(spans_selector,
+                     self.parashape_span_css_declarations(parashape))
+        )
+
+    def parashape_css_declarations(self, parashape):
+        margins = ' '.join(
+            hwpunit_to_pt(attr_number(parashape, 'doubled-margin-' + side) / 2)
+            for side in ('top', 'right', 'bottom', 'left')
+        )
+        declarations = [
+            css_declaration('margin', margins),
+            css_declaration('text-align',
+                            TEXT_ALIGNS.get(parashape.get('align'),
+                                            'justify')),
+        ]
+        indent = attr_number(parashape, 'indent')
+        declarations.append(css_declaration('text-indent',
+                                            hwpunit_to_pt(indent / 2)))
+        if indent < 0:
+            declarations.append(css_declaration('padding-left',
+                                                hwpunit_to_pt(indent / 2 *
+                                                              -1)))
+        if parashape.get('linespacing-type') == 'ratio':
+            linespacing = attr_number(parashape, 'linespacing')
+            declarations.append(css_declaration(
+                'min-height', xpath_string(linespacing / 100) + 'em'
+            ))
+        return ''.join(declarations)
+
+    def parashape_span_css_declarations(self, parashape):
+        if parashape.get('linespacing-type') == 'ratio':
+            linespacing = attr_number(parashape, 'linespacing')
+            return css_declaration('line-height',
+                                   xpath_string(linespacing / 100))
+        return ''
+
+    def bullet_css_rule(self, bullet, position):
+        declarations = [
+            css_declaration('content', '"%s"' % attr(bullet, 'char')),
+            css_declaration('display', 'inline-block'),
+            css_declaration('text-align', attr(bullet, 'align')),
+        ]
+        width = attr_number(bullet, 'width')
+        space = attr_number(bullet, 'space')
+        if width == 0:
+            declarations.append(css_declaration('width', '1em'))
+            declarations.append(css_declaration(
+                'margin-right', xpath_string(space / 100) + 'em'
+            ))
+        else:
+            declarations.append(css_declaration('width',
+                                                hwpunit_to_pt(width)))
+            declarations.append(css_declaration(
+                'margin-right', hwpunit_to_pt(width * space / 100)
+            ))
+        return css_rule('.Bullet-%d::before' % position, ''.join(declarations))
+
+    def charshape_css_rule(self, charshape, selector):
+        rules = [css_rule(selector,
+                          self.charshape_css_declarations(charshape))]
+        fontface = charshape.find('FontFace')
+        relativesize = charshape.find('RelativeSize')
+        basesize = attr_number(charshape, 'basesize')
+        for lang in LANGS:
+            facename = nth(self.facenames,
+                           self.facename_bases[lang] +
+                           attr_number(fontface, lang))
+            font_family = ''
+            if facename is not None:
+                font_family = ('"' + attr(facename, 'name') + '"' +
+                               self.font_family_generic(facename))
+            font_size = basesize * attr_number(relativesize, lang) / 100
+            declarations = (
+                css_declaration('font-family', font_family) +
+                css_declaration('font-size', hwpunit_to_pt(font_size))
+            )
+            rules.append(css_rule(selector + '.lang-' + lang, declarations))
+        return ''.join(rules)
+
+    def charshape_css_declarations(self, charshape):
+        declarations = [
+            css_declaration('color', attr(charshape, 'text-color')),
+        ]
+        if attr_number(charshape, 'italic') == 1:
+            declarations.append(css_declaration('font-style', 'italic'))
+        if attr_number(charshape, 'bold') == 1:
+            declarations.append(css_declaration('font-weight', 'bold'))
+        underline = UNDERLINES.get(charshape.get('underline'))
+        if underline is not None:
+            declarations.append(css_declaration('text-decoration', underline))
+            color = attr(charshape, 'underline-color')
+            style = UNDERLINE_STYLES.get(charshape.get('underline-style'), '')
+            for prefix in ('', '-moz-', '-webkit-'):
+                declarations.append(css_declaration(
+                    prefix + 'text-decoration-color', color
+                ))
+            for prefix in ('', '-moz-', '-webkit-'):
+                declarations.append(css_declaration(
+                    prefix + 'text-decoration-style', style
+                ))
+        return ''.join(declarations)
+
+    def font_family_generic(self, facename):
+        name = attr(facename, 'name')
+        for keyword, generic in FONT_FAMILY_GENERIC_BY_NAME:
+            if keyword in name:
+                return ', ' + generic
+        return ''.join(self.panose1_font_family_generic(panose1)
+                       for panose1 in facename.findall('Panose1'))
+
+    def panose1_font_family_generic(self, panose1):
+        family_type = attr_number(panose1, 'family-type')
+        if family_type == 2:
+            if attr_number(panose1, 'proportion') == 9:
+                return ', monospace'
+            serif_style = attr_number(panose1, 'serif-style')
+            if serif_style > 10:
+                return ', sans-serif'
+            if serif_style < 11:
+                return ', serif'
+        elif family_type == 3:
+            return ', cursive'
+        elif family_type == 4:
+            return ', fantasy'
+        return ''
+
+    def borderfill_css_rule(self, borderfill, position):
+        declarations = []
+        for side in ('top', 'right', 'bottom', 'left'):
+            value = ''.join(self.border_value(border)
+                            for border in borderfill.findall('Border')
+                            if border.get('attribute-name') == side)
+            declarations.append(css_declaration('border-' + side, value))
+        for element in borderfill.findall('FillColorPattern'):
+            declarations.append(self.fill_colorpattern_css(element))
+        for element in borderfill.findall('FillGradation'):
+            declarations.append(self.fill_gradation_css(element))
+        for element in borderfill.findall('FillImage'):
+            declarations.append(self.fill_image_css(element))
+        return css_rule('.borderfill-%d' % position, ''.join(declarations))
+
+    def border_value(self, border):
+        width = attr(border, 'width')
+        width = BORDER_WIDTHS.get(width, width)
+        style = BORDER_STYLES.get(border.get('stroke-type'), 'solid')
+        return width + ' ' + style + ' ' + attr(border, 'color')
+
+    def fill_colorpattern_css(self, fill):
+        css = css_declaration('background-color',
+                              attr(fill, 'background-color'))
+        pattern_type = attr(fill, 'pattern-type')
+        if pattern_type == 'none':
+            return css
+        if pattern_type in FILL_PATTERNS:
+            value = 'url(data:image/png;base64,%s)' % (
+                FILL_PATTERNS[pattern_type]
+            )
+            if pattern_type != 'vertical':
+                value += '/* %s */' % pattern_type
+            return css + css_declaration('background-image', value)
+        return css + '/* unrecognized @pattern-type: %s */' % pattern_type
+
+    def fill_gradation_css(self, fill):
+        value = (
+            '(' + attr(fill, 'shear') + 'deg' +
+            ''.join(',' + attr(color, 'hex')
+                    for color in fill.findall('colors')) +
+            ')'
+        )
+        return ''.join(
+            css_declaration('background-image', prefix + value)
+            for prefix in ('linear-gradient', '-webkit-linear-gradient',
+                           '-moz-linear-gradient')
+        )
+
+    def fill_image_css(self, fill):
+        if fill.get('fillimage-type') == 'resize':
+            bindata = nth(self.bindatas, attr_number(fill, 'bindata-id'))
+            url = ''
+            if bindata is not None:
+                url = ''.join('bindata/' + attr(embedding, 'storage-id') +
+                              '.' + attr(embedding, 'ext')
+                              for embedding
+                              in bindata.findall('BinDataEmbedding'))
+            return (
+                css_declaration('background-image', 'url(' + url + ') ') +
+                css_declaration('background-size', '100% 100%')
+            )
+        return '/*  unsupported @fillimage-type: %s */\n' % (
+            attr(fill, 'fillimage-type')
+        )
+
+    def sectiondef_css_rule(self, sectiondef):
+        selector = '.Section-' + attr(sectiondef, 'section-id')
+        pagedefs = sectiondef.findall('PageDef')
+        return (
+            css_rule(selector,
+                     ''.join(self.paper_dimension_css(pagedef)
+                             for pagedef in pagedefs)) +
+            css_rule(selector + ' .HeaderPageFooter',
+                     ''.join(self.headerpagefooter_css(pagedef)
+                             for pagedef in pagedefs)) +
+            css_rule(selector + ' .Page',
+                     ''.join(self.page_css(pagedef) for pagedef in pagedefs))
+        )
+
+    def paper_dimension_css(self, pagedef):
+        orientation = pagedef.get('orientation')
+        if orientation == 'portrait':
+            width = attr_number(pagedef, 'width')
+        elif orientation == 'landscape':
+            width = attr_number(pagedef, 'height')
+        else:
+            return ''
+        return css_declaration('width', hwpunit_to_mm(width))
+
+    def headerpagefooter_css(self, pagedef):
+        return css_declaration('position', 'relative') + ''.join(
+            css_declaration('margin-' + side,
+                            hwpunit_to_mm(attr_number(pagedef,
+                                                      side + '-offset')))
+            for side in ('top', 'right', 'bottom', 'left')
+        )
+
+    def page_css(self, pagedef):
+        return (
+            css_declaration('padding-top',
+                            hwpunit_to_mm(attr_number(pagedef,
+                                                      'header-offset'))) +
+            css_declaration('padding-bottom',
+                            hwpunit_to_mm(attr_number(pagedef,
+                                                      'footer-offset')))
+        )
+
+    def headerfooter_css_rule(self, element, selector, vertical):
+        paragraphlist = element.find(element.tag + 'ParagraphList')
+        return css_rule(selector, (
+            css_declaration('position', 'absolute') +
+            css_declaration('left', '0') +
+            css_declaration(vertical, '0') +
+            css_declaration('width',
+                            hwpunit_to_mm(attr_number(paragraphlist,
+                                                      'width'))) +
+            css_declaration('height',
+                            hwpunit_to_mm(attr_number(paragraphlist,
+                                                      'height')))
+        ))
+
+    # XHTML
+
+    def write_xhtml(self, output):
+        for chunk in self.xhtml_chunks():
+            output.write(chunk.encode('utf-8'))
+
+    def xhtml_chunks(self):
+        yield XHTML_PROLOG
+        yield self.head()
+        xmlevents = self.hwp5file.text.xmlevents(fused=True)
+        for chunk in self.body_chunks(xmlevents):
+            yield chunk
+        yield '</html>'
+
+    def head(self):
+        sectiondefs, headers, footers = self.sections_heads
+        head = [
+            xhtml_element('meta', [
+                ('http-equiv', 'content-type'),
+                ('content', 'text/html; charset=utf-8'),
+            ], ''),
+        ]
+        if self.title is not None:
+            head.append(xhtml_element('title', [], escape_text(self.title)))
+        head.append(
+            xhtml_element('link', [
+                ('rel', 'stylesheet'),
+                ('href', 'styles.css'),
+                ('type', 'text/css'),
+            ], '')
+        )
+        style = ['\n']
+        for sectiondef in sectiondefs:
+            style.append(self.sectiondef_css_rule(sectiondef))
+        for header in headers:
+            style.append(self.headerfooter_css_rule(header, '.HeaderArea',
+                                                    'top'))
+        for footer in footers:
+            style.append(self.headerfooter_css_rule(footer, '.FooterArea',
+                                                    'bottom'))
+        style = ''.join(style)
+        if '<' in style or '&' in style or ']]>' in style:
+            style = '<![CDATA[' + style.replace(']]>',
+                                                ']]]]><![CDATA[>') + ']]>'
+        head.append(xhtml_element('style', [('type', 'text/css')], style))
+        return xhtml_element('head', [], ''.join(head))
+
+    @cached_property
+    def headers_divs(self):
+        sectiondefs, headers, footers = self.sections_heads
+        return ''.join(self.headerfooter_div(header, 'HeaderArea')
+                       for header in headers)
+
+    @cached_property
+    def footers_divs(self):
+        sectiondefs, headers, footers = self.sections_heads
+        return ''.join(self.headerfooter_div(footer, 'FooterArea')
+                       for footer in footers)
+
+    def headerfooter_div(self, element, cls):
+        content = []
+        for paragraphlist in element.findall(element.tag + 'ParagraphList'):
+            ancestors = (element, paragraphlist)
+            for paragraph in paragraphlist.findall('Paragraph'):
+                content.append(self.paragraph(paragraph, ancestors))
+        return xhtml_element('div', [('class', cls)], ''.join(content))
+
+    def body_chunks(self, xmlevents):
+        ''' Render the BodyText from its xml events.
+
+        The elements which have their own templates are built as trees and
+        rendered as a whole; the others are only walked through, as the
+        built-in templates of XSLT do.
+        '''
+        xmlevents = iter(xmlevents)
+        stack = []
+        for event, item in xmlevents:
+            if event is STARTEVENT:
+                name, attributes = item
+                depth = len(stack)
+                if depth == 0:
+                    stack.append(Element(name, attributes))
+                    yield '<body>'
+                elif depth == 1:
+                    if name == 'SectionDef':
+                        stack.append(Element(name, attributes))
+                        yield self.section_start(attributes)
+                    else:
+                        for _ in iter_subevents(xmlevents):
+                            pass
+                elif name in self.templates:
+                    subtree = subtree_xmlevents(item, xmlevents)
+                    element = build_element(subtree)
+                    yield self.apply_template(element, tuple(stack))
+                elif name == 'PageDef' and stack[-1].tag == 'SectionDef':
+                    # $pagedef in extendedcontrol-hpos
+                    subtree = subtree_xmlevents(item, xmlevents)
+                    element = build_element(subtree)
+                    stack[-1].append(element)
+                    yield self.apply_templates(element, tuple(stack))
+                else:
+                    stack.append(Element(name, attributes))
+            elif event is ENDEVENT:
+                element = stack.pop()
+                if element.tag == 'SectionDef':
+                    yield self.section_end()
+                elif not stack:
+                    yield '</body>'
+            elif len(stack) > 1:
+                yield escape_text(normalize_text(item))
+
+    def section_start(self, attributes):
+        return (
+            '<div class="Section Section-%s Paper">' % escape_attribute(
+                normalize_text(attributes.get('section-id', ''))
+            ) +
+            '<div class="HeaderPageFooter">' +
+            self.headers_divs +
+            '<div class="Page">'
+        )
+
+    def section_end(self):
+        return '</div>' + self.footers_divs + '</div></div>'
+
+    @cached_property
+    def templates(self):
+        return {
+            'Paragraph': self.paragraph,
+            'ControlChar': self.controlchar,
+            'Text': self.text,
+            'AutoNumbering': self.autonumbering,
+            'TableControl': self.tablecontrol,
+            'TableCaption': self.tablecaption,
+            'TableRow': self.tablerow,
+            'TableCell': self.tablecell,
+            'GShapeObjectControl': self.gshapeobjectcontrol,
+            'ShapePicture': self.shapepicture,
+        }
+
+    def apply_template(self, element, ancestors):
+        template = self.templates.get(element.tag, self.apply_templates)
+        return template(element, ancestors)
+
+    def apply_templates(self, element, ancestors):
+        ''' render the children, as the built-in template for elements '''
+        content = []
+        if element.text:
+            content.append(escape_text(element.text))
+        ancestors = ancestors + (element,)
+        for child in element:
+            content.append(self.apply_template(child, ancestors))
+            if child.tail:
+                content.append(escape_text(child.tail))
+        return ''.join(content)
+
+    def class_bullet(self, element):
+        ''' add-class-bullet of a Paragraph or a Style '''
+        parashape = nth(self.parashapes,
+                        attr_number(element, 'parashape-id') + 1)
+        if attr_number(parashape, 'numbering-bullet-id') > 0:
+            return ' Bullet-' + attr(parashape, 'numbering-bullet-id')
+        return ''
+
+    def paragraph(self, paragraph, ancestors):
+        style = nth(self.styles, attr_number(paragraph, 'style-id') + 1)
+        cls = attr(style, 'name').replace(' ', '-')
+        if attr_equals(style, paragraph, 'parashape-id'):
+            cls += self.class_bullet(style)
+        else:
+            cls += ' parashape-' + attr(paragraph, 'parashape-id')
+            cls += self.class_bullet(paragraph)
+
+        ancestors = ancestors + (paragraph,)
+        linesegs = paragraph.findall('LineSeg')
+        content = []
+        for lineseg in linesegs:
+            lineseg_ancestors = ancestors + (lineseg,)
+            for child in lineseg:
+                tag = child.tag
+                if tag == 'Text':
+                    content.append(self.text_span(child, style))
+                elif tag == 'ControlChar':
+                    content.append(self.controlchar(child,
+                                                    lineseg_ancestors))
+                elif tag == 'AutoNumbering':
+                    content.append(self.autonumbering(child,
+                                                      lineseg_ancestors))
+                elif (tag in ('TableControl', 'GShapeObjectControl') and
+                      child.get('inline') == '1'):
+                    content.append(self.apply_template(child,
+                                                       lineseg_ancestors))
+        rendered = [xhtml_element('p', [('class', cls)], ''.join(content))]
+        for tag in ('TableControl', 'GShapeObjectControl'):
+            for lineseg in linesegs:
+                lineseg_ancestors = ancestors + (lineseg,)
+                for child in lineseg.findall(tag):
+                    if child.get('inline') == '0':
+                        rendered.append(self.apply_template(
+                            child, lineseg_ancestors
+                        ))
+        return ''.join(rendered)
+
+    def controlchar(self, controlchar, ancestors):
+        return escape_text(attr(controlchar, 'char'))
+
+    def text(self, text, ancestors):
+        if (len(ancestors) >= 2 and ancestors[-1].tag == 'LineSeg' and
+                ancestors[-2].tag == 'Paragraph'):
+            paragraph = ancestors[-2]
+            style = nth(self.styles, attr_number(paragraph, 'style-id') + 1)
+            return self.text_span(text, style)
+        return self.apply_templates(text, ancestors)
+
+    def text_span(self, text, style):
+        ''' Paragraph/LineSeg/Text '''
+        cls = 'lang-' + attr(text, 'lang')
+        if not attr_equals(style, text, 'charshape-id'):
+            cls += ' charshape-' + attr(text, 'charshape-id')
+        return xhtml_element('span', [('class', cls)],
+                             escape_text(text.text or ''))
+
+    def autonumbering(self, autonumbering, ancestors):
+        cls = 'autonumbering autonumbering-' + attr(autonumbering, 'kind')
+        content = (attr(autonumbering, 'prefix') +
+                   attr(autonumbering, 'number') +
+                   attr(autonumbering, 'suffix'))
+        return xhtml_element('span', [('class', cls)], escape_text(content))
+
+    def tablecontrol(self, control, ancestors):
+        inline = control.get('inline')
+        if inline not in ('0', '1'):
+            return self.apply_templates(control, ancestors)
+        tablebody = control.find('TableBody')
+        borderfill = 'borderfill-' + attr(tablebody, 'borderfill-id')
+        cellspacing = attr(tablebody, 'cellspacing')
+        table_border = css_declaration('border-collapse', 'collapse')
+        content = self.apply_templates(control, ancestors)
+        if inline == '1':
+            table = xhtml_element('table', [
+                ('class', borderfill),
+                ('cellspacing', cellspacing),
+                ('style', self.control_css_width(control) + table_border),
+            ], content)
+            return xhtml_element('span', [
+                ('class', 'TableControl'),
+                ('style', css_declaration('display', 'inline-block')),
+            ], table)
+        return xhtml_element('table', [
+            ('class', 'TableControl ' + borderfill),
+            ('cellspacing', cellspacing),
+            ('style', (self.control_css_width(control) +
+                       self.control_css_hpos(control, ancestors) +
+                       table_border)),
+        ], content)
+
+    def tablecaption(self, caption, ancestors):
+        position = caption.get('position')
+        if position == 'top':
+            margin = 'margin-bottom'
+        elif position == 'bottom':
+            margin = 'margin-top'
+        else:
+            margin = None
+        if margin:
+            style = (
+                css_declaration('caption-side', position) +
+                css_declaration(margin,
+                                hwpunit_to_mm(attr_number(caption,
+                                                          'separation'))) +
+                css_declaration('width',
+                                hwpunit_to_mm(attr_number(caption, 'width')))
+            )
+        else:
+            style = '/* not supported @position: %s */\n' % (
+                attr(caption, 'position')
+            )
+        return xhtml_element('caption', [
+            ('class', 'TableCaption'),
+            ('style', style),
+        ], self.apply_templates(caption, ancestors))
+
+    def tablerow(self, row, ancestors):
+        return xhtml_element('tr', [], self.apply_templates(row, ancestors))
+
+    def tablecell(self, cell, ancestors):
+        padding = ' '.join(
+            hwpunit_to_mm(attr_number(cell, 'padding-' + side))
+            for side in ('top', 'right', 'bottom', 'left')
+        )
+        style = (
+            css_declaration('width',
+                            hwpunit_to_mm(attr_number(cell, 'width'))) +
+            css_declaration('height',
+                            hwpunit_to_mm(attr_number(cell, 'height'))) +
+            css_declaration('padding', padding)
+        )
+        return xhtml_element('td', [
+            ('class', 'borderfill-' + attr(cell, 'borderfill-id')),
+            ('style', style),
+            ('rowspan', attr(cell, 'rowspan')),
+            ('colspan', attr(cell, 'colspan')),
+        ], self.apply_templates(cell, ancestors))
+
+    def gshapeobjectcontrol(self, control, ancestors):
+        inline = control.get('inline')
+        if inline == '1':
+            return xhtml_element('span', [
+                ('class', 'GShapeObjectControl'),
+                ('style', (self.control_css_width(control) +
+                           css_declaration('display', 'inline-block'))),
+            ], self.apply_templates(control, ancestors))
+        elif inline == '0':
+            return xhtml_element('div', [
+                ('class', 'GShapeObjectControl'),
+                ('style', (self.control_css_width(control) +
+                           self.control_css_hpos(control, ancestors))),
+            ], self.apply_templates(control, ancestors))
+        return self.apply_templates(control, ancestors)
+
+    def shapepicture(self, picture, ancestors):
+        attributes = []
+        pictureinfo = picture.find('PictureInfo')
+        bindata = nth(self.bindatas, attr_number(pictureinfo, 'bindata-id'))
+        if bindata is not None:
+            for embedding in bindata.findall('BinDataEmbedding'):
+                if embedding.get('inline') == 'true':
+                    src = 'data:;base64,' + (embedding.text or '')
+                else:
+                    src = ('bindata/' + attr(embedding, 'storage-id') + '.' +
+                           attr(embedding, 'ext'))
+                attributes = [('src', src)]
+        parent = ancestors[-1] if ancestors else None
+        if parent is not None and parent.tag == 'ShapeComponent':
+            style = (
+                css_declaration('width',
+                                hwpunit_to_mm(attr_number(parent,
+                                                          'width'))) +
+                ' ' +
+                css_declaration('height',
+                                hwpunit_to_mm(attr_number(parent,
+                                                          'height')))
+            )
+        else:
+            style = ' '
+        attributes.append(('style', style))
+        return xhtml_element('img', attributes, '')
+
+    def control_css_width(self, control):
+        return css_declaration('width',
+                               hwpunit_to_mm(attr_number(control, 'width')))
+
+    def control_css_hpos(self, control, ancestors):
+        ''' extendedcontrol-hpos: margin-left of TableControl and
+        GShapeObjectControl, which are placed in a LineSeg of a Paragraph.
+        '''
+        paragraph = ancestors[-2] if len(ancestors) >= 2 else None
+        section = ancestors[-4] if len(ancestors) >= 4 else None
+        pagedef = section.find('PageDef') if section is not None else None
+        parashape = nth(self.parashapes,
+                        attr_number(paragraph, 'parashape-id') + 1)
+
+        hrelto = attr(control, 'hrelto')
+        halign = attr(control, 'halign')
+        css = '/* hrelto: %s halign: %s*/' % (hrelto, halign)
+
+        x = attr_number(control, 'x')
+        width = attr_number(control, 'width')
+        margin_left = attr_number(control, 'margin-left')
+        margin_right = attr_number(control, 'margin-right')
+        paper_width = attr_number(pagedef, 'width')
+        left_offset = attr_number(pagedef, 'left-offset')
+        right_offset = attr_number(pagedef, 'right-offset')
+        para_margin_left = attr_number(parashape, 'doubled-margin-left') / 2
+        para_margin_right = attr_number(parashape, 'doubled-margin-right') / 2
+
+        if hrelto == 'paragraph':
+            if halign == 'left':
+                value = para_margin_left + margin_left + x
+            elif halign == 'right':
+                # 종이 오른쪽 끝에서 쪽/문단 오른쪽 여백, x, 개체 오른쪽 여백과
+                # 넓이만큼 왼쪽으로 간 뒤 쪽 x축으로
+                value = (paper_width - right_offset - para_margin_right -
+                         x - margin_right - width - left_offset)
+            elif halign == 'center':
+                value = ((paper_width - left_offset - right_offset) / 2 -
+                         width / 2 + x + para_margin_left)
+            else:
+                return css
+        elif hrelto in ('column', 'page'):
+            if halign == 'left':
+                value = margin_left + x
+            elif halign == 'right':
+                value = (paper_width - right_offset -
+                         x - margin_right - width - left_offset)
+            elif halign == 'center':
+                value = ((paper_width - left_offset - right_offset) / 2 -
+                         width / 2 + x)
+            else:
+                return css
+        elif hrelto == 'paper':
+            if halign == 'left':
+                value = margin_left + x - left_offset
+            elif halign == 'right':
+                value = paper_width - x - margin_right - width - left_offset
+            elif halign == 'center':
+                value = paper_width / 2 - width / 2 + x - left_offset
+            else:
+                return css
+        else:
+            return css
+        return css + css_declaration('margin-left', hwpunit_to_mm(value))
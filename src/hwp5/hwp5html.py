@@ -32,6 +32,7 @@ import sys
 
 from . import __version__ as version
 from .cli import init_logger
+from .cli import init_stream_cache
 from .transforms import BaseTransform
 from .utils import cached_property
 
@@ -52,12 +53,22 @@ RESOURCE_PATH_XSL_XHTML = 'xsl/hwp5html.xsl'
 
 
 class HTMLTransform(BaseTransform):
+    '''
+    :param engine: 'xslt' to render the xhwp5 with xsl/hwp5html.xsl and
+        xsl/hwp5css.xsl, or 'stream' to render them with
+        :class:`hwp5.htmlrender.HTMLRenderer`, without XSLT and without
+        building the xhwp5.
+    '''
+
+    engines = ('xslt', 'stream')
 
     @property
     def transform_hwp5_to_css(self):
         '''
         >>> T.transform_hwp5_to_css(hwp5file, 'styles.css')
         '''
+        if self.engine == 'stream':
+            return self.transform_hwp5_to_css_stream
         transform_xhwp5 = self.transform_xhwp5_to_css
         return self.make_transform_hwp5(transform_xhwp5)
 
@@ -66,6 +77,8 @@ class HTMLTransform(BaseTransform):
         '''
         >>> T.transform_hwp5_to_xhtml(hwp5file, 'index.xhtml')
         '''
+        if self.engine == 'stream':
+            return self.transform_hwp5_to_xhtml_stream
         transform_xhwp5 = self.transform_xhwp5_to_xhtml
         return self.make_transform_hwp5(transform_xhwp5)
 
@@ -73,12 +86,37 @@ class HTMLTransform(BaseTransform):
         '''
         >>> T.transform_hwp5_to_dir(hwp5file, 'output')
         '''
-        with self.transformed_xhwp5_at_temp(hwp5file) as xhwp5path:
-            self.transform_xhwp5_to_dir(xhwp5path, outdir)
+        if self.engine == 'stream':
+            self.transform_hwp5_to_dir_stream(hwp5file, outdir)
+        else:
+            with self.transformed_xhwp5(hwp5file) as xhwp5:
+                self.transform_xhwp5_to_dir(xhwp5, outdir)
 
         bindata_dir = os.path.join(outdir, 'bindata')
         self.extract_bindata_dir(hwp5file, bindata_dir)
 
+    def make_renderer(self, hwp5file):
+        from .htmlrender import HTMLRenderer
+        return HTMLRenderer(hwp5file, embedbin=self.embedbin)
+
+    def transform_hwp5_to_css_stream(self, hwp5file, output):
+        self.make_renderer(hwp5file).write_css(output)
+
+    def transform_hwp5_to_xhtml_stream(self, hwp5file, output):
+        self.make_renderer(hwp5file).write_xhtml(output)
+
+    def transform_hwp5_to_dir_stream(self, hwp5file, outdir):
+        ''' Write index.xhtml and styles.css with one renderer, so that the
+        DocInfo is read only once.
+        '''
+        renderer = self.make_renderer(hwp5file)
+        html_path = os.path.join(outdir, 'index.xhtml')
+        css_path = os.path.join(outdir, 'styles.css')
+        with io.open(html_path, 'wb') as html_file:
+            renderer.write_xhtml(html_file)
+        with io.open(css_path, 'wb') as css_file:
+            renderer.write_css(css_file)
+
     @cached_property
     def transform_xhwp5_to_css(self):
         '''
@@ -100,12 +138,13 @@ class HTMLTransform(BaseTransform):
         >>> T.transform_xhwp5_to_dir('hwp5.xml', 'output')
         '''
         html_path = os.path.join(outdir, 'index.xhtml')
-        with io.open(html_path, 'wb') as f:
-            self.transform_xhwp5_to_xhtml(xhwp5path, f)
-
         css_path = os.path.join(outdir, 'styles.css')
-        with io.open(css_path, 'wb') as f:
-            self.transform_xhwp5_to_css(xhwp5path, f)
+        with io.open(html_path, 'wb') as html_file:
+            with io.open(css_path, 'wb') as css_file:
+                self.transform_xhwp5_to_outputs(xhwp5path, [
+                    (self.transform_xhwp5_to_xhtml, html_file),
+                    (self.transform_xhwp5_to_css, css_file),
+                ])
 
     def extract_bindata_dir(self, hwp5file, bindata_dir):
         if 'BinData' not in hwp5file:
@@ -115,7 +154,7 @@ class HTMLTransform(BaseTransform):
             os.mkdir(bindata_dir)
 
         from hwp5.storage import unpack
-        unpack(bindata_stg, bindata_dir)
+        unpack(bindata_stg, bindata_dir, jobs=self.jobs)
 
 
 def main():
@@ -127,10 +166,11 @@ def main():
     argparser = main_argparser()
     args = argparser.parse_args()
     init_logger(args)
+    init_stream_cache()
 
     hwp5path = args.hwp5file
 
-    html_transform = HTMLTransform()
+    html_transform = HTMLTransform(jobs=args.jobs, engine=args.engine)
 
     open_dest = make_open_dest_file(args.output)
     if args.css:
@@ -147,7 +187,7 @@ def main():
         open_dest = partial(open_dir, dest_path)
 
     try:
-        with closing(Hwp5File(hwp5path)) as hwp5file:
+        with closing(Hwp5File(hwp5path, workers=args.jobs)) as hwp5file:
             with open_dest() as dest:
                 transform(hwp5file, dest)
     except ParseError as e:
@@ -179,6 +219,22 @@ def main_argparser():
         '--output',
         help=_('Output file'),
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        metavar='<n>',
+        help=_('Number of processes to convert sections in parallel, '
+               'and of threads to extract embedded binaries and to run '
+               'the stylesheets.'),
+    )
+    parser.add_argument(
+        '--engine',
+        choices=HTMLTransform.engines,
+        default='xslt',
+        help=_('Conversion engine: \'xslt\' transforms the XML with '
+               'xsl/hwp5html.xsl and xsl/hwp5css.xsl; \'stream\' renders '
+               'the document directly, without XSLT. (default: xslt)'),
+    )
     parser.add_argument(
         'hwp5file',
         metavar='<hwp5file>',
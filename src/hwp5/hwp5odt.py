@@ -29,16 +29,20 @@ import io
 import logging
 import os.path
 import sys
+import threading
 
 from . import __version__ as version
 from .cli import init_logger
+from .cli import init_stream_cache
 from .cli import init_with_environ
 from .errors import ImplementationNotAvailable
+from .errors import ValidationFailed
 from .utils import mkstemp_open
 from .utils import hwp5_resources_path
 from .transforms import BaseTransform
 from .plat import get_relaxng_compile
 from .utils import cached_property
+from .utils import map_in_threads
 
 
 PY3 = sys.version_info.major == 3
@@ -98,13 +102,14 @@ class ODFValidate:
 class ODTTransform(BaseTransform, ODFValidate):
 
     def __init__(self, xslt_compile=None, relaxng_compile=None,
-                 embedbin=False):
+                 embedbin=False, jobs=None, in_memory=None):
         '''
         >>> from hwp5.hwp5odt import ODTTransform
         >>> T = ODTTransform()
         '''
         BaseTransform.__init__(self, xslt_compile=xslt_compile,
-                               embedbin=embedbin)
+                               embedbin=embedbin, jobs=jobs,
+                               in_memory=in_memory)
         ODFValidate.__init__(self, relaxng_compile)
 
     @property
@@ -139,16 +144,26 @@ class ODTTransform(BaseTransform, ODFValidate):
         >>> with open_odtpkg('transformed.odt') as odtpkg:
         ...    T.transform_hwp5_to_package(hwp5file, odtpkg)
         '''
-        with self.transformed_xhwp5_at_temp(hwp5file) as xml_path:
-            self.transform_xhwp5_into_package(xml_path, odtpkg)
+        with self.transformed_xhwp5(hwp5file) as xhwp5:
+            self.transform_xhwp5_into_package(xhwp5, odtpkg)
 
         if 'BinData' in hwp5file:
             bindata = hwp5file['BinData']
-            for name in bindata:
+            names = list(bindata)
+
+            def read_bindata(name):
                 f = bindata[name].open()
+                try:
+                    return f.read()
+                finally:
+                    f.close()
+
+            # 압축 풀기는 여러 스레드에서, 패키지에 쓰기는 차례대로 한다.
+            contents = map_in_threads(read_bindata, names, self.jobs)
+            for name, data in zip(names, contents):
                 path = 'bindata/' + name
                 mimetype = 'application/octet-stream'
-                odtpkg.insert_stream(f, path, mimetype)
+                odtpkg.insert_stream(BytesIO(data), path, mimetype)
 
     @cached_property
     def transform_xhwp5_to_styles(self):
@@ -184,10 +199,16 @@ class ODTTransform(BaseTransform, ODFValidate):
         >>>     T.transform_xhwp5_into_package('input.xml', odtpkg)
         '''
         def transform(xhwp5path, odtpkg):
-            with self.transformed_styles_at_temp(xhwp5path) as path:
-                odtpkg.insert_path(path, 'styles.xml', 'text/xml')
-            with self.transformed_content_at_temp(xhwp5path) as path:
-                odtpkg.insert_path(path, 'content.xml', 'text/xml')
+            styles = BytesIO()
+            content = BytesIO()
+            self.transform_xhwp5_to_outputs(xhwp5path, [
+                (self.transform_xhwp5_to_styles, styles),
+                (self.transform_xhwp5_to_content, content),
+            ])
+            styles.seek(0)
+            odtpkg.insert_stream(styles, 'styles.xml', 'text/xml')
+            content.seek(0)
+            odtpkg.insert_stream(content, 'content.xml', 'text/xml')
 
             rdf = BytesIO()
             manifest_rdf(rdf)
@@ -221,6 +242,8 @@ class ODTTransform(BaseTransform, ODFValidate):
         return transformed_at_temp_path(xhwp5path, transform_xhwp5)
 
     def make_odf_transform(self, resource_path):
+        if self.in_memory:
+            return self.make_odf_document_transform(resource_path)
         transform = self.make_xsl_transform(resource_path)
         validator = self.odf_validator
         if validator:
@@ -231,6 +254,38 @@ class ODTTransform(BaseTransform, ODFValidate):
         else:
             return transform
 
+    def make_odf_document_transform(self, resource_path):
+        ''' ODF transform of lxml documents
+
+        The result documents are validated as they are, rather than being
+        serialized and parsed again, if the validator supports it.
+        '''
+        transform_document = self.make_xsl_document_transform(resource_path)
+        validator = self.odf_validator
+        validator_lock = self.odf_validator_lock
+
+        def transform(input, output):
+            result = transform_document(self.loaded_xhwp5(input))
+            if not validator:
+                output.write(bytes(result))
+            elif hasattr(validator, 'validate_document'):
+                # RelaxNG 검증기는 여러 스레드에서 함께 쓰지 않는다.
+                with validator_lock:
+                    valid = validator.validate_document(result)
+                if not valid:
+                    raise ValidationFailed('RelaxNG')
+                output.write(bytes(result))
+            else:
+                with validator_lock:
+                    with validator.validating_output(output) as f:
+                        f.write(bytes(result))
+            return dict()
+        return transform
+
+    @cached_property
+    def odf_validator_lock(self):
+        return threading.Lock()
+
 
 @contextmanager
 def transformed_at_temp_path(inp_path, transform):
@@ -267,7 +322,8 @@ class ODTPackage(object):
         manifest_xml(manifest, self.files)
         manifest.seek(0)
         self.zf.writestr('META-INF/manifest.xml', manifest.getvalue())
-        self.zf.writestr('mimetype', 'application/vnd.oasis.opendocument.text')
+        self.zf.writestr('mimetype',
+                         b'application/vnd.oasis.opendocument.text')
 
         self.zf.close()
 
@@ -332,12 +388,13 @@ def main():
     argparser = main_argparser()
     args = argparser.parse_args()
     init_logger(args)
+    init_stream_cache()
 
     init_with_environ()
 
     hwp5path = args.hwp5file
 
-    odt_transform = ODTTransform()
+    odt_transform = ODTTransform(jobs=args.jobs)
 
     open_dest = make_open_dest_file(args.output)
     if args.document:
@@ -360,7 +417,7 @@ def main():
         open_dest = partial(open_odtpkg, dest_path)
 
     try:
-        with closing(Hwp5File(hwp5path)) as hwp5file:
+        with closing(Hwp5File(hwp5path, workers=args.jobs)) as hwp5file:
             with open_dest() as dest:
                 transform(hwp5file, dest)
     except ParseError as e:
@@ -392,6 +449,14 @@ def main_argparser():
         '--output',
         help=_('Output file'),
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        metavar='<n>',
+        help=_('Number of processes to convert sections in parallel, '
+               'and of threads to extract embedded binaries and to run '
+               'the stylesheets.'),
+    )
     parser.add_argument(
         'hwp5file',
         metavar='<hwp5file>',
@@ -27,6 +27,7 @@ import sys
 
 from . import __version__
 from .cli import init_logger
+from .cli import init_stream_cache
 from .dataio import ParseError
 from .errors import InvalidHwp5FileError
 
@@ -71,6 +72,7 @@ def main():
     argparser = main_argparser()
     args = argparser.parse_args()
     init_logger(args)
+    init_stream_cache()
 
     try:
         subcommand_fn = args.func
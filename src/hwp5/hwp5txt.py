@@ -27,12 +27,18 @@ import os.path
 import sys
 
 from . import __version__ as version
+from .binmodel import Paragraph
+from .binmodel import Text
+from .binmodel.controls import GShapeObjectControl
+from .binmodel.controls import TableControl
 from .cli import init_logger
+from .cli import init_stream_cache
 from .dataio import ParseError
 from .errors import InvalidHwp5FileError
 from .utils import make_open_dest_file
 from .utils import cached_property
 from .transforms import BaseTransform
+from .treeop import STARTEVENT
 from .xmlmodel import Hwp5File
 
 
@@ -49,14 +55,64 @@ else:
 
 RESOURCE_PATH_XSL_TEXT = 'xsl/plaintext.xsl'
 
+# xsl/plaintext.xsl 에서 하위 내용 대신 출력하는 표시
+PLACEHOLDERS = {
+    TableControl: '\n<표>\n',
+    GShapeObjectControl: '\n<그림>\n',
+}
+
+
+def bodytext_text_chunks(events):
+    ''' Generate text chunks of the BodyText model events, as
+    xsl/plaintext.xsl renders them.
+    '''
+    skip = 0
+    for event, (model, attributes, context) in events:
+        if skip:
+            if event is STARTEVENT:
+                skip += 1
+            else:
+                skip -= 1
+        elif event is STARTEVENT:
+            if model is Text:
+                yield attributes['text']
+            elif model in PLACEHOLDERS:
+                yield PLACEHOLDERS[model]
+                skip = 1
+        elif model is Paragraph:
+            yield '\n'
+
 
 class TextTransform(BaseTransform):
+    '''
+    :param engine: 'xslt' to render the xhwp5 with xsl/plaintext.xsl, or
+        'stream' to write the text directly from the BodyText model events,
+        without XSLT and without building the xhwp5.
+    '''
+
+    engines = ('xslt', 'stream')
 
     @property
     def transform_hwp5_to_text(self):
+        if self.engine == 'stream':
+            return self.transform_hwp5_to_text_stream
         transform_xhwp5 = self.transform_xhwp5_to_text
         return self.make_transform_hwp5(transform_xhwp5)
 
+    def transform_hwp5_to_text_stream(self, hwp5file, output):
+        ''' Write the text of the sections into `output` paragraph by
+        paragraph, as the model events go.
+        '''
+        events = hwp5file.text.events(fused=True)
+        chunks = []
+        for chunk in bodytext_text_chunks(events):
+            chunks.append(chunk)
+            if chunk == '\n':
+                output.write(''.join(chunks).encode('utf-8'))
+                chunks = []
+        if chunks:
+            output.write(''.join(chunks).encode('utf-8'))
+
     @cached_property
     def transform_xhwp5_to_text(self):
         '''
@@ -70,16 +126,17 @@ def main():
     argparser = main_argparser()
     args = argparser.parse_args()
     init_logger(args)
+    init_stream_cache()
 
     hwp5path = args.hwp5file
 
-    text_transform = TextTransform()
+    text_transform = TextTransform(engine=args.engine)
 
     open_dest = make_open_dest_file(args.output)
     transform = text_transform.transform_hwp5_to_text
 
     try:
-        with closing(Hwp5File(hwp5path)) as hwp5file:
+        with closing(Hwp5File(hwp5path, workers=args.jobs)) as hwp5file:
             with open_dest() as dest:
                 transform(hwp5file, dest)
     except ParseError as e:
@@ -111,6 +168,20 @@ def main_argparser():
         '--output',
         help=_('Output file'),
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        metavar='<n>',
+        help=_('Number of processes to convert sections in parallel.'),
+    )
+    parser.add_argument(
+        '--engine',
+        choices=TextTransform.engines,
+        default='xslt',
+        help=_('Conversion engine: \'xslt\' transforms the XML with '
+               'xsl/plaintext.xsl; \'stream\' writes the text directly '
+               'from the document, without XSLT. (default: xslt)'),
+    )
     parser.add_argument(
         'hwp5file',
         metavar='<hwp5file>',
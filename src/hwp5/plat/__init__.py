@@ -28,11 +28,15 @@ import os
 import subprocess
 import tempfile
 
+from . import _isal
 from . import _lxml
 from . import _uno
+from . import _zlib
+from . import _zlib_ng
 from . import gir_gsf
 from . import javax_transform
 from . import jython_poifs
+from . import mmap_cfb
 from . import olefileio
 from . import xmllint
 from . import xsltproc
@@ -96,6 +100,8 @@ def get_relaxng_compile():
 def get_olestorage_class():
     if jython_poifs.is_enabled():
         return jython_poifs.OleStorage
+    if mmap_cfb.is_enabled():
+        return mmap_cfb.OleStorage
     if olefileio.is_enabled():
         return olefileio.OleStorage
     if _uno.is_enabled():
@@ -104,6 +110,27 @@ def get_olestorage_class():
         return gir_gsf.OleStorage
 
 
+def get_zlib_backend():
+    ''' the fastest raw-deflate implementation available
+
+    Returns one of the zlib backend modules, each of which has `name`,
+    `get_zlib()` and `get_version()`. `get_zlib()` returns a module with
+    the same interface as the standard `zlib` module.
+    '''
+    modules = [
+        _zlib_ng,
+        _isal,
+        _zlib,
+    ]
+    for module in modules:
+        if module.is_enabled():
+            return module
+
+
+def get_zlib():
+    return get_zlib_backend().get_zlib()
+
+
 def get_aes128ecb_decrypt():
     try:
         return get_aes128ecb_decrypt_cryptography()
@@ -57,6 +57,19 @@ def xslt(xsl_path, inp_path, out_path):
         return transform(inp_path, f)
 
 
+def is_document(input):
+    ''' Test whether `input` is a parsed document rather than a path. '''
+    return hasattr(input, 'getroot')
+
+
+def parse_document(path):
+    ''' Parse an XML file into a document, to be transformed many times.
+    '''
+    from lxml import etree
+    with io.open(path, 'rb') as f:
+        return etree.parse(f)
+
+
 def xslt_compile(xsl_path, **params):
     xslt = XSLT(xsl_path, **params)
     return xslt.transform_into_stream
@@ -90,7 +103,13 @@ class XSLT:
     def transform_into_stream(self, input, output):
         '''
         >>> T.transform_into_stream('input.xml', sys.stdout)
+
+        `input` may also be a parsed document, e.g. XmlEvents.to_lxml():
+
+        >>> T.transform_into_stream(xmlevents.to_lxml(), sys.stdout)
         '''
+        if is_document(input):
+            return self._transform_document(input, output)
         with io.open(input, 'rb') as inp_file:
             return self._transform(inp_file, output)
 
@@ -99,11 +118,22 @@ class XSLT:
 
         from lxml import etree
         source = etree.parse(input)
+        return self._transform_document(source, output)
+
+    def transform_document(self, source):
+        ''' Transform a parsed document into the result document.
+
+        >>> result = T.transform_document(xmlevents.to_lxml())
+        '''
         logger.info('_lxml.xslt(%s) start',
                     os.path.basename(self.xsl_path))
         result = self.etree_xslt(source, **self.params)
         logger.info('_lxml.xslt(%s) end',
                     os.path.basename(self.xsl_path))
+        return result
+
+    def _transform_document(self, source, output):
+        result = self.transform_document(source)
         # https://lxml.de/1.3/FAQ.html#what-is-the-difference-between-str-xslt-doc-and-xslt-doc-write
         result = bytes(result)
         output.write(result)
@@ -163,6 +193,10 @@ class RelaxNG:
         doc = etree.parse(input)
         return self._validate(doc)
 
+    def validate_document(self, doc):
+        ''' Validate a parsed document, e.g. a result of XSLT. '''
+        return self._validate(doc)
+
     def _validate(self, doc):
         logger.info('_lxml.relaxng(%s) start', os.path.basename(self.rng_path))
         try:
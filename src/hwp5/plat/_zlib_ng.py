@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#
+#   pyhwp : hwp file format parser in python
+#   Copyright (C) 2010-2023 mete0r <https://github.com/mete0r>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+name = 'zlib-ng'
+
+
+def is_enabled():
+    try:
+        from zlib_ng import zlib_ng  # noqa
+    except ImportError:
+        return False
+    else:
+        return True
+
+
+def get_zlib():
+    from zlib_ng import zlib_ng
+    return zlib_ng
+
+
+def get_version():
+    zlib_ng = get_zlib()
+    return zlib_ng.ZLIBNG_VERSION
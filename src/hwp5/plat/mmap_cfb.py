@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+#
+#   pyhwp : hwp file format parser in python
+#   Copyright (C) 2010-2023 mete0r <https://github.com/mete0r>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+''' a Compound File Binary (OLE2) reader over mmap
+
+The FAT, MiniFAT and the directory are read once when the file is opened.
+A stream whose sectors are contiguous in the file is served as a
+memoryview of the mapped file without copying; a fragmented one is
+copied once into bytes.
+
+Streams are read by their offsets in the mapping, not through a shared
+file position, so they may be opened and read in several threads at once.
+
+On Python 2, whose mmap cannot be viewed as a memoryview, the file is read
+into memory instead of being mapped.
+'''
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import logging
+import struct
+import sys
+
+from ..errors import InvalidOleStorageError
+from ..utils import cached_property
+
+
+PY3 = sys.version_info.major == 3
+if PY3:
+    string_types = (str, bytes)
+else:
+    string_types = (basestring, )  # noqa
+
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+HEADER = struct.Struct('<8s16sHHHHH6sIIIIIIIII')
+HEADER_DIFAT_ENTRIES = 109
+DIRENTRY = struct.Struct('<64sHBBIII16sIQQIQ')
+
+MAXREGSECT = 0xFFFFFFFA
+ENDOFCHAIN = 0xFFFFFFFE
+NOSTREAM = 0xFFFFFFFF
+
+STGTY_STORAGE = 1
+STGTY_STREAM = 2
+STGTY_ROOT = 5
+
+
+def is_enabled():
+    try:
+        import mmap  # noqa
+    except ImportError:
+        return False
+    else:
+        return True
+
+
+def unpack_sectors(data):
+    ''' unpack an array of little-endian sector numbers '''
+    count = len(data) // 4
+    return struct.unpack_from('<%dI' % count, data)
+
+
+class DirEntry(object):
+
+    def __init__(self, sid, data):
+        (name, name_size, self.type, _, self.left, self.right, self.child,
+         _, _, _, _, self.start, self.size) = DIRENTRY.unpack(data)
+        name_size = min(max(name_size - 2, 0), 62)
+        self.sid = sid
+        self.name = name[:name_size].decode('utf-16le', 'replace')
+        self.children = None
+        self.children_lower = None
+        self.names = None
+
+
+class CompoundFile(object):
+    ''' sector chains and directory entries of a compound file
+
+    :param data: a buffer (i.e. an mmap) of the whole file
+    :raises: `InvalidOleStorageError` when `data` is not valid OLE2 format.
+    '''
+
+    def __init__(self, data, close=None):
+        self.data = data
+        self.close_data = close
+        self.view = memoryview(data)
+        try:
+            self.load()
+        except (struct.error, IndexError, ValueError) as e:
+            self.close()
+            raise InvalidOleStorageError('Invalid OLE2 Compound Binary '
+                                         'File: %s' % e)
+
+    def load(self):
+        data = self.view
+        if len(data) < HEADER.size or data[:len(MAGIC)].tobytes() != MAGIC:
+            raise InvalidOleStorageError('Not an OLE2 Compound Binary File.')
+        header = HEADER.unpack_from(data, 0)
+        (_, _, _, _, _, sector_shift, mini_sector_shift, _, _, num_fat_sectors,
+         first_dir_sector, _, self.mini_cutoff, first_minifat_sector, _,
+         first_difat_sector, num_difat_sectors) = header
+        if sector_shift not in (9, 12):
+            raise ValueError('sector shift %d' % sector_shift)
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_sector_shift
+
+        # DIFAT: FAT 섹터들의 목록
+        fat_sectors = list(unpack_sectors(
+            data[HEADER.size:HEADER.size + HEADER_DIFAT_ENTRIES * 4]
+        ))
+        difat_sector = first_difat_sector
+        seen = set()
+        while (difat_sector <= MAXREGSECT and difat_sector not in seen and
+               len(seen) < num_difat_sectors):
+            seen.add(difat_sector)
+            entries = unpack_sectors(self.sector(difat_sector))
+            fat_sectors.extend(entries[:-1])
+            difat_sector = entries[-1]
+        fat_sectors = [sector for sector in fat_sectors[:num_fat_sectors]
+                       if sector <= MAXREGSECT]
+        self.fat = unpack_sectors(b''.join(self.sector(sector)
+                                           for sector in fat_sectors))
+
+        dir_data = b''.join(self.sector(sector)
+                            for sector in self.chain(first_dir_sector))
+        self.entries = list(DirEntry(sid, dir_data[offset:offset + 128])
+                            for sid, offset
+                            in enumerate(range(0, len(dir_data) - 127, 128)))
+        self.root = self.entries[0]
+        if self.root.type != STGTY_ROOT:
+            raise ValueError('no root entry')
+
+        self.minifat = unpack_sectors(b''.join(
+            self.sector(sector) for sector in self.chain(first_minifat_sector)
+        ))
+        self.ministream_sectors = list(self.chain(self.root.start))
+
+    def sector(self, sector):
+        offset = (sector + 1) * self.sector_size
+        return self.view[offset:offset + self.sector_size].tobytes()
+
+    def chain(self, start, fat=None):
+        ''' sector numbers in the chain from `start` '''
+        if fat is None:
+            fat = self.fat
+        sector = start
+        count = 0
+        while sector <= MAXREGSECT and sector < len(fat):
+            yield sector
+            count += 1
+            if count > len(fat):
+                raise ValueError('cyclic sector chain from %d' % start)
+            sector = fat[sector]
+
+    def children(self, entry):
+        ''' child entries of a storage, keyed by their names '''
+        if entry.children is None:
+            children = dict()
+            stack = [entry.child]
+            while stack:
+                sid = stack.pop()
+                if sid == NOSTREAM or sid >= len(self.entries):
+                    continue
+                child = self.entries[sid]
+                if child.name in children or child.type not in (
+                    STGTY_STORAGE, STGTY_STREAM
+                ):
+                    continue
+                children[child.name] = child
+                stack.append(child.left)
+                stack.append(child.right)
+            names = sorted(children)
+            entry.names = names
+            entry.children_lower = dict((name.lower(), children[name])
+                                        for name in reversed(names))
+            # 다른 스레드가 볼 수 있도록 마지막에 설정한다.
+            entry.children = children
+        return entry.children
+
+    def find(self, path, entry=None):
+        ''' find an entry; names are case-insensitive, like olefile '''
+        if entry is None:
+            entry = self.root
+        for name in path:
+            if entry.type == STGTY_STREAM:
+                return None
+            children = self.children(entry)
+            if name in children:
+                entry = children[name]
+                continue
+            entry = entry.children_lower.get(name.lower())
+            if entry is None:
+                return None
+        return entry
+
+    def names(self, entry):
+        ''' sorted names of the child entries of a storage '''
+        self.children(entry)
+        return entry.names
+
+    def runs(self, entry):
+        ''' (offset, length) of the byte runs of a stream in the file '''
+        size = entry.size
+        if self.sector_size == 512:
+            # 버전 3 파일에서 상위 32비트는 의미가 없다.
+            size &= 0xFFFFFFFF
+        if size < self.mini_cutoff:
+            sector_size = self.mini_sector_size
+            sectors = self.chain(entry.start, self.minifat)
+            ministream = self.ministream_sectors
+
+            def offset_of(sector):
+                offset = sector * sector_size
+                container = ministream[offset // self.sector_size]
+                return ((container + 1) * self.sector_size +
+                        offset % self.sector_size)
+        else:
+            sector_size = self.sector_size
+            sectors = self.chain(entry.start)
+
+            def offset_of(sector):
+                return (sector + 1) * sector_size
+
+        runs = []
+        remaining = size
+        for sector in sectors:
+            if remaining <= 0:
+                break
+            offset = offset_of(sector)
+            length = min(sector_size, remaining)
+            remaining -= length
+            if runs and runs[-1][0] + runs[-1][1] == offset:
+                runs[-1][1] += length
+            else:
+                runs.append([offset, length])
+        if remaining > 0:
+            logger.warning('%s: stream is shorter than its size %d',
+                           entry.name, size)
+        return runs
+
+    def open(self, entry):
+        runs = self.runs(entry)
+        if len(runs) == 1:
+            offset, length = runs[0]
+            return MemoryViewReader(self.view[offset:offset + length])
+        return MemoryViewReader(b''.join(
+            self.view[offset:offset + length].tobytes()
+            for offset, length in runs
+        ))
+
+    def close(self):
+        self.view = None
+        if self.close_data is not None:
+            try:
+                self.close_data()
+            except BufferError:
+                # 아직 열려 있는 스트림이 있다; 가비지 컬렉터에 맡긴다.
+                pass
+            self.close_data = None
+        self.data = None
+
+
+def open_compound_file(olefile):
+    ''' open a compound file from a path, a file object or its bytes '''
+    if isinstance(olefile, CompoundFile):
+        return olefile
+    if isinstance(olefile, (bytearray, memoryview)):
+        return CompoundFile(olefile)
+    if isinstance(olefile, bytes) and olefile[:len(MAGIC)] == MAGIC:
+        return CompoundFile(olefile)
+
+    if not PY3:
+        # python 2의 mmap은 memoryview로 볼 수 없으므로 메모리로 읽는다.
+        if isinstance(olefile, string_types):
+            try:
+                with io.open(olefile, 'rb') as f:
+                    data = f.read()
+            except IOError as e:
+                raise InvalidOleStorageError('%s' % e)
+        elif hasattr(olefile, 'getvalue'):
+            data = olefile.getvalue()
+        else:
+            data = olefile.read()
+        return CompoundFile(data)
+
+    import mmap
+    if isinstance(olefile, string_types):
+        try:
+            f = io.open(olefile, 'rb')
+        except IOError as e:
+            raise InvalidOleStorageError('%s' % e)
+    elif hasattr(olefile, 'getvalue'):
+        # BytesIO: 수정되지 않은 BytesIO의 getvalue()는 복사하지 않는다.
+        return CompoundFile(olefile.getvalue())
+    else:
+        f = olefile
+    try:
+        try:
+            fileno = f.fileno()
+            data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (AttributeError, ValueError, EnvironmentError) as e:
+            if f is not olefile:
+                # 빈 파일 등
+                raise InvalidOleStorageError('%s' % e)
+            # 파이프 등 매핑할 수 없는 파일 객체
+            return CompoundFile(f.read())
+    finally:
+        if f is not olefile:
+            f.close()
+    return CompoundFile(data, data.close)
+
+
+class MemoryViewReader(object):
+    ''' a read-only file object over a buffer, without copying it
+
+    getvalue() returns the buffer itself, i.e. a memoryview of the mapped
+    file for a contiguous stream.
+    '''
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def read(self, size=-1):
+        start = self.pos
+        if size is None or size < 0:
+            end = len(self.buf)
+        else:
+            end = min(start + size, len(self.buf))
+        self.pos = max(start, end)
+        buf = self.buf[start:end]
+        if isinstance(buf, memoryview):
+            return buf.tobytes()
+        return buf
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += len(self.buf)
+        if offset < 0:
+            raise IOError('negative seek position: %d' % offset)
+        self.pos = offset
+        return self.pos
+
+    def getvalue(self):
+        return self.buf
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self.buf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OleStorageItem(object):
+
+    def __init__(self, cfb, path, entry):
+        self.cfb = cfb
+        self.path = path  # path DOES NOT end with '/'
+        self.entry = entry
+
+    def get_name(self):
+        if self.path == '':
+            return None
+        segments = self.path.split('/')
+        return segments[-1]
+
+    name = cached_property(get_name)
+
+
+class OleStream(OleStorageItem):
+
+    def open(self):
+        return self.cfb.open(self.entry)
+
+
+class OleStorage(OleStorageItem):
+    ''' Create an OleStorage instance.
+
+    :param olefile: an OLE2 Compound Binary File.
+    :type olefile: a path, a file object or a buffer (bytes, bytearray or
+        memoryview) of the file
+    :param path: internal path in the olefile. Should not end with '/'.
+    :raises: `InvalidOleStorageError` when `olefile` is not valid OLE2 format.
+    '''
+
+    def __init__(self, olefile, path='', entry=None):
+        cfb = open_compound_file(olefile)
+        if entry is None:
+            entry = cfb.find(path.split('/')) if path else cfb.root
+            if entry is None or entry.type == STGTY_STREAM:
+                raise KeyError('%s is not a storage' % path)
+        OleStorageItem.__init__(self, cfb, path, entry)
+
+    def __iter__(self):
+        return iter(self.cfb.names(self.entry))
+
+    def __getitem__(self, name):
+        if self.path == '' or self.path == '/':
+            path = name
+        else:
+            path = self.path + '/' + name
+        entry = self.cfb.find(name.split('/'), self.entry)
+        if entry is None:
+            raise KeyError('%s not found' % path)
+        if entry.type == STGTY_STORAGE:
+            return OleStorage(self.cfb, path, entry)
+        elif entry.type == STGTY_STREAM:
+            return OleStream(self.cfb, path, entry)
+        else:
+            raise KeyError('%s is invalid' % path)
+
+    def close(self):
+        # if this is root, close underlying compound file
+        if self.path == '':
+            self.cfb.close()
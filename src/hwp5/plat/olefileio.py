@@ -19,6 +19,7 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+import threading
 
 from ..errors import InvalidOleStorageError
 from ..utils import cached_property
@@ -74,11 +75,42 @@ def import_OleFileIO():
         return OleFileIO
 
 
+class OleDirNode(object):
+    ''' a directory entry in the tree built once from an OleFileIO '''
+
+    def __init__(self, name, entry_type, kids=()):
+        self.name = name
+        self.type = entry_type
+        self.names = list(kid.name for kid in kids)
+        self.kids = dict((kid.name, kid) for kid in kids)
+        self.kids_lower = dict((kid.name.lower(), kid)
+                               for kid in reversed(kids))
+
+    def get(self, name):
+        ''' a kid named `name`; names are case-insensitive, like olefile '''
+        kid = self.kids.get(name)
+        if kid is None:
+            kid = self.kids_lower.get(name.lower())
+        return kid
+
+
+def olefile_tree(olefile):
+    ''' build the tree of OleDirNode from the directory of an OleFileIO '''
+    def build(direntry):
+        kids = list(build(kid) for kid in direntry.kids)
+        return OleDirNode(direntry.name, direntry.entry_type, kids)
+    return build(olefile.root)
+
+
 class OleStorageItem(object):
 
     def __init__(self, olefile, path, parent=None):
         self.olefile = olefile
         self.path = path  # path DOES NOT end with '/'
+        if parent is not None:
+            self.lock = parent.lock
+        else:
+            self.lock = threading.Lock()
 
     def get_name(self):
         if self.path == '':
@@ -92,7 +124,10 @@ class OleStorageItem(object):
 class OleStream(OleStorageItem):
 
     def open(self):
-        return self.olefile.openstream(self.path)
+        # OleFileIO는 하나의 파일 위치를 공유하므로, 여러 스레드에서 동시에
+        # 열지 않도록 한다. openstream()은 스트림 전체를 메모리로 읽는다.
+        with self.lock:
+            return self.olefile.openstream(self.path)
 
 
 class OleStorage(OleStorageItem):
@@ -101,10 +136,15 @@ class OleStorage(OleStorageItem):
     :param olefile: an OLE2 Compound Binary File.
     :type olefile: an OleFileIO instance or an argument to OleFileIO()
     :param path: internal path in the olefile. Should not end with '/'.
+    :param node: OleDirNode of `path`; the directory tree is built from
+        `olefile` if not given.
     :raises: `InvalidOleStorageError` when `olefile` is not valid OLE2 format.
     '''
 
-    def __init__(self, olefile, path='', parent=None):
+    def __init__(self, olefile, path='', parent=None, node=None):
+        if isinstance(olefile, (bytearray, memoryview)):
+            # OleFileIO reads data only from bytes
+            olefile = bytes(olefile)
         if not hasattr(olefile, 'openstream'):
             isOleFile = import_isOleFile()
             OleFileIO = import_OleFileIO()
@@ -114,21 +154,30 @@ class OleStorage(OleStorageItem):
                 raise InvalidOleStorageError(errormsg)
             olefile = OleFileIO(olefile)
         OleStorageItem.__init__(self, olefile, path, parent)
+        if node is None:
+            node = olefile_tree(olefile)
+            for name in path.split('/') if path else []:
+                node = node.get(name)
+                if node is None:
+                    raise IOError('%s not exists' % path)
+        self.node = node
 
     def __iter__(self):
-        return olefile_listdir(self.olefile, self.path)
+        return iter(self.node.names)
 
     def __getitem__(self, name):
         if self.path == '' or self.path == '/':
             path = name
         else:
             path = self.path + '/' + name
-        if not self.olefile.exists(path):
-            raise KeyError('%s not found' % path)
-        t = self.olefile.get_type(path)
-        if t == 1:  # Storage
-            return OleStorage(self.olefile, path, self)
-        elif t == 2:  # Stream
+        node = self.node
+        for segment in name.split('/'):
+            node = node.get(segment)
+            if node is None:
+                raise KeyError('%s not found' % path)
+        if node.type == 1:  # Storage
+            return OleStorage(self.olefile, path, self, node)
+        elif node.type == 2:  # Stream
             return OleStream(self.olefile, path, self)
         else:
             raise KeyError('%s is invalid' % path)
@@ -66,6 +66,7 @@ import sys
 
 from ..binmodel import Hwp5File
 from ..binmodel import model_to_json
+from ..binmodel import tag_models
 from ..bintype import log_events
 from ..dataio import ParseError
 from ..tagids import tagnames
@@ -93,9 +94,11 @@ def main(args):
 
     print_model = printer_from_args(args)
 
+    tagids = tagids_from_args(args)
+
     for filename in filenames:
         try:
-            models = hwp5file_models(filename)
+            models = hwp5file_models(filename, tagids=tagids)
             models = filter_conditions(models)
             for model in models:
                 print_model(model)
@@ -197,9 +200,46 @@ def conditions_from_args(args):
         yield with_incomplete
 
 
-def hwp5file_models(filename):
+def tagids_from_args(args):
+    ''' tagids of the records to be parsed; None for all records '''
+
+    if args.model:
+        return tagids_for_model_name(args.model)
+
+    if args.tag:
+        tag = args.tag
+        try:
+            return set([int(tag)])
+        except ValueError:
+            return set(tagid for tagid, tagname in tagnames.items()
+                       if tagname == tag)
+
+
+def tagids_for_model_name(name):
+    ''' tagids of which records may be parsed into the named model '''
+
+    def model_names(model_type, seen):
+        if model_type in seen:
+            return
+        seen.add(model_type)
+        yield model_type.__name__
+        extension_types = getattr(model_type, 'extension_types', None)
+        if extension_types:
+            for extension in extension_types.values():
+                for x in model_names(extension, seen):
+                    yield x
+
+    tagids = set(tagid for tagid, model_type in tag_models.items()
+                 if name in model_names(model_type, set()))
+    if tagids:
+        return tagids
+    # 예: UnknownTagModel
+    return None
+
+
+def hwp5file_models(filename, **kwargs):
     hwp5file = Hwp5File(filename)
-    for model in flat_models(hwp5file):
+    for model in flat_models(hwp5file, **kwargs):
         model['filename'] = filename
         yield model
 
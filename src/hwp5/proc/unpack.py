@@ -34,7 +34,8 @@ def main(args):
         outdir, ext = os.path.splitext(os.path.basename(filename))
     if not os.path.exists(outdir):
         os.mkdir(outdir)
-    storage.unpack(hwp5file, outdir)
+    storage.unpack(hwp5file, outdir, jobs=args.jobs,
+                   skip_identical=args.skip_identical)
 
 
 def unpack_argparser(subparsers, _):
@@ -59,6 +60,20 @@ def unpack_argparser(subparsers, _):
         metavar='<out-directory>',
         help=_('Output directory'),
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        metavar='<n>',
+        help=_('Number of threads to extract streams concurrently.'),
+    )
+    parser.add_argument(
+        '--skip-identical',
+        action='store_true',
+        help=_(
+            'Leave files already present with the same size and hash '
+            'untouched.'
+        )
+    )
     mutex_group = parser.add_mutually_exclusive_group()
     mutex_group.add_argument(
         '--vstreams',
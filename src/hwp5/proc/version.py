@@ -20,10 +20,18 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from .. import __version__
 from ..filestructure import Hwp5File
+from ..plat import get_zlib_backend
 
 
 def main(args):
+    if args.hwp5file is None:
+        print('hwp5proc (pyhwp) {}'.format(__version__))
+        zlib_backend = get_zlib_backend()
+        print('zlib: {} {}'.format(zlib_backend.name,
+                                   zlib_backend.get_version()))
+        return
     hwp5file = Hwp5File(args.hwp5file)
     h = hwp5file.fileheader
     print('%d.%d.%d.%d' % h.version)
@@ -36,12 +44,15 @@ def version_argparser(subparsers, _):
             'Print the file format version of .hwp files.'
         ),
         description=_(
-            'Print the file format version of <hwp5file>.'
+            'Print the file format version of <hwp5file>. Without '
+            '<hwp5file>, print the version of pyhwp and the backends '
+            'in use.'
         ),
     )
     parser.add_argument(
         'hwp5file',
         metavar='<hwp5file>',
+        nargs='?',
         help=_('.hwp file to analyze'),
     )
     parser.set_defaults(func=main)
@@ -70,7 +70,7 @@ def main(args):
         xmllint(c14n=True),
     ] if not args.no_validate_wellformed else [])
 
-    hwp5file = Hwp5File(args.hwp5file)
+    hwp5file = Hwp5File(args.hwp5file, workers=args.jobs)
     with open_dest() as output:
         xmldump(hwp5file, output)
 
@@ -105,6 +105,12 @@ def xml_argparser(subparsers, _):
        metavar='<file>',
        help=_('Output filename.'),
     )
+    parser.add_argument(
+       '--jobs',
+       type=int,
+       metavar='<n>',
+       help=_('Number of processes to convert sections in parallel.'),
+    )
     parser.add_argument(
        '--format',
        metavar='<format>',
@@ -19,9 +19,22 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+from array import array
+from bisect import bisect_right
+from hashlib import sha1
 from itertools import islice
 import json
+import logging
+import os
+import os.path
 import struct
+import sys
+
+from six import integer_types
 
 from . import dataio
 from . import filestructure
@@ -31,20 +44,131 @@ from .dataio import UINT32
 from .tagids import HWPTAG_BEGIN
 from .tagids import tagnames
 from .utils import JsonObjects
+from .utils import cached_property
+
+
+PY3 = sys.version_info.major == 3
+logger = logging.getLogger(__name__)
+
+
+RECORD_HEADER = struct.Struct('<I')
 
 
 def tagname(tagid):
     return tagnames.get(tagid, 'HWPTAG%d' % (tagid - HWPTAG_BEGIN))
 
 
-def Record(tagid, level, payload, size=None, seqno=None):
-    if size is None:
-        size = len(payload)
-    d = dict(tagid=tagid, tagname=tagname(tagid), level=level,
-             size=size, payload=payload)
-    if seqno is not None:
-        d['seqno'] = seqno
-    return d
+if PY3:
+    SlottedMutableMapping = MutableMapping
+else:
+    class SlottedMutableMapping(object):
+        ''' MutableMapping with empty __slots__
+
+        python 2의 MutableMapping과 그 기반 ABC들에는 __slots__가 없어서,
+        상속한 클래스의 인스턴스마다 __dict__가 생긴다. 믹스인 메소드들만
+        가져오고, MutableMapping으로 등록한다.
+        '''
+        __slots__ = ()
+        __hash__ = None
+
+    for name in ('get', 'keys', 'items', 'values', 'iterkeys', 'iteritems',
+                 'itervalues', '__eq__', '__ne__', 'pop', 'popitem', 'clear',
+                 'update', 'setdefault'):
+        setattr(SlottedMutableMapping, name,
+                getattr(MutableMapping, name).__func__)
+    del name
+    MutableMapping.register(SlottedMutableMapping)
+
+
+RECORD_FIELDS = ('tagid', 'level', 'size', 'payload', 'seqno')
+
+
+class Record(SlottedMutableMapping):
+    ''' A record.
+
+    레코드 필드(tagid, level, size, payload, seqno)는 슬롯에 저장하고,
+    tagname은 tagid로부터 계산합니다. 그 외의 키(binmodel이 덧붙이는
+    type, content 등)는 필요할 때만 만드는 별도의 dict에 저장합니다.
+
+    dict와 같은 매핑 인터페이스를 제공합니다.
+    '''
+
+    __slots__ = RECORD_FIELDS + ('extra',)
+
+    def __init__(self, tagid, level, payload, size=None, seqno=None):
+        if size is None:
+            size = len(payload)
+        self.tagid = tagid
+        self.level = level
+        self.size = size
+        self.payload = payload
+        if seqno is not None:
+            self.seqno = seqno
+        self.extra = None
+
+    def __getitem__(self, key):
+        if key in RECORD_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        extra = self.extra
+        if extra is not None and key in extra:
+            return extra[key]
+        if key == 'tagname':
+            return tagname(self.tagid)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in RECORD_FIELDS:
+            setattr(self, key, value)
+            return
+        if self.extra is None:
+            self.extra = dict()
+        self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in RECORD_FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+            return
+        if self.extra is None:
+            raise KeyError(key)
+        del self.extra[key]
+
+    def __contains__(self, key):
+        if key in RECORD_FIELDS:
+            return hasattr(self, key)
+        if key == 'tagname':
+            return True
+        extra = self.extra
+        return extra is not None and key in extra
+
+    def __iter__(self):
+        yield 'tagid'
+        yield 'tagname'
+        yield 'level'
+        yield 'size'
+        yield 'payload'
+        if hasattr(self, 'seqno'):
+            yield 'seqno'
+        if self.extra is not None:
+            for key in self.extra:
+                if key != 'tagname':
+                    yield key
+
+    def __len__(self):
+        n = 5 if hasattr(self, 'seqno') else 4
+        if self.extra is not None:
+            n += len(self.extra)
+            if 'tagname' in self.extra:
+                n -= 1
+        return n + 1
+
+    def __repr__(self):
+        return repr(dict(self))
 
 
 def decode_record_header(f):
@@ -78,7 +202,10 @@ def read_record(f, seqno):
     if header is None:
         return
     tagid, level, size = header
-    payload = dataio.readn(f, size)
+    if size == 0:
+        payload = b''
+    else:
+        payload = dataio.readn(f, size)
     return Record(tagid, level, payload, size, seqno)
 
 
@@ -88,8 +215,11 @@ def dump_record(f, record):
     f.write(record['payload'])
 
 
-def read_records(f):
-    seqno = 0
+def read_records(f, seqno=0, tagids=None):
+    if tagids is not None:
+        for record in read_records_with_tagids(f, seqno, tagids):
+            yield record
+        return
     while True:
         record = read_record(f, seqno)
         if record:
@@ -99,6 +229,224 @@ def read_records(f):
         seqno += 1
 
 
+def read_records_with_tagids(f, seqno, tagids):
+    ''' read records of given `tagids`, seeking over payloads of others '''
+    while True:
+        header = decode_record_header(f)
+        if header is None:
+            return
+        tagid, level, size = header
+        if tagid in tagids:
+            if size == 0:
+                payload = b''
+            else:
+                payload = dataio.readn(f, size)
+            yield Record(tagid, level, payload, size, seqno)
+        else:
+            f.seek(size, 1)
+        seqno += 1
+
+
+def read_records_from_buffer(buf, offset=0, seqno=0, tagids=None):
+    ''' read records from an in-memory buffer
+
+    `buf`를 offset 계산만으로 훑어 나가며, 레코드의 payload는 `buf`를
+    복사하지 않은 memoryview 조각으로 넘겨줍니다. `tagids`가 주어지면
+    그 밖의 레코드는 건너뜁니다.
+    '''
+    buf = memoryview(buf)
+    unpack_header = RECORD_HEADER.unpack_from
+    end = len(buf)
+    while offset < end:
+        if offset + 4 > end:
+            raise Eof(offset)
+        rechdr, = unpack_header(buf, offset)
+        offset += 4
+        tagid = rechdr & 0x3ff
+        level = (rechdr >> 10) & 0x3ff
+        size = (rechdr >> 20) & 0xfff
+        if size == 0xfff:
+            if offset + 4 > end:
+                raise Eof(offset)
+            size, = unpack_header(buf, offset)
+            offset += 4
+        if tagids is None or tagid in tagids:
+            payload = buf[offset:offset + size]
+            yield Record(tagid, level, payload, size, seqno)
+        offset += size
+        seqno += 1
+
+
+class RecordIndex(object):
+    ''' Offset index of records in a record stream.
+
+    seqno로 레코드 헤더의 위치(offset)와 tagid, level, size를 바로 찾을 수
+    있게 하고, 최상위 트리 그룹들의 경계(각 그룹의 첫 seqno)를 담습니다.
+    '''
+
+    MAGIC = b'HWP5RIDX'
+    HEADER = struct.Struct('<8sII')
+    COLUMNS = (('offsets', str('I')),
+               ('tagids', str('H')),
+               ('levels', str('H')),
+               ('sizes', str('I')),
+               ('groups', str('I')))
+
+    def __init__(self, offsets, tagids, levels, sizes, groups):
+        self.offsets = offsets
+        self.tagids = tagids
+        self.levels = levels
+        self.sizes = sizes
+        self.groups = groups
+
+    @classmethod
+    def build(cls, buf):
+        ''' build an index by scanning record headers in `buf` '''
+        offsets, tagids, levels, sizes, groups = (array(typecode)
+                                                  for name, typecode
+                                                  in cls.COLUMNS)
+        buf = memoryview(buf)
+        unpack_header = RECORD_HEADER.unpack_from
+        end = len(buf)
+        offset = 0
+        seqno = 0
+        while offset < end:
+            if offset + 4 > end:
+                raise Eof(offset)
+            offsets.append(offset)
+            rechdr, = unpack_header(buf, offset)
+            offset += 4
+            level = (rechdr >> 10) & 0x3ff
+            size = (rechdr >> 20) & 0xfff
+            if size == 0xfff:
+                if offset + 4 > end:
+                    raise Eof(offset)
+                size, = unpack_header(buf, offset)
+                offset += 4
+            tagids.append(rechdr & 0x3ff)
+            levels.append(level)
+            sizes.append(size)
+            if seqno == 0 or level == 0:
+                groups.append(seqno)
+            offset += size
+            seqno += 1
+        return cls(offsets, tagids, levels, sizes, groups)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, seqno):
+        ''' (offset, tagid, level, size) of the record at `seqno` '''
+        return (self.offsets[seqno], self.tagids[seqno], self.levels[seqno],
+                self.sizes[seqno])
+
+    def treegroup_range(self, n):
+        ''' seqno range of the `n`th top-level tree group '''
+        groups = self.groups
+        start = groups[n]
+        if n + 1 < len(groups):
+            end = groups[n + 1]
+        else:
+            end = len(self.offsets)
+        return start, end
+
+    def treegroup_of(self, seqno):
+        ''' index of the top-level tree group containing `seqno` '''
+        return bisect_right(self.groups, seqno) - 1
+
+    def treegroup_chunks(self, size, nchunks):
+        ''' split the top-level tree groups into about `nchunks` chunks of
+        similar byte sizes
+
+        :param size: byte size of the stream
+        :returns: iterable of (start offset, end offset, seqno of the first
+            record, index of the first tree group)
+        '''
+        groups = self.groups
+        offsets = self.offsets
+        if len(groups) == 0:
+            return
+        chunk_size = max(size // nchunks, 1)
+        first = 0
+        start = offsets[groups[0]]
+        for treegroup in range(1, len(groups)):
+            offset = offsets[groups[treegroup]]
+            if offset - start >= chunk_size:
+                yield start, offset, groups[first], first
+                first = treegroup
+                start = offset
+        yield start, size, groups[first], first
+
+    def dump(self, f):
+        f.write(self.HEADER.pack(self.MAGIC, len(self.offsets),
+                                 len(self.groups)))
+        for name, typecode in self.COLUMNS:
+            column = array(typecode, getattr(self, name))
+            if sys.byteorder == 'big':
+                column.byteswap()
+            if PY3:
+                f.write(column.tobytes())
+            else:
+                f.write(column.tostring())
+
+    @classmethod
+    def load(cls, f):
+        data = f.read(cls.HEADER.size)
+        if len(data) != cls.HEADER.size:
+            raise Eof(len(data))
+        magic, count, ngroups = cls.HEADER.unpack(data)
+        if magic != cls.MAGIC:
+            raise ValueError('not a record index')
+        columns = []
+        for name, typecode in cls.COLUMNS:
+            column = array(typecode)
+            n = ngroups if name == 'groups' else count
+            data = f.read(column.itemsize * n)
+            if len(data) != column.itemsize * n:
+                raise Eof(len(data))
+            if PY3:
+                column.frombytes(data)
+            else:
+                column.fromstring(data)
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns.append(column)
+        return cls(*columns)
+
+
+def get_record_index(buf, cache_dir=None):
+    ''' get the record index of `buf`
+
+    `cache_dir`이 주어지면, 스트림 내용의 해시를 키로 하여 인덱스를 그
+    디렉토리에 저장해 두었다가 다시 사용합니다.
+    '''
+    if cache_dir is None:
+        return RecordIndex.build(buf)
+
+    key = sha1(buf).hexdigest()
+    path = os.path.join(cache_dir, key + '.recidx')
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                return RecordIndex.load(f)
+        except (Eof, ValueError) as e:
+            logger.warning('%s: ignoring broken record index: %r', path, e)
+
+    index = RecordIndex.build(buf)
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp_path, 'wb') as f:
+            index.dump(f)
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rename(temp_path, path)
+    except (IOError, OSError) as e:
+        logger.warning('%s: cannot save record index: %s', path, e)
+    return index
+
+
 def link_records(records):
     prev = None
     for rec in records:
@@ -115,7 +463,13 @@ def link_records(records):
 def record_to_json(record, *args, **kwargs):
     ''' convert a record to json '''
     record['payload'] = list(dumpbytes(record['payload']))
-    return json.dumps(record, *args, **kwargs)
+    return json.dumps(dict(record), *args, **kwargs)
+
+
+def filter_records_by_tagids(records, tagids):
+    for record in records:
+        if record['tagid'] in tagids:
+            yield record
 
 
 def nth(iterable, n, default=None):
@@ -151,21 +505,107 @@ def group_records_by_toplevel(records, group_as_list=True):
         yield group
 
 
+def check_seqno(seqno):
+    ''' as islice() does, accept only non-negative integers or None '''
+    if seqno is None:
+        return
+    if isinstance(seqno, bool) or not isinstance(seqno, integer_types) \
+            or seqno < 0:
+        raise ValueError('seqno must be None or a non-negative integer: %r'
+                         % (seqno,))
+
+
 class RecordStream(filestructure.VersionSensitiveItem):
+    '''
+    :param index_cache_dir: directory to persist the record index in; it is
+        not persisted if None.
+    :param indexes: a dict to keep the record index in, under `name`. Pass
+        the same dict to keep the index across RecordStream instances of the
+        same stream.
+    '''
+
+    def __init__(self, item, version, index_cache_dir=None, indexes=None,
+                 name=None):
+        filestructure.VersionSensitiveItem.__init__(self, item, version)
+        self.index_cache_dir = index_cache_dir
+        self.indexes = indexes
+        self.name = name
 
     def records(self, **kwargs):
-        records = read_records(self.open())
-        if 'range' in kwargs:
-            range = kwargs['range']
-            records = islice(records, range[0], range[1])
-        elif 'treegroup' in kwargs:
-            groups = group_records_by_toplevel(records, group_as_list=True)
-            records = nth(groups, kwargs['treegroup'])
-        return records
+        ''' iterable of the records in this stream
+
+        :param range: (start, stop) seqno range of the records. Both are
+            non-negative integers or None, as for islice(); ValueError
+            otherwise.
+        :param treegroup: index of a top-level tree group; returns a list
+        :param tagids: yield only the records of these tagids
+        '''
+        tagids = kwargs.get('tagids')
+        if 'range' in kwargs or 'treegroup' in kwargs:
+            if 'range' in kwargs:
+                start, stop = kwargs['range']
+                check_seqno(start)
+                check_seqno(stop)
+                start = start or 0
+                records = self.records_from(start)
+                if stop is not None:
+                    records = islice(records, max(stop - start, 0))
+            else:
+                records = self.records_treegroup(kwargs['treegroup'])
+                if records is None:
+                    return None
+            if tagids is not None:
+                records = filter_records_by_tagids(records, tagids)
+                if 'treegroup' in kwargs:
+                    records = list(records)
+            return records
+
+        f = self.open()
+        if hasattr(f, 'getvalue'):
+            # 이미 메모리에 올라와 있는 스트림
+            return read_records_from_buffer(f.getvalue(), f.tell(),
+                                            tagids=tagids)
+        return read_records(f, tagids=tagids)
+
+    def get_buffer(self):
+        ''' the content of this stream, read at once
+
+        스트림은 한 번만 열어서 읽는다: 표준 입력처럼 다시 열 수 없는
+        스트림도 있다.
+        '''
+        f = self.open()
+        try:
+            if hasattr(f, 'getvalue'):
+                return f.getvalue()
+            return f.read()
+        finally:
+            f.close()
+
+    buffer = cached_property(get_buffer)
+
+    def get_index(self):
+        ''' build (or load) the record index of this stream '''
+        if self.indexes is not None and self.name in self.indexes:
+            return self.indexes[self.name]
+        index = get_record_index(self.buffer, self.index_cache_dir)
+        if self.indexes is not None:
+            self.indexes[self.name] = index
+        return index
+
+    index = cached_property(get_index)
+
+    def records_from(self, seqno):
+        ''' records from `seqno` to the end, seeking via the index '''
+        check_seqno(seqno)
+        index = self.index
+        if seqno >= len(index):
+            return iter([])
+        offset = index.offsets[seqno]
+        return read_records_from_buffer(self.buffer, offset, seqno)
 
     def record(self, idx):
         ''' get the record at `idx' '''
-        return nth(self.records(), idx)
+        return next(self.records_from(idx), None)
 
     def records_json(self, **kwargs):
         records = self.records(**kwargs)
@@ -179,8 +619,11 @@ class RecordStream(filestructure.VersionSensitiveItem):
 
     def records_treegroup(self, n):
         ''' returns list of records in `n'th top-level tree '''
-        groups = self.records_treegrouped()
-        return nth(groups, n)
+        index = self.index
+        if n >= len(index.groups):
+            return None
+        start, end = index.treegroup_range(n)
+        return list(islice(self.records_from(start), end - start))
 
     def other_formats(self):
         return {'.records': self.records_json().open}
@@ -190,10 +633,38 @@ class Sections(filestructure.Sections):
 
     section_class = RecordStream
 
+    def __init__(self, stg, version, index_cache_dir=None):
+        filestructure.Sections.__init__(self, stg, version)
+        self.index_cache_dir = index_cache_dir
+        # section()은 매번 새 RecordStream을 만드므로, 레코드 인덱스는
+        # 여기에 스트림 이름별로 둔다.
+        self.indexes = dict()
+
+    def resolve_conversion_for(self, name):
+        def conversion(item):
+            return self.section_class(self.wrapped[name], self.version,
+                                      self.index_cache_dir, self.indexes,
+                                      name)
+        return conversion
+
 
 class Hwp5File(filestructure.Hwp5File):
     ''' Hwp5File for 'rec' layer
+
+    :param index_cache_dir: directory to persist the record indexes of the
+        DocInfo and the sections in.
     '''
 
     docinfo_class = RecordStream
     bodytext_class = Sections
+
+    def __init__(self, stg, stream_cache=None, index_cache_dir=None):
+        self.index_cache_dir = index_cache_dir
+        filestructure.Hwp5File.__init__(self, stg, stream_cache)
+
+    def with_version(self, f):
+        if f is self.docinfo_class or f is self.bodytext_class:
+            def wrapped(item):
+                return f(item, self.header.version, self.index_cache_dir)
+            return wrapped
+        return filestructure.Hwp5File.with_version(self, f)
@@ -19,10 +19,14 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+from functools import partial
+import hashlib
 import io
 import os.path
 import sys
 
+from ..utils import map_in_threads
+
 
 PY3 = sys.version_info.major == 3
 if PY3:
@@ -69,35 +73,65 @@ class ItemConversionStorage(StorageWrapper):
 
 
 class ExtraItemStorage(StorageWrapper):
+    ''' expose other formats of the items as virtual streams
+
+    A virtual stream is named by its item's name followed by the extension,
+    e.g. 'DocInfo.models'. The names are resolved through an index, which is
+    built lazily item by item, and only for the items which could have the
+    looked up name. The index keeps the names only: the openers returned by
+    `other_formats()` may be usable only once, so they are asked for again
+    on every lookup.
+    '''
+
+    def __init__(self, wrapped):
+        StorageWrapper.__init__(self, wrapped)
+        self.vstream_names = dict()
+        self.vstream_index = dict()
 
     def __iter__(self):
         for name in self.wrapped:
             yield name
 
-            item = self.wrapped[name]
-            if hasattr(item, 'other_formats'):
-                other_formats = item.other_formats()
-                if other_formats:
-                    for ext in other_formats:
-                        yield name + ext
+            for vname in self.vstreams_of(name):
+                yield vname
 
     def __getitem__(self, name):
         try:
             item = self.wrapped[name]
-            if is_storage(item):
-                item = ExtraItemStorage(item)
-            return item
         except KeyError:
-            # 기반 스토리지에는 없으므로, other_formats() 중에서 찾아본다.
+            # 기반 스토리지에는 없으므로, 가상 스트림 중에서 찾아본다.
+            found = self.resolve_vstream(name)
+            if found is None:
+                raise
+            root, ext = found
+            return Open2Stream(self.wrapped[root].other_formats()[ext])
+        if is_storage(item):
+            item = ExtraItemStorage(item)
+        return item
+
+    def resolve_vstream(self, name):
+        ''' return (item name, extension) of a virtual stream, or None '''
+        if name not in self.vstream_index:
             for root in self.wrapped:
-                item = self.wrapped[root]
-                if hasattr(item, 'other_formats'):
-                    other_formats = item.other_formats()
-                    if other_formats:
-                        for ext, func in other_formats.items():
-                            if root + ext == name:
-                                return Open2Stream(func)
-            raise
+                if name.startswith(root) and root not in self.vstream_names:
+                    self.vstreams_of(root)
+        return self.vstream_index.get(name)
+
+    def vstreams_of(self, root):
+        ''' return the names of the virtual streams of an item '''
+        if root in self.vstream_names:
+            return self.vstream_names[root]
+
+        names = []
+        item = self.wrapped[root]
+        if hasattr(item, 'other_formats'):
+            other_formats = item.other_formats()
+            if other_formats:
+                for ext in other_formats:
+                    names.append(root + ext)
+                    self.vstream_index.setdefault(root + ext, (root, ext))
+        self.vstream_names[root] = names
+        return names
 
 
 class Open2Stream(object):
@@ -121,27 +155,83 @@ def iter_storage_leafs(stg, basepath=''):
             yield path
 
 
-def unpack(stg, outbase):
+def unpack(stg, outbase, jobs=None, skip_identical=False):
     ''' unpack a storage into outbase directory
 
         stg: an instance of Storage
         outbase: path to a directory in filesystem (should not end with '/')
+        jobs: number of threads to copy streams concurrently
+        skip_identical: leave files which are identical to the streams
+        untouched
+
+    Each stream is copied in chunks, so that the memory use does not grow
+    with the size of the streams.
+
+    :returns: the number of streams written, i.e. not skipped
     '''
+    copy = partial(unpack_stream, skip_identical=skip_identical)
+    results = map_in_threads(lambda args: copy(*args),
+                             iter_unpack_items(stg, outbase),
+                             jobs)
+    return sum(1 for written in results if written)
+
+
+def iter_unpack_items(stg, outbase):
+    ''' create directories for the storages and yield (stream, outpath) '''
     for name in stg:
         outpath = os.path.join(outbase, name)
         item = stg[name]
         if is_storage(item):
             if not os.path.exists(outpath):
                 os.mkdir(outpath)
-            unpack(item, outpath)
+            for x in iter_unpack_items(item, outpath):
+                yield x
         else:
-            f = item.open()
-            try:
-                outpath = outpath.replace('\x05', '_05')
-                with io.open(outpath, 'wb') as outfile:
-                    outfile.write(f.read())
-            finally:
-                f.close()
+            outpath = outpath.replace('\x05', '_05')
+            yield item, outpath
+
+
+def unpack_stream(item, outpath, skip_identical=False):
+    ''' copy a stream into a file
+
+    With `skip_identical`, an existing file with the same size and SHA-1
+    digest is left untouched. The stream is hashed first without being
+    written, and the existing file is hashed only if the sizes match; the
+    stream is read once more to be written only when it differs.
+
+    :returns: False if skipped; True otherwise
+    '''
+    if skip_identical and os.path.exists(outpath):
+        size, digest = copy_stream_digest(item.open(), None)
+        if size == os.path.getsize(outpath):
+            existing = copy_stream_digest(io.open(outpath, 'rb'), None)
+            if existing == (size, digest):
+                return False
+
+    with io.open(outpath, 'wb') as outfile:
+        copy_stream_digest(item.open(), outfile)
+    return True
+
+
+def copy_stream_digest(f, outfile, bufsize=65536):
+    ''' copy `f` into `outfile` (if any) in chunks and close `f`
+
+    :returns: (size, SHA-1 digest) of the copied data
+    '''
+    size = 0
+    digest = hashlib.sha1()
+    try:
+        while True:
+            data = f.read(bufsize)
+            if not data:
+                break
+            size += len(data)
+            digest.update(data)
+            if outfile is not None:
+                outfile.write(data)
+    finally:
+        f.close()
+    return size, digest.digest()
 
 
 def open_storage_item(stg, path):
@@ -19,8 +19,15 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+from contextlib import closing
 import io
+import logging
 import os.path
+import shutil
+import tempfile
+
+
+logger = logging.getLogger(__name__)
 
 
 class FileSystemStorage(object):
@@ -50,3 +57,103 @@ class FileSystemStream(object):
 
     def open(self):
         return io.open(self.path, 'rb')
+
+
+class StreamCache(FileSystemStorage):
+    ''' Directory-based cache of streams, named by keys such as digests of
+    their sources.
+
+    Entries are evicted in least-recently-used order, by their modification
+    times, as soon as their total size exceeds `max_size` bytes.
+    '''
+
+    tmp_suffix = '.tmp'
+
+    def __init__(self, path, max_size=256 * 1024 * 1024):
+        FileSystemStorage.__init__(self, path)
+        self.max_size = max_size
+        if not os.path.isdir(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                if not os.path.isdir(path):
+                    raise
+
+    def __iter__(self):
+        return (name for name in FileSystemStorage.__iter__(self)
+                if not name.endswith(self.tmp_suffix))
+
+    def open(self, key, produce, in_memory=True):
+        ''' Open the cached stream of `key`.
+
+        On a miss, the stream returned by `produce()` is stored first.
+        With `in_memory`, the stream is read into a BytesIO, so that the
+        readers can take its buffer with getvalue(); otherwise a file is
+        returned.
+        '''
+        path = os.path.join(self.path, key)
+        try:
+            f = self.open_entry(path, in_memory)
+        except (IOError, OSError):
+            pass
+        else:
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            return f
+
+        fd, tmppath = tempfile.mkstemp(suffix=self.tmp_suffix, dir=self.path)
+        try:
+            with io.open(fd, 'wb') as outfile:
+                with closing(produce()) as source:
+                    shutil.copyfileobj(source, outfile)
+            try:
+                os.rename(tmppath, path)
+            except OSError:
+                # 다른 스레드나 프로세스가 먼저 저장한 경우
+                if not os.path.exists(path):
+                    raise
+                os.unlink(tmppath)
+        except Exception:
+            if os.path.exists(tmppath):
+                os.unlink(tmppath)
+            raise
+
+        f = self.open_entry(path, in_memory)
+        self.evict()
+        return f
+
+    def open_entry(self, path, in_memory):
+        f = io.open(path, 'rb')
+        if not in_memory:
+            return f
+        with f:
+            return io.BytesIO(f.read())
+
+    def size(self):
+        ''' Total size of the cached streams. '''
+        return sum(size for mtime, size, path in self.entries())
+
+    def entries(self):
+        for name in self:
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+    def evict(self):
+        ''' Remove least-recently-used streams to fit in `max_size`. '''
+        entries = sorted(self.entries())
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logger.debug('cannot evict %s: %s', path, e)
+                continue
+            total -= size
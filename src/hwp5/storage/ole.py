@@ -30,7 +30,11 @@ logger = logging.getLogger(__name__)
 class OleStorage(object):
 
     def __init__(self, *args, **kwargs):
-        impl_class = get_olestorage_class()
+        if args and hasattr(args[0], 'openstream'):
+            # an OleFileIO instance
+            from ..plat.olefileio import OleStorage as impl_class
+        else:
+            impl_class = get_olestorage_class()
         assert impl_class is not None, 'no OleStorage implementation available'
         self.impl = impl_class(*args, **kwargs)
 
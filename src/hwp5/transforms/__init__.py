@@ -23,8 +23,10 @@ from contextlib import contextmanager
 import logging
 
 from ..errors import ImplementationNotAvailable
+from ..plat import _lxml
 from ..plat import get_xslt_compile
 from ..utils import hwp5_resources_path
+from ..utils import map_in_threads
 from ..utils import mkstemp_open
 
 
@@ -32,10 +34,32 @@ logger = logging.getLogger(__name__)
 
 
 class BaseTransform:
+    ''' Base of the transforms of HWPv5 files through their xhwp5, the
+    intermediate XML, with XSL stylesheets.
 
-    def __init__(self, xslt_compile=None, embedbin=False):
-        self.xslt_compile = xslt_compile or self.get_default_xslt_compile()
+    :param in_memory: hand the xhwp5 to the stylesheets as an in-memory
+        tree, instead of writing it to a temporary file to be parsed again.
+        It defaults to True if the stylesheets are compiled with lxml.
+    :param engine: one of `engines`. 'xslt' goes through the xhwp5 and the
+        stylesheets; the others render the documents natively, without
+        XSLT.
+    '''
+
+    engines = ('xslt',)
+
+    def __init__(self, xslt_compile=None, embedbin=False, jobs=None,
+                 in_memory=None, engine='xslt'):
+        if engine not in self.engines:
+            raise ValueError('unknown engine: %r' % engine)
+        self.engine = engine
+        if engine == 'xslt':
+            xslt_compile = xslt_compile or self.get_default_xslt_compile()
+        self.xslt_compile = xslt_compile
         self.embedbin = embedbin
+        self.jobs = jobs
+        if in_memory is None:
+            in_memory = self.xslt_compile is _lxml.xslt_compile
+        self.in_memory = in_memory
 
     @classmethod
     def get_default_xslt_compile(cls):
@@ -46,14 +70,59 @@ class BaseTransform:
 
     def make_transform_hwp5(self, transform_xhwp5):
         def transform_hwp5(hwp5file, output):
-            with self.transformed_xhwp5_at_temp(hwp5file) as xhwp5path:
-                return transform_xhwp5(xhwp5path, output)
+            with self.transformed_xhwp5(hwp5file) as xhwp5:
+                return transform_xhwp5(xhwp5, output)
         return transform_hwp5
 
     def make_xsl_transform(self, resource_path, **params):
         with hwp5_resources_path(resource_path) as xsl_path:
             return self.xslt_compile(xsl_path, **params)
 
+    def make_xsl_document_transform(self, resource_path, **params):
+        ''' compile a stylesheet into a function from an lxml document to
+        the result document; requires lxml
+        '''
+        with hwp5_resources_path(resource_path) as xsl_path:
+            return _lxml.XSLT(xsl_path, **params).transform_document
+
+    def loaded_xhwp5(self, xhwp5):
+        ''' the xhwp5 to be transformed by many stylesheets: parsed once
+        into an lxml document if `in_memory`, otherwise as it is
+        '''
+        if self.in_memory and not _lxml.is_document(xhwp5):
+            return _lxml.parse_document(xhwp5)
+        return xhwp5
+
+    def transform_xhwp5_to_outputs(self, xhwp5, transforms):
+        ''' run the transforms of the same xhwp5, into their outputs
+
+        :param transforms: pairs of a transform function and its output
+            stream
+
+        The xhwp5 is parsed once for all the transforms if `in_memory`.
+        With `jobs`, the transforms run concurrently in threads; lxml
+        releases the GIL while transforming.
+        '''
+        xhwp5 = self.loaded_xhwp5(xhwp5)
+
+        def transform(transform_output):
+            transform_xhwp5, output = transform_output
+            return transform_xhwp5(xhwp5, output)
+
+        jobs = self.jobs if self.in_memory else None
+        return list(map_in_threads(transform, transforms, jobs))
+
+    @contextmanager
+    def transformed_xhwp5(self, hwp5file):
+        ''' the xhwp5 of `hwp5file`, as an input of the stylesheets: an
+        lxml document if `in_memory`, otherwise the path of a temporary file
+        '''
+        if self.in_memory:
+            yield hwp5file.xmlevents(embedbin=self.embedbin).to_lxml()
+        else:
+            with self.transformed_xhwp5_at_temp(hwp5file) as xhwp5path:
+                yield xhwp5path
+
     @contextmanager
     def transformed_xhwp5_at_temp(self, hwp5file):
         with mkstemp_open() as (tmp_path, f):
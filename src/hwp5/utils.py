@@ -220,6 +220,35 @@ class GeneratorTextReader(object):
         self.gen = self.buffer = None
 
 
+def map_in_threads(func, iterable, jobs=None):
+    ''' map `func` over `iterable` in a thread pool of `jobs` threads
+
+    Results are yielded in the order of `iterable`. At most `2 * jobs` calls
+    are pending at a time, so that results not yet consumed do not pile up.
+    Without `jobs` (or with 1), it maps in the calling thread.
+    '''
+    if not jobs or jobs <= 1:
+        for item in iterable:
+            yield func(item)
+        return
+
+    from collections import deque
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(jobs)
+    try:
+        pending = deque()
+        for item in iterable:
+            pending.append(pool.apply_async(func, (item, )))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 @contextmanager
 def hwp5_resources_path(res_path):
     try:
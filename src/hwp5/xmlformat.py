@@ -243,6 +243,29 @@ def xmlevents_to_bytechunks(xmlevents, encoding='utf-8'):
         yield textchunk.encode(encoding)
 
 
+def xmlevents_to_treebuilder(xmlevents, builder):
+    ''' feed xml events into a tree builder, e.g. lxml.etree.TreeBuilder
+
+    The tree built is the same as the one parsed from the serialized xml
+    events: NUL characters are dropped, and line breaks in texts are
+    normalized as an XML parser does.
+
+    :returns: the root element, i.e. the result of builder.close()
+    '''
+    for event, item in xmlevents:
+        if event is STARTEVENT:
+            attrs = dict((n, v.replace('\x00', ''))
+                         for n, v in item[1].items())
+            builder.start(item[0], attrs)
+        elif event is Text:
+            text = item.replace('\x00', '')
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+            builder.data(text)
+        elif event is ENDEVENT:
+            builder.end(item)
+    return builder.close()
+
+
 def xmlevents_to_textchunks(xmlevents):
     entities = {'\r': '&#13;',
                 '\n': '&#10;',
@@ -19,6 +19,7 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+from collections import OrderedDict
 from collections import deque
 from itertools import chain
 from pprint import pformat
@@ -29,6 +30,7 @@ import sys
 
 from . import binmodel
 from . import filestructure
+from .filestructure import is_olefile_data
 from .binmodel.controls import SectionDef
 from .binmodel.controls import TableControl
 from .binmodel.controls import GShapeObjectControl
@@ -57,6 +59,7 @@ from .treeop import tree_events
 from .treeop import tree_events_multi
 from .xmlformat import startelement
 from .xmlformat import xmlevents_to_bytechunks
+from .xmlformat import xmlevents_to_treebuilder
 
 
 PY3 = sys.version_info.major == 3
@@ -68,26 +71,42 @@ if PY3:
 logger = logging.getLogger(__name__)
 
 
-def give_elements_unique_id(event_prefixed_mac):
-    paragraph_id = 0
-    table_id = 0
-    gshape_id = 0
-    shape_id = 0
+ELEMENT_UNIQUE_IDS = (
+    (Paragraph, 'paragraph_id'),
+    (TableControl, 'table_id'),
+    (GShapeObjectControl, 'gshape_id'),
+    (ShapeComponent, 'shape_id'),
+)
+
+
+def give_elements_unique_id(event_prefixed_mac, counters=None):
+    ''' give elements unique ids
+
+    :param counters: a dict of the next ids, keyed by the attribute names;
+        updated as the ids are given.
+    '''
+    if counters is None:
+        counters = dict()
+    unique_ids = dict(ELEMENT_UNIQUE_IDS)
     for event, item in event_prefixed_mac:
         (model, attributes, context) = item
         if event == STARTEVENT:
-            if model == Paragraph:
-                attributes['paragraph_id'] = paragraph_id
-                paragraph_id += 1
-            elif model == TableControl:
-                attributes['table_id'] = table_id
-                table_id += 1
-            elif model == GShapeObjectControl:
-                attributes['gshape_id'] = gshape_id
-                gshape_id += 1
-            elif model == ShapeComponent:
-                attributes['shape_id'] = shape_id
-                shape_id += 1
+            if model in unique_ids:
+                name = unique_ids[model]
+                attributes[name] = counters.get(name, 0)
+                counters[name] = attributes[name] + 1
+            elif model is RenderedSection:
+                # 앞서 매겨진 id들 다음부터 매겨지도록 한다.
+                rendered = attributes['result'].get()
+                if rendered is None:
+                    # 워커에서 실패한 섹션은 이 프로세스에서 다시 렌더링하여
+                    # ParseError 등을 그대로 일으킨다.
+                    rendered = render_section_xmlevents(*attributes['task'])
+                xmlevents, section_counters = rendered
+                attributes['xmlevents'] = xmlevents
+                attributes['id_offsets'] = dict(counters)
+                for name, count in section_counters.items():
+                    counters[name] = counters.get(name, 0) + count
         yield event, item
 
 
@@ -515,6 +534,313 @@ def tokenize_text_by_lang(event_prefixed_mac):
             yield event, item
 
 
+def fused_section_events(event_prefixed_mac, sect_id=None):
+    ''' transform model events of a section in a single pass
+
+    Produces the same events as the staged pipeline of Section.events(),
+    i.e. make_texts_linesegmented_and_charshaped() through wrap_columns(),
+    with a SectionEventsFusion.
+    '''
+    fusion = SectionEventsFusion(sect_id)
+    feed = fusion.feed
+    out = fusion.out
+    for event, item in event_prefixed_mac:
+        feed(event, item)
+        if out:
+            for x in out:
+                yield x
+            del out[:]
+    fusion.close()
+    for x in out:
+        yield x
+
+
+KIND_CONTROL = 1
+KIND_FIELD = 2
+KIND_LISTHEADER = 4
+KIND_TABLEBODY = 8
+
+
+class SectionEventsFusion(object):
+    ''' state machine of the section transformation stages
+
+    Each event fed is dispatched on its model type to the handlers of the
+    stages, in the order of the staged pipeline; the handlers call the
+    next ones directly, instead of resuming a chain of generators, and the
+    stages which do not concern the model are skipped. The stages which
+    look ahead with build_subtree() capture the subtrees instead. Resulting
+    events are appended to `out`.
+    '''
+
+    def __init__(self, sect_id=None):
+        self.out = []
+        self.sect_id = sect_id
+        self.kinds = dict()
+
+        # make_texts_linesegmented_and_charshaped
+        self.paragraph_texts = []
+        # make_extended_controls_inline
+        self.paragraph_controls = []
+        self.control_capture = None
+        self.control_depth = 0
+        # match_field_start_end
+        self.fields = []
+        # make_paragraphs_children_of_listheader
+        self.listheaders = []
+        self.listheader_level = 0
+        self.tablebodies = []
+        self.tablebody_level = 0
+        # restructure_tablebody
+        self.tables = []
+        # wrap_section: wrap_columns() follows once the section has started
+        self.wrap = self.wrap_section
+        self.section_buffer = []
+        self.section_capture = None
+        self.section_depth = 0
+        self.sectiondef = None
+        # wrap_columns
+        self.columns = []
+
+    def kind_of(self, model):
+        try:
+            return self.kinds[model]
+        except KeyError:
+            pass
+        kind = 0
+        if issubclass(model, Control):
+            kind |= KIND_CONTROL
+        if issubclass(model, Field):
+            kind |= KIND_FIELD
+        if issubclass(model, ListHeader):
+            kind |= KIND_LISTHEADER
+        if issubclass(model, TableBody):
+            kind |= KIND_TABLEBODY
+        self.kinds[model] = kind
+        return kind
+
+    def feed(self, event, item):
+        ''' make_texts_linesegmented_and_charshaped '''
+        model = item[0]
+        if model is Paragraph:
+            if event is STARTEVENT:
+                self.paragraph_texts.append(dict())
+                self.inline_controls(STARTEVENT, item)
+            else:
+                texts = self.paragraph_texts.pop()
+                paratext = texts.get(ParaText)
+                if paratext is None:
+                    paratext = (ParaText,
+                                dict(chunks=[((0, 0), '')]),
+                                dict(item[2]))
+                for x in merge_paragraph_text_charshape_lineseg(
+                    paratext, texts.get(ParaCharShape), texts.get(ParaLineSeg)
+                ):
+                    self.inline_controls(*x)
+                self.inline_controls(ENDEVENT, (model, item[1], item[2]))
+        elif model in (ParaText, ParaCharShape, ParaLineSeg, ParaRangeTag):
+            if event is STARTEVENT:
+                self.paragraph_texts[-1][model] = item
+        else:
+            self.inline_controls(event, item)
+
+    def inline_controls(self, event, item):
+        ''' make_extended_controls_inline '''
+        capture = self.control_capture
+        if capture is not None:
+            capture.append((event, item))
+            if event is STARTEVENT:
+                self.control_depth += 1
+            elif self.control_depth > 0:
+                self.control_depth -= 1
+            else:
+                self.control_capture = None
+                paragraph = self.paragraph_controls[-1]
+                paragraph_controls = paragraph.setdefault(Control, [])
+                paragraph_controls.append(build_subtree(iter(capture)))
+            return
+
+        model = item[0]
+        if model is Paragraph:
+            if event is STARTEVENT:
+                self.paragraph_controls.append(dict())
+                self.nest_paragraphs(STARTEVENT, item)
+            else:
+                self.nest_paragraphs(ENDEVENT, item)
+                self.paragraph_controls.pop()
+        elif model is ControlChar:
+            if event is STARTEVENT:
+                if item[1]['kind'] is ControlChar.EXTENDED:
+                    paragraph = self.paragraph_controls[-1]
+                    control_subtree = paragraph.get(Control).pop(0)
+                    tev = tree_events(*control_subtree)
+                    self.match_fields(*next(tev))
+                    for x in tev:
+                        self.inline_controls(*x)
+                elif item[1]['name'] == 'FIELD_END':
+                    # match_field_start_end
+                    if len(self.fields) > 0:
+                        self.nest_paragraphs(ENDEVENT, self.fields.pop())
+                    else:
+                        logger.warning('unmatched field end')
+                else:
+                    self.nest_paragraphs(STARTEVENT, item)
+                    self.nest_paragraphs(ENDEVENT, item)
+        elif event is STARTEVENT and self.kind_of(model) & KIND_CONTROL:
+            self.control_capture = []
+            self.control_depth = 0
+        else:
+            self.match_fields(event, item)
+
+    def match_fields(self, event, item):
+        ''' match_field_start_end '''
+        model = item[0]
+        if model is LineSeg:
+            if event is ENDEVENT:
+                for field_item in reversed(self.fields):
+                    self.nest_paragraphs(ENDEVENT, field_item)
+                self.nest_paragraphs(event, item)
+            else:
+                self.nest_paragraphs(event, item)
+                for field_item in self.fields:
+                    self.nest_paragraphs(STARTEVENT, field_item)
+        elif model is ControlChar:
+            if item[1]['name'] == 'FIELD_END':
+                if event is ENDEVENT:
+                    if len(self.fields) > 0:
+                        self.nest_paragraphs(event, self.fields.pop())
+                    else:
+                        logger.warning('unmatched field end')
+            else:
+                self.nest_paragraphs(event, item)
+        elif self.kind_of(model) & KIND_FIELD:
+            if event is STARTEVENT:
+                self.fields.append(item)
+                self.nest_paragraphs(event, item)
+        else:
+            self.nest_paragraphs(event, item)
+
+    def nest_paragraphs(self, event, item):
+        ''' make_paragraphs_children_of_listheader '''
+        stack = self.listheaders
+        is_listheader = self.kind_of(item[0]) & KIND_LISTHEADER
+        if event is STARTEVENT:
+            self.listheader_level += 1
+            level = self.listheader_level
+            if stack and stack[-1][0] == level and item[0] is not Paragraph:
+                self.nest_tablecells(ENDEVENT, stack.pop()[1])
+            if is_listheader:
+                stack.append((level, item))
+            self.nest_tablecells(event, item)
+        else:
+            level = self.listheader_level
+            if stack and stack[-1][0] - 1 == level:
+                self.nest_tablecells(ENDEVENT, stack.pop()[1])
+            if not is_listheader:
+                self.nest_tablecells(event, item)
+            self.listheader_level = level - 1
+
+    def nest_tablecells(self, event, item):
+        ''' make_paragraphs_children_of_listheader(TableBody, TableCell) '''
+        stack = self.tablebodies
+        is_tablebody = self.kind_of(item[0]) & KIND_TABLEBODY
+        if event is STARTEVENT:
+            self.tablebody_level += 1
+            level = self.tablebody_level
+            if stack and stack[-1][0] == level and item[0] is not TableCell:
+                self.restructure(ENDEVENT, stack.pop()[1])
+            if is_tablebody:
+                stack.append((level, item))
+            self.restructure(event, item)
+        else:
+            level = self.tablebody_level
+            if stack and stack[-1][0] - 1 == level:
+                self.restructure(ENDEVENT, stack.pop()[1])
+            if not is_tablebody:
+                self.restructure(event, item)
+            self.tablebody_level = level - 1
+
+    def restructure(self, event, item):
+        ''' restructure_tablebody and tokenize_text_by_lang '''
+        model = item[0]
+        if model is Text:
+            if event is STARTEVENT:
+                attributes = item[1]
+                charshape_id = attributes['charshape_id']
+                for lang, text in tokenize_unicode_by_lang(attributes['text']):
+                    token = (Text, {
+                        'charshape_id': charshape_id,
+                        'lang': lang,
+                        'text': text,
+                    }, item[2])
+                    self.wrap(STARTEVENT, token)
+                    self.wrap(ENDEVENT, token)
+        elif model is TableBody:
+            for x in rstbody_tablebody(event, self.tables, item, item[1],
+                                       item[2]):
+                self.wrap(*x)
+        elif model is TableCell:
+            for x in rstbody_tablecell(event, self.tables, item):
+                self.wrap(*x)
+        else:
+            self.wrap(event, item)
+
+    def wrap_section(self, event, item):
+        ''' wrap_section '''
+        capture = self.section_capture
+        if capture is not None:
+            capture.append((event, item))
+            if event is STARTEVENT:
+                self.section_depth += 1
+            elif self.section_depth > 0:
+                self.section_depth -= 1
+            else:
+                self.section_capture = None
+                sectiondef, sectdef_child = build_subtree(iter(capture))
+                if self.sect_id is not None:
+                    sectiondef[1]['section_id'] = self.sect_id
+                self.sectiondef = sectiondef
+                self.wrap = self.wrap_columns
+                self.wrap_columns(STARTEVENT, sectiondef)
+                for x in tree_events_multi(sectdef_child):
+                    self.wrap_columns(*x)
+                for x in self.section_buffer:
+                    self.wrap_columns(*x)
+                del self.section_buffer[:]
+        elif item[0] is SectionDef and event is STARTEVENT:
+            self.section_capture = []
+            self.section_depth = 0
+        else:
+            self.section_buffer.append((event, item))
+
+    def wrap_columns(self, event, item):
+        ''' wrap_columns '''
+        stack = self.columns
+        model = item[0]
+        if model is Paragraph:
+            if event is STARTEVENT:
+                split = Paragraph.SplitFlags(item[1]['split'])
+                if split.new_columnsdef:
+                    if stack[-1][0] is ColumnSet:
+                        self.out.append((ENDEVENT, stack.pop()))
+
+                    columns = (ColumnSet, {}, {})
+                    stack.append(columns)
+                    self.out.append((STARTEVENT, columns))
+        elif event is STARTEVENT:
+            stack.append(item)
+        else:
+            if model != stack[-1][0]:
+                assert stack[-1][0] is ColumnSet
+                self.out.append((ENDEVENT, stack.pop()))
+            stack.pop()
+
+        self.out.append((event, item))
+
+    def close(self):
+        ''' end of the section: close the SectionDef '''
+        self.wrap_columns(ENDEVENT, self.sectiondef)
+
+
 def embed_bindata(event_prefixed_mac, bindata):
     for event, item in event_prefixed_mac:
         (model, attributes, context) = item
@@ -561,6 +887,15 @@ def wrap_modelevents(wrapper_model, modelevents):
 
 def modelevents_to_xmlevents(modelevents):
     for event, (model, attributes, context) in modelevents:
+        if model is RenderedSection:
+            if event is STARTEVENT:
+                xmlevents = offset_element_unique_ids(
+                    attributes.pop('xmlevents'),
+                    attributes['id_offsets'],
+                )
+                for x in xmlevents:
+                    yield x
+            continue
         try:
             if event is STARTEVENT:
                 for x in startelement(context, (model, attributes)):
@@ -604,6 +939,14 @@ class XmlEvents(object):
         if hasattr(outfile, 'flush'):
             outfile.flush()
 
+    def to_lxml(self):
+        ''' build an lxml ElementTree from the events directly, without
+        serializing and parsing them.
+        '''
+        from lxml import etree
+        root = xmlevents_to_treebuilder(self, etree.TreeBuilder())
+        return etree.ElementTree(root)
+
     def open(self, **kwargs):
         tmpfile = TemporaryFile()
         try:
@@ -625,6 +968,8 @@ class XmlEventsMixin(object):
 class ModelEventStream(binmodel.ModelStream, XmlEventsMixin):
 
     def modelevents(self, **kwargs):
+        # binevents are not used to generate xml events
+        kwargs.setdefault('keep_binevents', False)
         models = self.models(**kwargs)
 
         # prepare modelevents context
@@ -740,10 +1085,22 @@ class DocInfo(ModelEventStream):
 
 
 class Section(ModelEventStream):
+    ''' a section of BodyText
+
+    `fused` picks fused_section_events() instead of the staged pipeline
+    by default; it may be overridden with the `fused` keyword argument of
+    events().
+    '''
+
+    fused = False
 
     def events(self, **kwargs):
+        fused = kwargs.pop('fused', self.fused)
         events = self.modelevents(**kwargs)
 
+        if fused:
+            return fused_section_events(events, kwargs.get('section_idx'))
+
         events = make_texts_linesegmented_and_charshaped(events)
         events = make_extended_controls_inline(events)
         events = match_field_start_end(events)
@@ -760,6 +1117,96 @@ class Section(ModelEventStream):
         return events
 
 
+class BodyText(object):
+    pass
+
+
+class RenderedSection(object):
+    ''' A section whose xml events are rendered in a worker process.
+
+    attributes['result']: an AsyncResult of render_section_in_worker()
+    attributes['task']: the arguments of render_section_xmlevents()
+    '''
+
+
+def render_section_xmlevents(path, section_idx, kwargs):
+    ''' render xml events of a section, with its own unique ids
+
+    워커 프로세스에서 실행됩니다.
+
+    :returns: (list of xml events, dict of the unique id counts)
+    '''
+    hwp5file = Hwp5File(path)
+    try:
+        section = hwp5file.text.section(section_idx)
+        kwargs['section_idx'] = section_idx
+        counters = dict()
+        events = section.events(**kwargs)
+        events = give_elements_unique_id(events, counters)
+        xmlevents = modelevents_to_xmlevents(events)
+        # 속성들의 순서가 pickle을 거쳐도 바뀌지 않도록 (Python 2) 순서쌍의
+        # 목록으로 보낸다. offset_element_unique_ids()에서 되돌린다.
+        xmlevents = list((event, (item[0], list(item[1].items())))
+                         if event is STARTEVENT else (event, item)
+                         for event, item in xmlevents)
+        return xmlevents, counters
+    finally:
+        hwp5file.close()
+
+
+def render_section_in_worker(task):
+    ''' render_section_xmlevents() in a worker process
+
+    :returns: the result of render_section_xmlevents(), or None if failed
+    '''
+    try:
+        return render_section_xmlevents(*task)
+    except Exception as e:
+        logger.debug('rendering section %d failed: %r', task[1], e)
+        return None
+
+
+def offset_element_unique_ids(xmlevents, offsets):
+    xmlattrs = dict((model.__name__, (name, name.replace('_', '-')))
+                    for model, name in ELEMENT_UNIQUE_IDS)
+    for event, item in xmlevents:
+        if event is STARTEVENT:
+            attributes = OrderedDict(item[1])
+            item = item[0], attributes
+            if item[0] in xmlattrs:
+                name, xmlattr = xmlattrs[item[0]]
+                if xmlattr in attributes and offsets.get(name):
+                    value = int(attributes[xmlattr]) + offsets[name]
+                    attributes[xmlattr] = str(value)
+        yield event, item
+
+
+def rendered_sections_events(path, section_indexes, workers, kwargs):
+    ''' model events of sections rendered in a process pool
+
+    섹션들을 `workers`개의 프로세스에서 나누어 처리하고, 결과는 섹션 순서대로
+    RenderedSection 이벤트로 내보냅니다.
+    '''
+    from multiprocessing import Pool
+
+    kwargs = dict(kwargs)
+    kwargs.pop('embedbin', None)
+
+    pool = Pool(workers)
+    try:
+        tasks = list((path, idx, kwargs) for idx in section_indexes)
+        results = list(pool.apply_async(render_section_in_worker, (task,))
+                       for task in tasks)
+        pool.close()
+        for task, result in zip(tasks, results):
+            item = RenderedSection, dict(result=result, task=task), dict()
+            yield STARTEVENT, item
+            yield ENDEVENT, item
+        pool.join()
+    finally:
+        pool.terminate()
+
+
 class Sections(binmodel.Sections, XmlEventsMixin):
 
     section_class = Section
@@ -772,8 +1219,6 @@ class Sections(binmodel.Sections, XmlEventsMixin):
             events = section.events(**kwargs)
             bodytext_events.append(events)
 
-        class BodyText(object):
-            pass
         bodytext_events = chain(*bodytext_events)
         bodytext = BodyText, dict(), dict()
         return wrap_modelevents(bodytext, bodytext_events)
@@ -792,20 +1237,55 @@ class HwpDoc(Struct):
 
 
 class Hwp5File(binmodel.Hwp5File, XmlEventsMixin):
+    ''' Hwp5File for 'xml' layer
+
+    :param workers: number of worker processes. Sections are rendered in
+        parallel if there are more than one and the file is opened by its
+        path; otherwise top-level tree groups of the sections are parsed in
+        parallel.
+    :param stream_cache: a StreamCache for the decompressed streams.
+    :param index_cache_dir: directory to persist the record indexes in.
+    '''
 
     summaryinfo_class = HwpSummaryInfo
     docinfo_class = DocInfo
     bodytext_class = Sections
 
+    def __init__(self, stg, workers=None, stream_cache=None,
+                 index_cache_dir=None):
+        binmodel.Hwp5File.__init__(self, stg, stream_cache, index_cache_dir)
+        if isinstance(stg, basestring) and not is_olefile_data(stg):
+            self.filename = stg
+        else:
+            self.filename = None
+        self.workers = workers
+
     def events(self, **kwargs):
         if 'embedbin' in kwargs and kwargs['embedbin'] and 'BinData' in self:
             kwargs['embedbin'] = self['BinData']
         else:
             kwargs.pop('embedbin', None)
 
+        workers = kwargs.pop('workers', self.workers)
+        if workers and workers > 1:
+            section_indexes = self.text.section_indexes()
+        if (workers and workers > 1 and len(section_indexes) > 1 and
+                self.filename is not None):
+            text_events = rendered_sections_events(self.filename,
+                                                   section_indexes,
+                                                   workers, kwargs)
+            bodytext = BodyText, dict(), dict()
+            text_events = wrap_modelevents(bodytext, text_events)
+        elif workers and workers > 1:
+            # 섹션 단위로 나눌 수 없으면 섹션 안의 트리 그룹들을 나누어
+            # 파싱한다.
+            text_events = self.text.events(workers=workers, **kwargs)
+        else:
+            text_events = self.text.events(**kwargs)
+
         events = chain(self.summaryinfo.events(**kwargs),
                        self.docinfo.events(**kwargs),
-                       self.text.events(**kwargs))
+                       text_events)
 
         hwpdoc = HwpDoc, dict(version=self.header.version), dict()
         events = wrap_modelevents(hwpdoc, events)
@@ -36,7 +36,7 @@
 
   <xsl:template match="HwpSummaryInfo" mode="head">
     <xsl:element name="title">
-      <xsl:value-of select="Property[@name='PIDSI_TITLE']/@value" />
+      <xsl:value-of select=".//Property[@id-label='PIDSI_TITLE']/@value" />
     </xsl:element>
   </xsl:template>
 
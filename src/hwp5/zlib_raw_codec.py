@@ -20,7 +20,11 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 import codecs
-import zlib  # this codec needs the optional zlib module !
+
+from .plat import get_zlib
+
+
+zlib = get_zlib()  # this codec needs the optional zlib module !
 
 _wbits = -15
 
@@ -4,7 +4,6 @@ from __future__ import print_function
 from __future__ import unicode_literals
 import logging
 import os.path
-import shutil
 
 from hwp5.errors import InvalidOleStorageError
 from hwp5.storage import is_storage
@@ -13,12 +12,13 @@ from hwp5.storage import iter_storage_leafs
 from hwp5.storage import unpack
 
 from .fixtures import get_fixture_path
+from .mixin_tempdir import TempDirTestMixin
 
 
 logger = logging.getLogger(__name__)
 
 
-class OleStorageTestMixin(object):
+class OleStorageTestMixin(TempDirTestMixin):
 
     hwp5file_name = 'sample-5017.hwp'
     OleStorage = None
@@ -167,20 +167,50 @@ class OleStorageTestMixin(object):
             logger.warning('%s: skipped', self.id())
             return
 
-        if os.path.exists('5017'):
-            shutil.rmtree('5017')
-        os.mkdir('5017')
-        unpack(self.olestg, '5017')
-
-        self.assertTrue(os.path.exists('5017/_05HwpSummaryInformation'))
-        self.assertTrue(os.path.exists('5017/BinData/BIN0002.jpg'))
-        self.assertTrue(os.path.exists('5017/BinData/BIN0002.png'))
-        self.assertTrue(os.path.exists('5017/BinData/BIN0003.png'))
-        self.assertTrue(os.path.exists('5017/BodyText/Section0'))
-        self.assertTrue(os.path.exists('5017/DocInfo'))
-        self.assertTrue(os.path.exists('5017/DocOptions/_LinkDoc'))
-        self.assertTrue(os.path.exists('5017/FileHeader'))
-        self.assertTrue(os.path.exists('5017/PrvImage'))
-        self.assertTrue(os.path.exists('5017/PrvText'))
-        self.assertTrue(os.path.exists('5017/Scripts/DefaultJScript'))
-        self.assertTrue(os.path.exists('5017/Scripts/JScriptVersion'))
+        outpath = self.get_temp_path('5017')
+        os.mkdir(outpath)
+        unpack(self.olestg, outpath)
+
+        for name in ['_05HwpSummaryInformation', 'BinData/BIN0002.jpg',
+                     'BinData/BIN0002.png', 'BinData/BIN0003.png',
+                     'BodyText/Section0', 'DocInfo', 'DocOptions/_LinkDoc',
+                     'FileHeader', 'PrvImage', 'PrvText',
+                     'Scripts/DefaultJScript', 'Scripts/JScriptVersion']:
+            self.assertTrue(os.path.exists(os.path.join(outpath, name)),
+                            name)
+
+    def test_concurrent_open(self):
+        if self.OleStorage is None:
+            logger.warning('%s: skipped', self.id())
+            return
+        from threading import Thread
+
+        olestg = self.olestg
+        paths = list(iter_storage_leafs(olestg))
+
+        def read(path):
+            item = olestg
+            for name in path.split('/'):
+                item = item[name]
+            f = item.open()
+            try:
+                return f.read()
+            finally:
+                f.close()
+
+        expected = dict((path, read(path)) for path in paths)
+        results = []
+
+        def worker():
+            for path in paths * 10:
+                results.append((path, read(path)))
+
+        threads = list(Thread(target=worker) for _ in range(4))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(paths) * 40, len(results))
+        for path, data in results:
+            self.assertEqual(expected[path], data)
@@ -9,11 +9,13 @@ import shutil
 from hwp5.errors import ValidationFailed
 from hwp5.utils import mkstemp_open
 
+from .mixin_tempdir import TempDirTestMixin
+
 
 logger = logging.getLogger(__name__)
 
 
-class RelaxNGTestMixin(object):
+class RelaxNGTestMixin(TempDirTestMixin):
 
     rng = '''<?xml version="1.0" encoding="UTF-8"?>
 <grammar
@@ -42,17 +44,17 @@ class RelaxNGTestMixin(object):
             return
 
         rng = self.rng
-        rng_path = self.id() + '.rng'
+        rng_path = self.get_temp_path(self.id() + '.rng')
         with io.open(rng_path, 'w', encoding='utf-8') as f:
             f.write(rng)
 
         inp = '<?xml version="1.0" encoding="utf-8"?><doc />'
-        inp_path = self.id() + '.inp'
+        inp_path = self.get_temp_path(self.id() + '.inp')
         with io.open(inp_path, 'w', encoding='utf-8') as f:
             f.write(inp)
 
         bad = '<?xml version="1.0" encoding="utf-8"?><bad />'
-        bad_path = self.id() + '.bad'
+        bad_path = self.get_temp_path(self.id() + '.bad')
         with io.open(bad_path, 'w', encoding='utf-8') as f:
             f.write(bad)
 
@@ -81,17 +83,17 @@ class RelaxNGTestMixin(object):
             return
 
         rng = self.rng
-        rng_path = self.id() + '.rng'
+        rng_path = self.get_temp_path(self.id() + '.rng')
         with io.open(rng_path, 'w', encoding='utf-8') as f:
             f.write(rng)
 
         inp = '<?xml version="1.0" encoding="utf-8"?><doc />'
-        inp_path = self.id() + '.inp'
+        inp_path = self.get_temp_path(self.id() + '.inp')
         with io.open(inp_path, 'w', encoding='utf-8') as f:
             f.write(inp)
 
         bad = '<?xml version="1.0" encoding="utf-8"?><bad />'
-        bad_path = self.id() + '.bad'
+        bad_path = self.get_temp_path(self.id() + '.bad')
         with io.open(bad_path, 'w', encoding='utf-8') as f:
             f.write(bad)
 
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from tempfile import mkdtemp
+import os.path
+import shutil
+
+
+class TempDirTestMixin(object):
+    ''' outputs of a test in a temporary directory, removed after it '''
+
+    temp_dir = None
+
+    def get_temp_path(self, name):
+        ''' path of `name` in the temporary directory of this test '''
+        if self.temp_dir is None:
+            self.temp_dir = mkdtemp()
+            self.addCleanup(shutil.rmtree, self.temp_dir)
+        return os.path.join(self.temp_dir, name)
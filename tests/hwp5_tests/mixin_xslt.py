@@ -6,11 +6,13 @@ from xml.etree import ElementTree as etree
 import io
 import logging
 
+from .mixin_tempdir import TempDirTestMixin
+
 
 logger = logging.getLogger(__name__)
 
 
-class XsltTestMixin(object):
+class XsltTestMixin(TempDirTestMixin):
 
     xsl = '''<?xml version="1.0" encoding="UTF-8"?>
 <xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
@@ -28,16 +30,16 @@ class XsltTestMixin(object):
             return
 
         xsl = self.xsl
-        xsl_path = self.id() + '.xsl'
+        xsl_path = self.get_temp_path(self.id() + '.xsl')
         with io.open(xsl_path, 'w', encoding='utf-8') as f:
             f.write(xsl)
 
         inp = '<?xml version="1.0" encoding="utf-8"?><inp />'
-        inp_path = self.id() + '.inp'
+        inp_path = self.get_temp_path(self.id() + '.inp')
         with io.open(inp_path, 'w', encoding='utf-8') as f:
             f.write(inp)
 
-        out_path = self.id() + '.out'
+        out_path = self.get_temp_path(self.id() + '.out')
 
         transform = self.xslt_compile(xsl_path)
         self.assertTrue(callable(transform))
@@ -54,16 +56,16 @@ class XsltTestMixin(object):
             return
 
         xsl = self.xsl
-        xsl_path = self.id() + '.xsl'
+        xsl_path = self.get_temp_path(self.id() + '.xsl')
         with io.open(xsl_path, 'w', encoding='utf-8') as f:
             f.write(xsl)
 
         inp = '<?xml version="1.0" encoding="utf-8"?><inp />'
-        inp_path = self.id() + '.inp'
+        inp_path = self.get_temp_path(self.id() + '.inp')
         with io.open(inp_path, 'w', encoding='utf-8') as f:
             f.write(inp)
 
-        out_path = self.id() + '.out'
+        out_path = self.get_temp_path(self.id() + '.out')
 
         result = self.xslt(xsl_path, inp_path, out_path)
         self.assertTrue('errors' not in result)
@@ -37,12 +37,15 @@ from hwp5.binmodel import model_to_json
 from hwp5.binmodel import parse_model
 from hwp5.binmodel import parse_models
 from hwp5.binmodel import parse_models_intern
+from hwp5.binmodel import select_records_for_tagids
 from hwp5.dataio import Enum
 from hwp5.dataio import Flags
+from hwp5.dataio import ParseError
 from hwp5.dataio import UINT32
 from hwp5.dataio import WORD
 from hwp5.recordstream import Record
 from hwp5.recordstream import read_records
+from hwp5.storage import ExtraItemStorage
 from hwp5.tagids import HWPTAG_BEGIN
 from hwp5.treeop import STARTEVENT, ENDEVENT
 from hwp5.treeop import prefix_event
@@ -68,6 +71,17 @@ def TestContext(**ctx):
 testcontext = TestContext()
 
 
+def typed_value(value):
+    ''' a value with the types of its items, to compare them regardless of
+    the order of the dicts, which differs on python 2 after e.g. pickling
+    '''
+    if isinstance(value, dict):
+        return dict, sorted((k, typed_value(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return type(value), list(typed_value(v) for v in value)
+    return type(value), value
+
+
 class TestRecordParsing(TestCase):
     def test_init_record_parsing_context(self):
         record = dict(tagid=HWPTAG_BEGIN, payload=b'abcd')
@@ -95,6 +109,74 @@ class BinEmbeddedTest(TestCase):
         self.assertEqual('jpg', model['content']['bindata']['ext'])
 
 
+class CompiledParseModelTest(TestCase):
+    ctx = TestContext(version=(5, 0, 1, 7), compiled=True)
+    stream = BytesIO(b'M\x08\xa0\x01\x06\x00\x00\x04\x02\x00\x02\x00\x00\x00'
+                     b'\x8d\x00\x8d\x00\x8d\x00\x8d\x00\x02\x00\x02\x00\x01'
+                     b'\x00\x00\x00')
+
+    def test_parse_model(self):
+        self.stream.seek(0)
+        record = next(read_records(self.stream))
+        context = init_record_parsing_context(self.ctx, record)
+        model = record
+
+        parse_model(context, model)
+        self.assertEqual(TableBody, model['type'])
+        self.assertEqual([2, 2], model['content']['rowcols'])
+        self.assertEqual([], model['content']['validZones'])
+        self.assertFalse('binevents' in model)
+
+    def test_parse_model_raises_parse_error(self):
+        self.stream.seek(0)
+        record = next(read_records(self.stream))
+        record['payload'] = record['payload'][:20]
+        context = init_record_parsing_context(self.ctx, record)
+
+        try:
+            parse_model(context, record)
+        except ParseError as e:
+            self.assertEqual(20, e.offset)
+            self.assertTrue(e.binevents)
+        else:
+            self.fail('ParseError is expected')
+
+    def test_parse_model_decoder_bug(self):
+        # 데이터 때문이 아닌 decoder의 예외는 감추지 않는다
+        import hwp5.binmodel
+
+        def decode_model(context, model):
+            raise TypeError('decoder bug')
+        self.addCleanup(setattr, hwp5.binmodel, 'decode_model',
+                        hwp5.binmodel.decode_model)
+        hwp5.binmodel.decode_model = decode_model
+
+        self.stream.seek(0)
+        record = next(read_records(self.stream))
+        context = init_record_parsing_context(self.ctx, record)
+        self.assertRaises(TypeError, parse_model, context, record)
+
+
+class LeanParseModelTest(TestCase):
+    ctx = TestContext(version=(5, 0, 1, 7), keep_binevents=False)
+
+    def test_parse_model_raises_parse_error(self):
+        stream = BytesIO(TableBodyTest.stream.getvalue())
+        record = next(read_records(stream))
+        record['payload'] = record['payload'][:20]
+        context = init_record_parsing_context(self.ctx, record)
+
+        try:
+            parse_model(context, record)
+        except ParseError as e:
+            self.assertEqual(20, e.offset)
+            self.assertEqual(record, e.record)
+            self.assertTrue(e.binevents)
+        else:
+            self.fail('ParseError is expected')
+        self.assertFalse('binevents' in record)
+
+
 class LanguageStructTest(TestCase):
     def test_cls_dict_has_attributes(self):
         FontFace = LanguageStruct(b'FontFace', WORD)
@@ -968,6 +1050,40 @@ class TestModelJson(TestBase):
         self.assertEqual(128, len(json_array))
 
 
+class SelectRecordsForTagidsTest(TestCase):
+
+    def test_select_records_for_tagids(self):
+        from hwp5.tagids import HWPTAG_CTRL_HEADER
+        from hwp5.tagids import HWPTAG_LIST_HEADER
+        from hwp5.tagids import HWPTAG_PARA_HEADER
+        from hwp5.tagids import HWPTAG_PARA_TEXT
+        from hwp5.tagids import HWPTAG_TABLE
+        records = [
+            Record(HWPTAG_PARA_HEADER, 0, b'', seqno=0),
+            Record(HWPTAG_PARA_TEXT, 1, b'', seqno=1),
+            Record(HWPTAG_CTRL_HEADER, 1, b'', seqno=2),
+            Record(HWPTAG_TABLE, 2, b'', seqno=3),
+            Record(HWPTAG_LIST_HEADER, 2, b'', seqno=4),
+            Record(HWPTAG_PARA_HEADER, 3, b'', seqno=5),
+            Record(HWPTAG_PARA_TEXT, 4, b'', seqno=6),
+            Record(HWPTAG_LIST_HEADER, 2, b'', seqno=7),
+            Record(HWPTAG_PARA_HEADER, 3, b'', seqno=8),
+        ]
+        # 조상들과 그 앞선 형제들까지 (그 자손들은 제외)
+        selected = select_records_for_tagids(records,
+                                             set([HWPTAG_LIST_HEADER]))
+        self.assertEqual([0, 1, 2, 3, 4, 7],
+                         list(record['seqno'] for record in selected))
+
+        selected = select_records_for_tagids(records,
+                                             set([HWPTAG_TABLE]))
+        self.assertEqual([0, 1, 2, 3],
+                         list(record['seqno'] for record in selected))
+
+        selected = select_records_for_tagids(records, set())
+        self.assertEqual([], selected)
+
+
 class TestModelStream(TestBase):
     @cached_property
     def docinfo(self):
@@ -977,6 +1093,17 @@ class TestModelStream(TestBase):
     def test_models(self):
         self.assertEqual(67, len(list(self.docinfo.models())))
 
+    def test_vstreams_opened_twice(self):
+        stg = ExtraItemStorage(self.hwp5file)
+        for name in ['DocInfo.models', 'DocInfo.records']:
+            first = stg[name].open().read()
+            self.assertTrue(len(first) > 2, name)
+            self.assertEqual(first, stg[name].open().read(), name)
+        bodytext = stg['BodyText']
+        first = bodytext['Section0.models'].open().read()
+        self.assertTrue(len(first) > 2)
+        self.assertEqual(first, bodytext['Section0.models'].open().read())
+
     def test_models_treegrouped(self):
         section = self.bodytext.section(0)
         for idx, paragraph_models in enumerate(section.models_treegrouped()):
@@ -988,6 +1115,62 @@ class TestModelStream(TestBase):
             self.assertEqual(0, leader['level'])
             # print idx, leader['record']['seqno'], len(paragraph_models)
 
+    def test_models_compiled(self):
+        streams = [self.docinfo] + self.bodytext.sections
+        for stream in streams:
+            models = list(stream.models())
+            compiled = list(stream.models(compiled=True))
+            self.assertEqual(len(models), len(compiled))
+            for model, other in zip(models, compiled):
+                self.assertEqual(model['type'], other['type'])
+                self.assertEqual(model['content'], other['content'])
+                self.assertEqual(typed_value(model['content']),
+                                 typed_value(other['content']))
+                self.assertEqual(model.get('unparsed'), other.get('unparsed'))
+
+    def test_models_without_binevents(self):
+        models = list(self.docinfo.models())
+        lean = list(self.docinfo.models(keep_binevents=False))
+        self.assertEqual(len(models), len(lean))
+        for model, other in zip(models, lean):
+            self.assertTrue('binevents' in model)
+            self.assertFalse('binevents' in other)
+            self.assertEqual(model['content'], other['content'])
+
+    def test_models_workers(self):
+        section = self.bodytext.section(0)
+        models = list(section.models(keep_binevents=False))
+        parallel = list(section.models(keep_binevents=False, workers=2))
+        self.assertEqual(len(models), len(parallel))
+        for model, other in zip(models, parallel):
+            self.assertEqual(model['seqno'], other['seqno'])
+            self.assertEqual(model['type'], other['type'])
+            self.assertEqual(model['content'], other['content'])
+            self.assertEqual(typed_value(model['content']),
+                             typed_value(other['content']))
+
+    def test_models_tagids(self):
+        from hwp5.tagids import HWPTAG_LIST_HEADER
+        from hwp5.tagids import HWPTAG_PARA_TEXT
+        tagids = set([HWPTAG_LIST_HEADER, HWPTAG_PARA_TEXT])
+        section = self.bodytext.section(0)
+        models = list(model for model in section.models()
+                      if model['tagid'] in tagids)
+        selected = list(section.models(tagids=tagids))
+        self.assertTrue(len(selected) > 0)
+        self.assertEqual(len(models), len(selected))
+        for model, other in zip(models, selected):
+            self.assertEqual(model['seqno'], other['seqno'])
+            self.assertEqual(model['type'], other['type'])
+            self.assertEqual(model['content'], other['content'])
+
+        self.assertEqual(
+            list(model['seqno'] for model in models
+                 if model['tagid'] == HWPTAG_PARA_TEXT),
+            list(record['seqno'] for record in
+                 section.records(tagids=set([HWPTAG_PARA_TEXT])))
+        )
+
     def test_model(self):
         model = self.docinfo.model(0)
         self.assertEqual(0, model['seqno'])
@@ -4,18 +4,26 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from io import BytesIO
 from unittest import TestCase
+import struct
 
 from six import add_metaclass
 
 from hwp5.binmodel import ParaTextChunks
 from hwp5.bintype import bintype_map_events
 from hwp5.bintype import construct_composite_values
+from hwp5.bintype import decode_type
 from hwp5.bintype import filter_with_version
+from hwp5.bintype import get_compiled_decoder
 from hwp5.bintype import static_to_mutable
+from hwp5.bintype import read_type
 from hwp5.bintype import read_type_events
 from hwp5.bintype import resolve_typedefs
 from hwp5.bintype import resolve_values_from_stream
+from hwp5.dataio import ARRAY
 from hwp5.dataio import BSTR
+from hwp5.dataio import Eof
+from hwp5.dataio import Flags
+from hwp5.dataio import N_ARRAY
 from hwp5.dataio import SelectiveType
 from hwp5.dataio import StructType
 from hwp5.dataio import UINT16
@@ -672,3 +680,182 @@ class TestReadEvents(TestCase):
         self.assertEqual((None, c), next(events))
         self.assertEqual((ENDEVENT, x), next(events))
         self.assertEqual(b'', stream.read())
+
+
+class TestDecodeType(TestCase):
+
+    def test_struct_with_condition(self):
+
+        def if_a_is_1(context, values):
+            return values['a'] == 1
+
+        @add_metaclass(StructType)
+        class StructWithCondition(object):
+
+            @staticmethod
+            def attributes():
+                yield UINT16, 'a'
+                yield dict(name='b', type=UINT16, condition=if_a_is_1)
+                yield UINT16, 'c'
+
+        context = dict()
+
+        stream = BytesIO(b'\x00\x00\x02\x00')
+        self.assertEqual(dict(a=0, c=2),
+                         decode_type(StructWithCondition, context, stream))
+        self.assertEqual(4, stream.tell())
+
+        stream = BytesIO(b'\x01\x00\x0f\x00\x02\x00\xff')
+        self.assertEqual(dict(a=1, b=0xf, c=2),
+                         decode_type(StructWithCondition, context, stream))
+        self.assertEqual(6, stream.tell())
+
+    def test_struct_with_arrays_and_selective_type(self):
+
+        @add_metaclass(StructType)
+        class Item(object):
+
+            @staticmethod
+            def attributes():
+                yield UINT16, 'x'
+                yield BSTR, 'name'
+
+        @add_metaclass(StructType)
+        class Compound(object):
+
+            @staticmethod
+            def attributes():
+                yield UINT16, 'n'
+                yield dict(name='items', type=X_ARRAY(Item, ref_member('n')))
+                yield dict(name='pair', type=ARRAY(UINT16, 2))
+                yield dict(name='words', type=N_ARRAY(UINT16, UINT16))
+                yield dict(name='s',
+                           type=SelectiveType(ref_member('n'),
+                                              {1: UINT16,
+                                               2: Item}))
+                yield ParaTextChunks, 'texts'
+
+        payload = (b'\x02\x00' +
+                   b'\x01\x00' + b'\x01\x00A\x00' +
+                   b'\x02\x00' + b'\x00\x00' +
+                   b'\x03\x00\x04\x00' +
+                   b'\x01\x00' + b'\x05\x00' +
+                   b'\x06\x00' + b'\x01\x00B\x00' +
+                   b'\x20\x00\x21\x00')
+        context = dict()
+
+        expected = read_type(Compound, context, BytesIO(payload))
+        stream = BytesIO(payload)
+        decoded = decode_type(Compound, context, stream)
+        self.assertEqual(expected, decoded)
+        self.assertEqual(dict(x=6, name='B'), decoded['s'])
+        self.assertEqual((3, 4), decoded['pair'])
+        self.assertEqual([5], decoded['words'])
+        self.assertEqual(len(payload), stream.tell())
+
+    def test_fixed_size_members_coalesced(self):
+
+        @add_metaclass(StructType)
+        class BasicStruct(object):
+
+            @staticmethod
+            def attributes():
+                yield UINT16, 'a'
+                yield UINT16, 'b'
+
+        @add_metaclass(StructType)
+        class Coalesced(object):
+
+            Flags = Flags(UINT16,
+                          0, 'bit0',
+                          1, 7, 'bits1to7')
+
+            @classmethod
+            def attributes(cls):
+                yield UINT16, 'a'
+                yield BasicStruct, 's'
+                yield cls.Flags, 'flags'
+                yield ARRAY(UINT16, 2), 'pair'
+                yield BSTR, 'name'
+                yield UINT16, 'b'
+                yield UINT16, 'c'
+
+        decoder = get_compiled_decoder(Coalesced)
+        self.assertEqual(3, decoder.source.count('unpack_from('))
+
+        payload = (b'\x01\x00' + b'\x02\x00\x03\x00' +
+                   b'\x03\x01' + b'\x06\x00\x07\x00' +
+                   b'\x00\x00' + b'\x08\x00\x09\x00')
+        context = dict()
+        expected = read_type(Coalesced, context, BytesIO(payload))
+        stream = BytesIO(payload)
+        decoded = decode_type(Coalesced, context, stream)
+        self.assertEqual(expected, decoded)
+        self.assertEqual(repr(expected), repr(decoded))
+        self.assertEqual(dict(a=2, b=3), decoded['s'])
+        self.assertEqual(1, decoded['flags'].bit0)
+        self.assertEqual(1, decoded['flags'].bits1to7)
+        self.assertEqual((6, 7), decoded['pair'])
+        self.assertEqual(len(payload), stream.tell())
+
+    def test_fixed_size_arrays_vectorized(self):
+
+        @add_metaclass(StructType)
+        class Point(object):
+
+            Flags = Flags(UINT16,
+                          0, 'bit0')
+
+            @classmethod
+            def attributes(cls):
+                yield UINT16, 'x'
+                yield UINT16, 'y'
+                yield cls.Flags, 'flags'
+
+        @add_metaclass(StructType)
+        class Arrays(object):
+
+            @staticmethod
+            def attributes():
+                yield UINT16, 'n'
+                yield dict(name='points', type=X_ARRAY(Point, ref_member('n')))
+                yield dict(name='pairs', type=X_ARRAY(ARRAY(UINT16, 2),
+                                                      ref_member('n')))
+                yield dict(name='words', type=N_ARRAY(UINT16, UINT16))
+
+        decoder = get_compiled_decoder(Arrays)
+        self.assertFalse('for _ in range' in decoder.source)
+
+        payload = (b'\x02\x00' +
+                   b'\x01\x00\x02\x00\x01\x00' +
+                   b'\x03\x00\x04\x00\x00\x00' +
+                   b'\x05\x00\x06\x00\x07\x00\x08\x00' +
+                   b'\x03\x00\x09\x00\x0a\x00\x0b\x00')
+        context = dict()
+        expected = read_type(Arrays, context, BytesIO(payload))
+        stream = BytesIO(payload)
+        decoded = decode_type(Arrays, context, stream)
+        self.assertEqual(expected, decoded)
+        self.assertEqual(repr(expected), repr(decoded))
+        self.assertEqual(dict(x=3, y=4, flags=0), decoded['points'][1])
+        self.assertEqual(1, decoded['points'][0]['flags'].bit0)
+        self.assertEqual([(5, 6), (7, 8)], decoded['pairs'])
+        self.assertEqual([9, 10, 11], decoded['words'])
+        self.assertEqual(len(payload), stream.tell())
+
+        self.assertRaises(Eof, decoder, context, payload[:12], 0, None)
+        self.assertRaises(struct.error, decoder, context, payload[:-1], 0,
+                          None)
+
+    def test_underflow(self):
+
+        @add_metaclass(StructType)
+        class StructWithBSTR(object):
+
+            @staticmethod
+            def attributes():
+                yield BSTR, 'name'
+
+        decoder = get_compiled_decoder(StructWithBSTR)
+        self.assertRaises(Eof, decoder, dict(), b'\x02\x00\x00', 0, None)
+        self.assertRaises(struct.error, decoder, dict(), b'\x02', 0, None)
@@ -7,9 +7,11 @@ from unittest import TestCase
 import os
 import zlib
 
+from hwp5.compressed import DecompressingReader
 from hwp5.compressed import ZLibIncrementalDecoder
 from hwp5.compressed import decompress
 from hwp5.compressed import decompress_gen
+from hwp5.compressed import decompress_streaming
 from hwp5.utils import cached_property
 
 
@@ -48,3 +50,44 @@ class TestUncompress(TestCase):
         self.assertEqual(f.read(1024), g.read(1024))
         self.assertEqual(f.read(4096), g.read(4096))
         self.assertEqual(f.read(), g.read())
+
+    def test_decompress_streaming(self):
+        f = decompress_streaming(BytesIO(self.compressed_data[2:]),
+                                 bufsize=1024)
+        self.assertTrue(isinstance(f, DecompressingReader))
+
+        self.assertEqual(0, f.tell())
+        self.assertEqual(self.original_data[:100], f.read(100))
+        self.assertEqual(100, f.tell())
+
+        f.seek(8192)
+        self.assertEqual(8192, f.tell())
+        self.assertEqual(self.original_data[8192:8292], f.read(100))
+
+        f.seek(10)
+        self.assertEqual(self.original_data[10:20], f.read(10))
+
+        f.seek(100, 1)
+        self.assertEqual(self.original_data[120:], f.read())
+        self.assertEqual(b'', f.read(1))
+        self.assertEqual(len(self.original_data), f.tell())
+
+    def test_decompress_uncompressed(self):
+        # #176: 압축되지 않은 스트림은 그대로 반환
+        f = decompress(BytesIO(self.original_data))
+        self.assertEqual(self.original_data, f.read())
+
+        f = decompress_streaming(BytesIO(self.original_data), bufsize=1024)
+        self.assertEqual(self.original_data, f.read())
+
+    def test_decompress_uncompressed_after_head(self):
+        # 처음 부분만 압축된 것처럼 보이는 스트림도 그대로 반환
+        original_data = b''.join(b'%d\n' % i for i in range(50000))
+        data = zlib.compress(original_data)[2:-4][:1024] + original_data
+        self.assertEqual(data, decompress(BytesIO(data)).read())
+
+    def test_decompress_trailing_data(self):
+        compressed_data = zlib.compress(self.original_data)[2:-4]
+        source = BytesIO(compressed_data + b'\0' * 4096)
+        f = decompress_streaming(source, bufsize=1024)
+        self.assertEqual(self.original_data, f.read())
@@ -4,6 +4,7 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from io import BytesIO
 from unittest import TestCase
+import pickle
 import sys
 
 from six import add_metaclass
@@ -324,6 +325,53 @@ class TestFlags(TestCase):
                          flags.dictvalue())
 
 
+class TestPickleValueTypes(TestCase):
+
+    def test_pickle_enum(self):
+        from hwp5.binmodel import BinData
+        StorageType = BinData.StorageType
+        self.assertTrue(StorageType is pickle.loads(pickle.dumps(StorageType,
+                                                                 2)))
+        value = pickle.loads(pickle.dumps(StorageType.EMBEDDING, 2))
+        self.assertTrue(value is StorageType.EMBEDDING)
+
+    def test_pickle_flags(self):
+        from hwp5.binmodel import BinData
+        flags = BinData.Flags(0x0101)
+        value = pickle.loads(pickle.dumps(flags, 2))
+        self.assertTrue(type(value) is BinData.Flags)
+        self.assertEqual(flags, value)
+        self.assertTrue(value.storage is flags.storage)
+
+    def test_pickle_anonymous(self):
+        from hwp5.dataio import value_types
+
+        def make_types():
+            Foo = Enum('a', 'b', c=5)
+            Bar = Flags(UINT16,
+                        0, 'x',
+                        1, 4, Foo, 'y')
+            return Foo, Bar
+
+        Foo, Bar = make_types()
+        Foo2, Bar2 = pickle.loads(pickle.dumps((Foo, Bar), 2))
+        self.assertEqual(Foo.value_type_definition,
+                         Foo2.value_type_definition)
+        self.assertEqual(Bar.value_type_definition,
+                         Bar2.value_type_definition)
+        self.assertEqual(['a', 'b', 'c'], sorted(Foo2.names))
+
+        # 같은 정의로 다시 만들어도 레지스트리는 커지지 않는다
+        size = len(value_types)
+        for i in range(3):
+            pickle.loads(pickle.dumps(make_types(), 2))
+        self.assertEqual(size, len(value_types))
+
+        value = pickle.loads(pickle.dumps(Bar(0x03), 2))
+        self.assertEqual(0x03, value)
+        self.assertEqual(Foo.b, value.y)
+
+
 class TestReadStruct(TestCase):
 
     def test_read_parse_error(self):
@@ -2,13 +2,15 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+from io import BytesIO
 from unittest import TestCase
+import io
 import json
 import os.path
-import shutil
 import zlib
 
 from hwp5 import filestructure as FS
+from hwp5.compressed import DecompressingReader
 from hwp5.errors import InvalidHwp5FileError
 from hwp5.filestructure import Hwp5DistDoc
 from hwp5.filestructure import Hwp5DistDocStream
@@ -24,6 +26,7 @@ from hwp5.storage import is_storage
 from hwp5.storage import is_stream
 from hwp5.storage import unpack
 from hwp5.storage.fs import FileSystemStorage
+from hwp5.storage.fs import StreamCache
 from hwp5.tagids import HWPTAG_DISTRIBUTE_DOC_DATA
 from hwp5.tagids import HWPTAG_DOCUMENT_PROPERTIES
 from hwp5.tagids import HWPTAG_PARA_HEADER
@@ -164,6 +167,15 @@ class TestHwp5DistDoc(TestBase):
                                    Hwp5DistDocStorage))
 
 
+class BytesItem(object):
+
+    def __init__(self, data):
+        self.data = data
+
+    def open(self):
+        return BytesIO(self.data)
+
+
 class TestCompressedStorage(TestBase):
     def test_getitem(self):
         stg = FS.CompressedStorage(self.olestg['BinData'])
@@ -180,6 +192,29 @@ class TestCompressedStorage(TestBase):
         finally:
             f.close()
 
+    def test_getitem_streaming(self):
+        stg = FS.CompressedStorage(self.olestg['BinData'], streaming=True)
+        f = stg['BIN0002.jpg'].open()
+        try:
+            self.assertTrue(isinstance(f, BytesIO))
+            self.assertEqual(15895, len(f.read()))
+        finally:
+            f.close()
+
+        # 큰 스트림은 필요한 만큼씩 푼다
+        data = os.urandom(100000)
+        compressed = zlib.compress(data)[2:-4]
+        item = FS.CompressedStream(BytesItem(compressed), streaming=True)
+        f = item.open()
+        try:
+            self.assertTrue(isinstance(f, DecompressingReader))
+            self.assertEqual(data, f.read())
+        finally:
+            f.close()
+
+        item = FS.CompressedStream(BytesItem(compressed))
+        self.assertTrue(isinstance(item.open(), BytesIO))
+
 
 class TestHwp5Compression(TestBase):
 
@@ -214,6 +249,65 @@ class TestHwp5Compression(TestBase):
         JScriptVersion = self.scripts['JScriptVersion'].open().read()
         self.assertEqual(8, len(JScriptVersion))
 
+    def test_bindata_streaming(self):
+        bindata = self.hwp5file_compressed['BinData']
+        self.assertTrue(bindata['BIN0002.jpg'].streaming)
+        self.assertFalse(self.bodytext['Section0'].streaming)
+        self.assertFalse(self.hwp5file_compressed['DocInfo'].streaming)
+
+    def test_stream_cache(self):
+        outpath = self.get_temp_path('test_stream_cache')
+        cache = StreamCache(outpath)
+        compressed = FS.Hwp5Compression(self.hwp5file_base, cache)
+        docinfo = compressed['DocInfo']
+        expected = self.docinfo.read()
+
+        f = docinfo.open()
+        try:
+            self.assertEqual(expected, f.read())
+        finally:
+            f.close()
+        self.assertEqual([docinfo.digest], list(cache))
+
+        # 캐시된 스트림은 다시 풀지 않는다.
+        docinfo.open_decompressed = None
+        f = docinfo.open()
+        try:
+            self.assertEqual(expected, f.getvalue())
+            self.assertEqual(expected, f.read())
+        finally:
+            f.close()
+
+        section = compressed['BodyText']['Section0']
+        section.open().close()
+        self.assertEqual(sorted([docinfo.digest, section.digest]),
+                         sorted(cache))
+
+        # 스트리밍하는 스트림은 파일로 연다
+        bindata = compressed['BinData']['BIN0002.jpg']
+        bindata.open().close()
+        f = bindata.open()
+        try:
+            self.assertFalse(hasattr(f, 'getvalue'))
+            self.assertEqual(15895, len(f.read()))
+        finally:
+            f.close()
+
+    def test_stream_cache_evicts_lru(self):
+        outpath = self.get_temp_path('test_stream_cache_lru')
+        cache = StreamCache(outpath, max_size=10)
+        for key, mtime in [('a', 1), ('b', 3), ('c', 2)]:
+            cache.open(key, lambda: BytesIO(b'12345')).close()
+            os.utime(os.path.join(outpath, key), (mtime, mtime))
+        cache.evict()
+        self.assertEqual(['b', 'c'], list(cache))
+
+        # 사용된 스트림은 가장 최근의 것이 된다.
+        cache.open('c', None).close()
+        cache.open('d', lambda: BytesIO(b'12345')).close()
+        self.assertEqual(['c', 'd'], list(cache))
+        self.assertEqual(10, cache.size())
+
 
 class TestHwp5File(TestBase):
 
@@ -225,10 +319,59 @@ class TestHwp5File(TestBase):
         hwp5file = Hwp5File(self.olestg)
         self.assertTrue(hwp5file['FileHeader'] is not None)
 
+    def test_init_should_accept_fileobj(self):
+        with self.open_fixture(self.hwp5file_name, 'rb') as f:
+            hwp5file = Hwp5File(f)
+            self.assertEqual((5, 0, 1, 7), hwp5file['FileHeader'].version)
+
+    def test_from_bytes(self):
+        with self.open_fixture(self.hwp5file_name, 'rb') as f:
+            data = f.read()
+        expected = Hwp5File(self.hwp5file_path)
+        expected = expected.bodytext.section(0).open().read()
+        for buf in (data, bytearray(data), memoryview(data), BytesIO(data)):
+            hwp5file = Hwp5File.from_bytes(buf)
+            self.assertEqual((5, 0, 1, 7), hwp5file['FileHeader'].version)
+            section = hwp5file.bodytext.section(0)
+            self.assertEqual(expected, section.open().read())
+
+        self.assertRaises(InvalidHwp5FileError, Hwp5File.from_bytes,
+                          b'not an hwp5 file' * 100)
+
+    def test_concurrent_streams(self):
+        from threading import Thread
+        hwp5file = Hwp5File(self.hwp5file_path)
+        streams = [hwp5file.bodytext.section(0), hwp5file.docinfo]
+        bindata = hwp5file['BinData']
+        streams.extend(bindata[name] for name in bindata)
+
+        def read(stream):
+            f = stream.open()
+            try:
+                return f.read()
+            finally:
+                f.close()
+
+        expected = list(read(stream) for stream in streams)
+        results = []
+
+        def worker(stream):
+            for _ in range(20):
+                results.append((stream, read(stream)))
+
+        threads = list(Thread(target=worker, args=(stream,))
+                       for stream in streams * 2)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(streams) * 40, len(results))
+        for stream, data in results:
+            self.assertEqual(expected[streams.index(stream)], data)
+
     def test_init_should_accept_fs(self):
-        outpath = 'test_init_should_accept_fs'
-        if os.path.exists(outpath):
-            shutil.rmtree(outpath)
+        outpath = self.get_temp_path('test_init_should_accept_fs')
         os.mkdir(outpath)
         unpack(self.olestg, outpath)
         fs = FileSystemStorage(outpath)
@@ -260,30 +403,58 @@ class TestHwp5File(TestBase):
         pass
 
     def test_unpack(self):
-        outpath = 'test_unpack'
-        if os.path.exists(outpath):
-            shutil.rmtree(outpath)
+        outpath = self.get_temp_path('test_unpack')
         os.mkdir(outpath)
         unpack(ExtraItemStorage(self.hwp5file), outpath)
 
-        self.assertTrue(os.path.exists('test_unpack/_05HwpSummaryInformation'))
-        self.assertTrue(os.path.exists('test_unpack/BinData/BIN0002.jpg'))
-        self.assertTrue(os.path.exists('test_unpack/BinData/BIN0002.png'))
-        self.assertTrue(os.path.exists('test_unpack/BinData/BIN0003.png'))
-        self.assertTrue(os.path.exists('test_unpack/BodyText/Section0'))
-        self.assertTrue(os.path.exists('test_unpack/DocInfo'))
-        self.assertTrue(os.path.exists('test_unpack/DocOptions/_LinkDoc'))
-        self.assertTrue(os.path.exists('test_unpack/FileHeader'))
-        self.assertTrue(os.path.exists('test_unpack/PrvImage'))
-        self.assertTrue(os.path.exists('test_unpack/PrvText'))
-        self.assertTrue(os.path.exists('test_unpack/PrvText.utf8'))
-        self.assertTrue(os.path.exists('test_unpack/Scripts/DefaultJScript'))
-        self.assertTrue(os.path.exists('test_unpack/Scripts/JScriptVersion'))
+        for name in ['_05HwpSummaryInformation', 'BinData/BIN0002.jpg',
+                     'BinData/BIN0002.png', 'BinData/BIN0003.png',
+                     'BodyText/Section0', 'DocInfo', 'DocOptions/_LinkDoc',
+                     'FileHeader', 'PrvImage', 'PrvText', 'PrvText.utf8',
+                     'Scripts/DefaultJScript', 'Scripts/JScriptVersion']:
+            self.assertTrue(os.path.exists(os.path.join(outpath, name)),
+                            name)
+
+    def test_unpack_jobs_skip_identical(self):
+        outpath = self.get_temp_path('test_unpack_jobs')
+        os.mkdir(outpath)
+        stg = ExtraItemStorage(self.hwp5file)
+        written = unpack(stg, outpath, jobs=4)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(outpath)),
+                         written)
+        section_path = os.path.join(outpath, 'BodyText', 'Section0')
+        with io.open(section_path, 'rb') as f:
+            section = f.read()
+        self.assertEqual(self.bodytext.section(0).open().read(), section)
+
+        self.assertEqual(0, unpack(stg, outpath, jobs=4,
+                                   skip_identical=True))
+
+        with io.open(section_path, 'wb') as f:
+            f.write(b'modified')
+        self.assertEqual(1, unpack(stg, outpath, skip_identical=True))
+        with io.open(section_path, 'rb') as f:
+            self.assertEqual(section, f.read())
+
+        # 크기가 같아도 내용이 다르면 다시 쓴다
+        with io.open(section_path, 'wb') as f:
+            f.write(b'x' * len(section))
+        self.assertEqual(1, unpack(stg, outpath, skip_identical=True))
+        with io.open(section_path, 'rb') as f:
+            self.assertEqual(section, f.read())
+        self.assertEqual(['Section0'],
+                         os.listdir(os.path.join(outpath, 'BodyText')))
 
     def test_if_hwp5file_contains_other_formats(self):
         stg = ExtraItemStorage(self.hwp5file)
         self.assertTrue('PrvText.utf8' in list(stg))
 
+    def test_other_formats_opened_twice(self):
+        stg = ExtraItemStorage(self.hwp5file)
+        first = stg['PrvText.utf8'].open().read()
+        self.assertTrue(first)
+        self.assertEqual(first, stg['PrvText.utf8'].open().read())
+
     def test_resolve_conversion_for_bodytext(self):
         self.assertTrue(self.hwp5file.resolve_conversion_for('BodyText'))
 
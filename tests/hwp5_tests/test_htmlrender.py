@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from unittest import TestCase
+
+from hwp5.htmlrender import hwpunit_to_mm
+from hwp5.htmlrender import hwpunit_to_pt
+from hwp5.htmlrender import nth
+from hwp5.htmlrender import xhtml_element
+from hwp5.htmlrender import xpath_number
+from hwp5.htmlrender import xpath_string
+
+
+class XPathTest(TestCase):
+
+    def test_xpath_number(self):
+        self.assertEqual(1.5, xpath_number('1.5'))
+        self.assertEqual(-3, xpath_number(' -3 '))
+        self.assertTrue(xpath_number(None) != xpath_number(None))
+        self.assertEqual(1000, xpath_number('1e3'))
+        self.assertTrue(xpath_number('+1') != xpath_number('+1'))
+        self.assertTrue(xpath_number('abc') != xpath_number('abc'))
+
+    def test_xpath_string(self):
+        self.assertEqual('0', xpath_string(-0.0))
+        self.assertEqual('12', xpath_string(12.0))
+        self.assertEqual('-0.5', xpath_string(-0.5))
+        self.assertEqual('0.1', xpath_string(0.1))
+        self.assertEqual('0.3', xpath_string(0.1 + 0.2))
+        self.assertEqual('1234567.89', xpath_string(1234567.89))
+        self.assertEqual('1e-06', xpath_string(0.000001))
+        self.assertEqual('2.50000000005e+10',
+                         xpath_string(25000000000.5))
+        self.assertEqual('NaN', xpath_string(float('nan')))
+        self.assertEqual('Infinity', xpath_string(float('inf')))
+        self.assertEqual('-Infinity', xpath_string(float('-inf')))
+
+    def test_hwpunit(self):
+        self.assertEqual('210mm', hwpunit_to_mm(59528))
+        self.assertEqual('NaNmm', hwpunit_to_mm(float('nan')))
+        self.assertEqual('10pt', hwpunit_to_pt(1000))
+
+    def test_nth(self):
+        self.assertEqual('a', nth(['a', 'b'], 1))
+        self.assertEqual('b', nth(['a', 'b'], 2.0))
+        self.assertEqual(None, nth(['a', 'b'], 0))
+        self.assertEqual(None, nth(['a', 'b'], 3))
+        self.assertEqual(None, nth(['a', 'b'], 1.5))
+        self.assertEqual(None, nth(['a', 'b'], float('nan')))
+
+
+class XHTMLTest(TestCase):
+
+    def test_xhtml_element(self):
+        self.assertEqual('<br />', xhtml_element('br', [], ''))
+        self.assertEqual('<p class="a"></p>',
+                         xhtml_element('p', [('class', 'a')], ''))
+        self.assertEqual('<img style="a: 1;&#10;" />',
+                         xhtml_element('img', [('style', 'a: 1;\n')], ''))
+        self.assertEqual('<span title="&lt;&amp;&quot;">x</span>',
+                         xhtml_element('span', [('title', '<&"')], 'x'))
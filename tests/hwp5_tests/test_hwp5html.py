@@ -5,22 +5,23 @@ from __future__ import unicode_literals
 from contextlib import closing
 import io
 import os.path
-import shutil
 
 from hwp5.hwp5html import HTMLTransform
 from hwp5.plat import get_xslt
+from hwp5.plat import get_xslt_compile
 from hwp5.storage.fs import FileSystemStorage
+from hwp5.xmlmodel import Hwp5File
 
 from . import test_xmlmodel
+from .fixtures import get_fixture_path
 
 
 class TestBase(test_xmlmodel.TestBase):
 
     def make_base_dir(self):
-        base_dir = self.id()
-        if os.path.exists(base_dir):
-            shutil.rmtree(base_dir)
-        os.mkdir(base_dir)
+        base_dir = self.get_temp_path(self.id())
+        if not os.path.exists(base_dir):
+            os.mkdir(base_dir)
         return base_dir
 
 
@@ -32,7 +33,7 @@ class HtmlConvTest(TestBase):
 
     @property
     def xhwp5_path(self):
-        return self.id() + '.xhwp5'
+        return self.get_temp_path(self.id() + '.xhwp5')
 
     @property
     def transform(self):
@@ -60,6 +61,44 @@ class HtmlConvTest(TestBase):
             with io.open(html_path, 'wb+') as f:
                 self.transform.transform_hwp5_to_xhtml(hwp5file, f)
 
+    def test_generate_html_title(self):
+        for name, title in [('charshape.hwp', '<title>가나다</title>'),
+                            ('aligns.hwp', '<title></title>')]:
+            with closing(Hwp5File(get_fixture_path(name))) as hwp5file:
+                f = io.BytesIO()
+                self.transform.transform_hwp5_to_xhtml(hwp5file, f)
+            self.assertTrue(title.encode('utf-8') in f.getvalue(), name)
+
+    def test_generate_html_in_memory(self):
+        if not HTMLTransform().in_memory:
+            return
+        with closing(self.hwp5file) as hwp5file:
+            expected = io.BytesIO()
+            transform = HTMLTransform(in_memory=False)
+            transform.transform_hwp5_to_xhtml(hwp5file, expected)
+            output = io.BytesIO()
+            transform = HTMLTransform(in_memory=True)
+            transform.transform_hwp5_to_xhtml(hwp5file, output)
+        self.assertEqual(expected.getvalue(), output.getvalue())
+
+    def test_generate_dir_in_memory(self):
+        if not HTMLTransform().in_memory:
+            return
+        base_dir = self.make_base_dir()
+        outputs = []
+        for in_memory, jobs in [(False, None), (True, 2)]:
+            outdir = os.path.join(base_dir, '%s-%s' % (in_memory, jobs))
+            os.mkdir(outdir)
+            transform = HTMLTransform(in_memory=in_memory, jobs=jobs)
+            transform.transform_hwp5_to_dir(self.hwp5file, outdir)
+            files = dict()
+            for name in ('index.xhtml', 'styles.css'):
+                with io.open(os.path.join(outdir, name), 'rb') as f:
+                    files[name] = f.read()
+            outputs.append(files)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertTrue(outputs[0]['index.xhtml'])
+
     def test_extract_bindata_dir(self):
         base_dir = self.make_base_dir()
         hwp5file = self.hwp5file
@@ -82,3 +121,64 @@ class HtmlConvTest(TestBase):
 
         self.transform.extract_bindata_dir(hwp5file, bindata_dir)
         self.assertFalse(os.path.exists(bindata_dir))
+
+
+def remove_doctype_newlines(xhtml):
+    ''' remove the newlines after the DOCTYPE and at the end, which some
+    XSLT processors write '''
+    xhtml = xhtml.replace(b'.dtd">\n<html', b'.dtd"><html')
+    return xhtml.rstrip(b'\n')
+
+
+class HtmlEngineTest(TestBase):
+
+    def transform_dir(self, hwp5file_name, **kwargs):
+        base_dir = self.make_base_dir()
+        outdir = os.path.join(base_dir, '%s-%s' % (kwargs.get('engine'),
+                                                   hwp5file_name))
+        os.mkdir(outdir)
+        transform = HTMLTransform(**kwargs)
+        with closing(Hwp5File(get_fixture_path(hwp5file_name))) as hwp5file:
+            transform.transform_hwp5_to_dir(hwp5file, outdir)
+        files = dict()
+        for name in ('index.xhtml', 'styles.css'):
+            with io.open(os.path.join(outdir, name), 'rb') as f:
+                files[name] = f.read()
+        return files
+
+    def test_engine_stream_as_fixtures(self):
+        fixtures_dir = os.path.dirname(get_fixture_path('sample-5017.hwp'))
+        for name in sorted(os.listdir(fixtures_dir)):
+            if not name.endswith('.html.d'):
+                continue
+            name = name[:-len('.html.d')]
+            # 옛한글을 나누는 방법이 fixture를 만들 때와 다르다
+            if name == 'sample-5017':
+                continue
+            files = self.transform_dir(name + '.hwp', engine='stream')
+            for filename in ('index.xhtml', 'styles.css'):
+                path = get_fixture_path(name + '.html.d/' + filename)
+                with io.open(path, 'rb') as f:
+                    expected = f.read()
+                # fixture에는 이 두 줄바꿈이 있다
+                if filename == 'index.xhtml':
+                    expected = remove_doctype_newlines(expected)
+                self.assertEqual(expected, files[filename],
+                                 name + '.html.d/' + filename)
+
+    def test_engine_stream_as_xslt(self):
+        if not get_xslt_compile():
+            return
+
+        for name in ['sample-5017.hwp', 'table-caption.hwp',
+                     'shapepict-scaled.hwp', 'headerfooter.hwp',
+                     'viewtext.hwp']:
+            expected = self.transform_dir(name, engine='xslt')
+            files = self.transform_dir(name, engine='stream')
+            self.assertEqual(expected['styles.css'], files['styles.css'])
+            # lxml은 이 두 줄바꿈을 쓰지 않지만, 다른 XSLT 구현은 쓸 수 있다
+            expected = remove_doctype_newlines(expected['index.xhtml'])
+            self.assertEqual(expected, files['index.xhtml'])
+
+    def test_engine_unknown(self):
+        self.assertRaises(ValueError, HTMLTransform, engine='foo')
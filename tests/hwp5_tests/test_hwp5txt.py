@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from contextlib import closing
+import io
+
+from hwp5.binmodel import Paragraph
+from hwp5.binmodel import Text
+from hwp5.binmodel.controls import TableControl
+from hwp5.hwp5txt import TextTransform
+from hwp5.hwp5txt import bodytext_text_chunks
+from hwp5.plat import get_xslt_compile
+from hwp5.treeop import STARTEVENT, ENDEVENT
+from hwp5.xmlmodel import Hwp5File
+
+from . import test_xmlmodel
+
+
+class TextTransformTest(test_xmlmodel.TestBase):
+
+    def transform_text(self, hwp5file_name=None, **kwargs):
+        transform = TextTransform(**kwargs)
+        output = io.BytesIO()
+        if hwp5file_name is None:
+            hwp5file_name = self.hwp5file_name
+        hwp5file_path = self.get_fixture_file(hwp5file_name)
+        with closing(Hwp5File(hwp5file_path)) as hwp5file:
+            transform.transform_hwp5_to_text(hwp5file, output)
+        return output.getvalue()
+
+    def test_engine_stream(self):
+        text = self.transform_text(engine='stream')
+        text = text.decode('utf-8')
+        self.assertTrue(text.startswith('한글 2005 예제 파일입니다.\n'))
+        self.assertTrue('\n<표>\n' in text)
+
+    def test_engine_stream_as_xslt(self):
+        if not get_xslt_compile():
+            return
+        for hwp5file_name in ['sample-5017.hwp', 'table.hwp',
+                              'footnote-endnote.hwp', 'shapepict-scaled.hwp',
+                              'headerfooter.hwp', 'viewtext.hwp']:
+            self.assertEqual(self.transform_text(hwp5file_name,
+                                                 engine='xslt'),
+                             self.transform_text(hwp5file_name,
+                                                 engine='stream'))
+
+    def test_engine_unknown(self):
+        self.assertRaises(ValueError, TextTransform, engine='foo')
+
+    def test_bodytext_text_chunks(self):
+        context = dict()
+        text = Text, dict(text='a'), context
+        paragraph = Paragraph, dict(), context
+        table = TableControl, dict(), context
+        events = [(STARTEVENT, paragraph),
+                  (STARTEVENT, text), (ENDEVENT, text),
+                  (STARTEVENT, table),
+                  (STARTEVENT, paragraph),
+                  (STARTEVENT, text), (ENDEVENT, text),
+                  (ENDEVENT, paragraph),
+                  (ENDEVENT, table),
+                  (STARTEVENT, text), (ENDEVENT, text),
+                  (ENDEVENT, paragraph)]
+        self.assertEqual(['a', '\n<표>\n', 'a', '\n'],
+                         list(bodytext_text_chunks(events)))
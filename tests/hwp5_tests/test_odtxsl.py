@@ -4,14 +4,18 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from unittest import TestCase
 from contextlib import closing
+from io import BytesIO
 from zipfile import ZipFile
 
 from hwp5 import plat
+from hwp5.errors import ValidationFailed
+from hwp5.hwp5odt import ODTPackage
 from hwp5.hwp5odt import ODTTransform
 from hwp5.hwp5odt import open_odtpkg
 from hwp5.xmlmodel import Hwp5File
 
 from .fixtures import get_fixture_path
+from .mixin_tempdir import TempDirTestMixin
 
 
 def example_path(filename):
@@ -29,11 +33,11 @@ class TestPrecondition(TestCase):
             assert hwp5file is not None
 
 
-class TestODTTransform(TestCase):
+class TestODTTransform(TestCase, TempDirTestMixin):
 
     @property
     def odt_path(self):
-        return self.id() + '.odt'
+        return self.get_temp_path(self.id() + '.odt')
 
     @property
     def transform(self):
@@ -58,3 +62,37 @@ class TestODTTransform(TestCase):
         data2 = zf.read('bindata/BIN0002.jpg')
 
         self.assertEqual(data1, data2)
+
+    def test_package_in_memory(self):
+        transform = self.transform
+        if not transform.in_memory:
+            return
+        xslt = plat.get_xslt_compile()
+        relaxng = plat.get_relaxng_compile()
+
+        packages = []
+        for in_memory, jobs in [(False, None), (True, None), (True, 2)]:
+            transform = ODTTransform(xslt, relaxng, in_memory=in_memory,
+                                     jobs=jobs)
+            output = BytesIO()
+            with open_example('sample-5017.hwp') as hwp5file:
+                odtpkg = ODTPackage(ZipFile(output, 'w'))
+                try:
+                    transform.transform_hwp5_to_package(hwp5file, odtpkg)
+                finally:
+                    odtpkg.close()
+            zf = ZipFile(output)
+            packages.append(dict((name, zf.read(name))
+                                 for name in zf.namelist()))
+        self.assertEqual(packages[0], packages[1])
+        self.assertEqual(packages[0], packages[2])
+
+    def test_document_transform_validates(self):
+        transform = self.transform
+        if not transform.in_memory or not transform.relaxng_compile:
+            return
+        from lxml import etree
+
+        odf_transform = transform.transform_xhwp5_to_content
+        xhwp5 = etree.ElementTree(etree.Element('HwpDoc'))
+        self.assertRaises(ValidationFailed, odf_transform, xhwp5, BytesIO())
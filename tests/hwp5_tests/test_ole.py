@@ -9,9 +9,10 @@ from hwp5.storage.ole import OleStorage
 from .fixtures import get_fixture_path
 from .fixtures import open_fixture
 from .mixin_olestg import OleStorageTestMixin
+from .mixin_tempdir import TempDirTestMixin
 
 
-class TestBase(TestCase):
+class TestBase(TestCase, TempDirTestMixin):
 
     hwp5file_name = 'sample-5017.hwp'
 
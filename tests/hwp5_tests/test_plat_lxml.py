@@ -2,6 +2,7 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+import io
 import unittest
 
 from hwp5.plat import _lxml
@@ -33,3 +34,20 @@ class TestPlatLxml(unittest.TestCase, XsltTestMixin, RelaxNGTestMixin):
             self.xslt_compile = None
             self.relaxng = None
             self.relaxng_compile = None
+
+    def test_xslt_compile_document(self):
+        if self.xslt_compile is None:
+            return
+        from lxml import etree
+
+        xsl_path = self.get_temp_path(self.id() + '.xsl')
+        with io.open(xsl_path, 'w', encoding='utf-8') as f:
+            f.write(self.xsl)
+
+        transform = self.xslt_compile(xsl_path)
+        inp = etree.ElementTree(etree.Element('inp'))
+        self.assertTrue(_lxml.is_document(inp))
+        self.assertFalse(_lxml.is_document(xsl_path))
+        output = io.BytesIO()
+        transform(inp, output)
+        self.assertEqual('out', etree.fromstring(output.getvalue()).tag)
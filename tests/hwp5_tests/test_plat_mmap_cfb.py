@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from unittest import TestCase
+
+from hwp5.plat import mmap_cfb
+from hwp5.plat import olefileio
+from hwp5.storage import iter_storage_leafs
+
+from .mixin_olestg import OleStorageTestMixin
+
+
+class TestOleStorageMmapCfb(TestCase, OleStorageTestMixin):
+
+    def setUp(self):
+        if mmap_cfb.is_enabled():
+            self.OleStorage = mmap_cfb.OleStorage
+
+    def open_stream(self, olestg, path):
+        item = olestg
+        for name in path.split('/'):
+            item = item[name]
+        return item.open()
+
+    def test_same_as_olefileio(self):
+        if self.OleStorage is None or not olefileio.is_enabled():
+            return
+        olestg = self.olestg
+        expected = olefileio.OleStorage(self.hwp5file_path)
+        self.assertEqual(list(iter_storage_leafs(expected)),
+                         list(iter_storage_leafs(olestg)))
+        for path in iter_storage_leafs(expected):
+            self.assertEqual(self.open_stream(expected, path).read(),
+                             self.open_stream(olestg, path).read())
+
+    def test_contiguous_stream_is_not_copied(self):
+        if self.OleStorage is None:
+            return
+        olestg = self.olestg
+        views = []
+        for path in iter_storage_leafs(olestg):
+            f = self.open_stream(olestg, path)
+            value = f.getvalue()
+            if isinstance(value, memoryview):
+                views.append(path)
+                self.assertEqual(value.tobytes(), f.read())
+        self.assertTrue(len(views) > 0)
+
+    def test_stream_read_seek(self):
+        if self.OleStorage is None:
+            return
+        f = self.olestg['BodyText']['Section0'].open()
+        data = f.read()
+        f.seek(10)
+        self.assertEqual(data[10:20], f.read(10))
+        self.assertEqual(20, f.tell())
+        f.seek(-10, 2)
+        self.assertEqual(data[-10:], f.read())
+        self.assertEqual(b'', f.read(10))
+
+    def test_case_insensitive_lookup(self):
+        if self.OleStorage is None:
+            return
+        olestg = self.olestg
+        self.assertEqual(olestg['BodyText']['Section0'].open().read(),
+                         olestg['bodytext']['SECTION0'].open().read())
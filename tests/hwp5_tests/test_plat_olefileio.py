@@ -14,3 +14,16 @@ class TestOleStorageOleFileIO(TestCase, OleStorageTestMixin):
     def setUp(self):
         if olefileio.is_enabled():
             self.OleStorage = olefileio.OleStorage
+
+    def test_olefile_tree(self):
+        if self.OleStorage is None:
+            return
+        olefile = olefileio.import_OleFileIO()(self.hwp5file_path)
+        tree = olefileio.olefile_tree(olefile)
+        self.assertEqual(list(olefileio.olefile_listdir(olefile, '')),
+                         tree.names)
+        bindata = tree.get('BinData')
+        self.assertEqual(list(olefileio.olefile_listdir(olefile, 'BinData')),
+                         bindata.names)
+        self.assertTrue(tree.get('bindata') is bindata)
+        self.assertEqual(None, tree.get('nonexists'))
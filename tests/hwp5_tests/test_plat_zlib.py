@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+import unittest
+import zlib
+
+from hwp5.plat import _isal
+from hwp5.plat import _zlib
+from hwp5.plat import _zlib_ng
+from hwp5.plat import get_zlib_backend
+
+
+class TestPlatZlib(unittest.TestCase):
+
+    backends = [_zlib_ng, _isal, _zlib]
+
+    def test_is_enabled(self):
+        self.assertTrue(_zlib.is_enabled())
+
+        try:
+            from zlib_ng import zlib_ng
+            zlib_ng
+        except ImportError:
+            self.assertFalse(_zlib_ng.is_enabled())
+        else:
+            self.assertTrue(_zlib_ng.is_enabled())
+
+        try:
+            from isal import isal_zlib
+            isal_zlib
+        except ImportError:
+            self.assertFalse(_isal.is_enabled())
+        else:
+            self.assertTrue(_isal.is_enabled())
+
+    def test_get_zlib_backend(self):
+        backend = get_zlib_backend()
+        enabled = [b for b in self.backends if b.is_enabled()]
+        self.assertEqual(enabled[0], backend)
+
+    def test_raw_inflate(self):
+        data = b'hwp5' * 4096
+        compressed = zlib.compress(data)[2:-4]
+        for backend in self.backends:
+            if not backend.is_enabled():
+                continue
+            self.assertTrue(backend.get_version())
+            backend_zlib = backend.get_zlib()
+            self.assertEqual(data, backend_zlib.decompress(compressed, -15))
+
+            dec = backend_zlib.decompressobj(-15)
+            inflated = dec.decompress(compressed, 1024)
+            self.assertEqual(data[:1024], inflated)
+            while dec.unconsumed_tail:
+                inflated += dec.decompress(dec.unconsumed_tail, 1024)
+            inflated += dec.flush()
+            self.assertEqual(data, inflated)
+            self.assertRaises(backend_zlib.error,
+                              backend_zlib.decompress, b'\xff' * 16, -15)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+import sys
+
+from six import StringIO
+
+from hwp5 import __version__
+from hwp5.hwp5proc import main_argparser
+from hwp5.plat import get_zlib_backend
+
+from .test_ole import TestBase
+
+
+class TestVersion(TestBase):
+
+    def run_version(self, *args):
+        args = main_argparser().parse_args(['version'] + list(args))
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            args.func(args)
+            return sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+    def test_version_of_file(self):
+        self.assertEqual('5.0.1.7\n', self.run_version(self.hwp5file_path))
+
+    def test_version_without_file(self):
+        backend = get_zlib_backend()
+        expected = ('hwp5proc (pyhwp) {}\n'
+                    'zlib: {} {}\n').format(__version__, backend.name,
+                                            backend.get_version())
+        self.assertEqual(expected, self.run_version())
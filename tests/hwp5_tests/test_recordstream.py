@@ -2,13 +2,24 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
+from io import BufferedReader
 from io import BytesIO
 import json
+import os
+import os.path
+import struct
+import zlib
 
 from hwp5 import recordstream as RS
+from hwp5.dataio import Eof
+from hwp5.filestructure import CompressedStream
+from hwp5.recordstream import Record
+from hwp5.recordstream import RecordIndex
 from hwp5.recordstream import RecordStream
 from hwp5.recordstream import dump_record
 from hwp5.recordstream import read_record
+from hwp5.recordstream import read_records
+from hwp5.recordstream import read_records_from_buffer
 from hwp5.recordstream import record_to_json
 from hwp5.storage import ExtraItemStorage
 from hwp5.tagids import HWPTAG_DOCUMENT_PROPERTIES
@@ -17,6 +28,7 @@ from hwp5.tagids import HWPTAG_PARA_HEADER
 from hwp5.utils import cached_property
 
 from . import test_filestructure
+from .test_filestructure import BytesItem
 
 
 class TestBase(test_filestructure.TestBase):
@@ -45,6 +57,57 @@ class TestRecord(TestBase):
         record2 = read_record(stream, 0)
         self.assertEqual(record2, record)
 
+    def test_record_mapping(self):
+        record = Record(HWPTAG_PARA_HEADER, 1, b'abc', seqno=3)
+        self.assertEqual(dict(tagid=HWPTAG_PARA_HEADER,
+                              tagname='HWPTAG_PARA_HEADER',
+                              level=1,
+                              size=3,
+                              payload=b'abc',
+                              seqno=3), record)
+        self.assertEqual(6, len(record))
+        self.assertEqual('HWPTAG_PARA_HEADER', record['tagname'])
+
+        record = Record(HWPTAG_PARA_HEADER, 0, b'')
+        self.assertFalse('seqno' in record)
+        self.assertEqual(None, record.get('seqno'))
+        self.assertRaises(KeyError, record.__getitem__, 'seqno')
+        self.assertEqual(5, len(record))
+
+    def test_record_extra_keys(self):
+        record = Record(HWPTAG_PARA_HEADER, 0, b'', seqno=0)
+        self.assertEqual(None, record.extra)
+        record['type'] = 'ParaHeader'
+        record['level'] = 2
+        self.assertEqual('ParaHeader', record['type'])
+        self.assertEqual(2, record.level)
+        self.assertEqual(set(['tagid', 'tagname', 'level', 'size', 'payload',
+                              'seqno', 'type']), set(record))
+        del record['type']
+        self.assertFalse('type' in record)
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_read_records_from_buffer(self):
+        data = self.hwp5file['DocInfo'].open().read()
+        records = list(read_records_from_buffer(data))
+        self.assertEqual(list(read_records(BytesIO(data))), records)
+        self.assertTrue(isinstance(records[0]['payload'], memoryview))
+
+    def test_read_records_from_buffer_extended_size(self):
+        payload = b'x' * 0x1000
+        data = (struct.pack('<II', (0xfff << 20) | HWPTAG_PARA_HEADER,
+                            len(payload)) + payload +
+                struct.pack('<I', (1 << 10) | HWPTAG_PARA_HEADER))
+        records = list(read_records_from_buffer(data))
+        self.assertEqual(2, len(records))
+        self.assertEqual(0x1000, records[0]['size'])
+        self.assertEqual(payload, records[0]['payload'])
+        self.assertEqual(1, records[1]['level'])
+        self.assertEqual(b'', records[1]['payload'])
+        self.assertEqual(1, records[1]['seqno'])
+
+        self.assertRaises(Eof, list, read_records_from_buffer(data[:2]))
+
 
 class TestRecordStream(TestBase):
 
@@ -111,6 +174,130 @@ class TestRecordStream(TestBase):
         self.assertEqual(26, records[0]['seqno'])
         self.assertEqual(37, len(records))
 
+    def test_records_kwargs_range(self):
+        records = list(self.docinfo.records())
+        self.assertEqual(records[3:10],
+                         list(self.docinfo.records(range=(3, 10))))
+
+    def test_record_out_of_range(self):
+        self.assertEqual(None, self.docinfo.record(67))
+        self.assertEqual(None, self.docinfo.records_treegroup(2))
+
+    def test_index(self):
+        index = self.docinfo.index
+        self.assertEqual(67, len(index))
+        self.assertEqual((0, 1), index.treegroup_range(0))
+        self.assertEqual((1, 67), index.treegroup_range(1))
+        self.assertEqual(1, index.treegroup_of(10))
+        offset, tagid, level, size = index[0]
+        self.assertEqual((0, HWPTAG_DOCUMENT_PROPERTIES, 0, 26),
+                         (offset, tagid, level, size))
+
+        section = self.bodytext.section(0)
+        records = section.records_treegroup(5)
+        self.assertEqual((26, 26 + 37), section.index.treegroup_range(5))
+        self.assertEqual(records[3], section.record(29))
+
+    def test_index_treegroup_chunks(self):
+        section = self.bodytext.section(0)
+        index = section.index
+        size = len(section.open().read())
+        chunks = list(index.treegroup_chunks(size, 4))
+        self.assertTrue(1 < len(chunks) <= 5)
+        self.assertEqual((0, 0, 0), chunks[0][0:1] + chunks[0][2:])
+        self.assertEqual(size, chunks[-1][1])
+        for chunk, next_chunk in zip(chunks, chunks[1:]):
+            start, end, seqno, treegroup = next_chunk
+            self.assertEqual(chunk[1], start)
+            self.assertEqual(index.groups[treegroup], seqno)
+            self.assertEqual(index.offsets[seqno], start)
+
+    def test_index_dump_load(self):
+        index = self.bodytext.section(0).index
+        f = BytesIO()
+        index.dump(f)
+        f.seek(0)
+        loaded = RecordIndex.load(f)
+        self.assertEqual(list(index.offsets), list(loaded.offsets))
+        self.assertEqual(list(index.tagids), list(loaded.tagids))
+        self.assertEqual(list(index.levels), list(loaded.levels))
+        self.assertEqual(list(index.sizes), list(loaded.sizes))
+        self.assertEqual(list(index.groups), list(loaded.groups))
+
+    def test_records_large_section(self):
+        # 64KiB보다 큰 섹션도 메모리에서 읽는다
+        records = [Record(HWPTAG_PARA_HEADER, 0, os.urandom(200))
+                   for i in range(1000)]
+        f = BytesIO()
+        for record in records:
+            dump_record(f, record)
+        compressed = zlib.compress(f.getvalue())[2:-4]
+        self.assertTrue(65536 < len(compressed))
+
+        section = RecordStream(CompressedStream(BytesItem(compressed)),
+                               self.hwp5file.header.version)
+        self.assertTrue(hasattr(section.open(), 'getvalue'))
+        loaded = list(section.records())
+        self.assertEqual(1000, len(loaded))
+        self.assertTrue(isinstance(loaded[0]['payload'], memoryview))
+        self.assertEqual(records[999]['payload'], loaded[999]['payload'])
+
+    def test_index_cache_dir(self):
+        cache_dir = self.get_temp_path('cache')
+        hwp5file = RS.Hwp5File(self.olestg, index_cache_dir=cache_dir)
+        self.assertEqual(67, len(hwp5file.docinfo.index))
+        self.assertEqual(1, len(os.listdir(cache_dir)))
+
+        hwp5file = RS.Hwp5File(self.olestg, index_cache_dir=cache_dir)
+        self.assertEqual(67, len(hwp5file.docinfo.index))
+        self.assertEqual(1, len(os.listdir(cache_dir)))
+
+        section = hwp5file.bodytext.section(0)
+        self.assertEqual(cache_dir, section.index_cache_dir)
+        section.index
+        self.assertEqual(2, len(os.listdir(cache_dir)))
+
+    def test_index_kept_across_sections(self):
+        bodytext = self.hwp5file.bodytext
+        index = bodytext.section(0).index
+        self.assertTrue(index is bodytext.section(0).index)
+
+    def test_records_treegroup_from_stream_opened_once(self):
+        # 표준 입력처럼 한 번만 열 수 있고, 닫으면 다시 읽을 수 없는 스트림
+        f = self.hwp5file_fs['BodyText']['Section0'].open()
+        try:
+            data = f.read()
+        finally:
+            f.close()
+
+        class OnceItem(object):
+            opened = []
+
+            def open(self):
+                assert not self.opened
+                self.opened.append(True)
+                return BufferedReader(BytesIO(data))
+
+        section = RecordStream(OnceItem(), self.hwp5file.header.version)
+        records = section.records(treegroup=5)
+        self.assertEqual(26, records[0]['seqno'])
+        self.assertEqual(37, len(records))
+        self.assertEqual(0, section.record(0)['seqno'])
+
+    def test_index_cache_dir_default(self):
+        self.assertEqual(None, self.hwp5file.docinfo.index_cache_dir)
+        self.assertEqual(None,
+                         self.hwp5file.bodytext.section(0).index_cache_dir)
+
+    def test_records_kwargs_range_invalid(self):
+        docinfo = self.docinfo
+        self.assertRaises(ValueError, docinfo.records, range=(-1, None))
+        self.assertRaises(ValueError, docinfo.records, range=(0, -1))
+        self.assertRaises(ValueError, docinfo.records, range=(1.5, 3))
+        self.assertRaises(ValueError, docinfo.record, -1)
+        self.assertEqual(list(docinfo.records())[3:],
+                         list(docinfo.records(range=(3, None))))
+
 
 class TestHwp5File(TestBase):
 
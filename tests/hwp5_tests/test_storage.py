@@ -5,7 +5,9 @@ from __future__ import unicode_literals
 from io import BytesIO
 from unittest import TestCase
 
+from hwp5.storage import ExtraItemStorage
 from hwp5.storage import StorageWrapper
+from hwp5.storage import is_storage
 
 
 class TestStorageWrapper(TestCase):
@@ -24,3 +26,71 @@ class TestStorageWrapper(TestCase):
         stg = StorageWrapper(self.storage)
         self.assertEqual(b'fileheader', stg['FileHeader'].read())
         self.assertEqual(b'bin0001.jpg', stg['BinData']['BIN0001.jpg'].read())
+
+
+class TestExtraItemStorage(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+    def item(self, name, data):
+        calls = self.calls
+
+        class Item(object):
+            def open(self):
+                return BytesIO(data)
+
+            def other_formats(self):
+                calls.append(name)
+                return {'.txt': lambda: BytesIO(data + b'.txt')}
+        return Item()
+
+    @property
+    def storage(self):
+        return dict(DocInfo=self.item('DocInfo', b'docinfo'),
+                    DocInfo2=self.item('DocInfo2', b'docinfo2'),
+                    PrvText=self.item('PrvText', b'prvtext'),
+                    BinData={'BIN0001.jpg': BytesIO(b'bin0001.jpg')})
+
+    def test_iter(self):
+        stg = ExtraItemStorage(self.storage)
+        expected = ['BinData', 'DocInfo', 'DocInfo.txt', 'DocInfo2',
+                    'DocInfo2.txt', 'PrvText', 'PrvText.txt']
+        self.assertEqual(expected, sorted(stg))
+        self.assertEqual(expected, sorted(stg))
+        self.assertEqual(['DocInfo', 'DocInfo2', 'PrvText'],
+                         sorted(self.calls))
+
+    def test_getitem(self):
+        stg = ExtraItemStorage(self.storage)
+        self.assertEqual(b'docinfo', stg['DocInfo'].open().read())
+        self.assertEqual(b'prvtext.txt', stg['PrvText.txt'].open().read())
+        # 색인할 때 한 번, 찾을 때 한 번
+        self.assertEqual(['PrvText', 'PrvText'], self.calls)
+        del self.calls[:]
+        self.assertEqual(b'docinfo2.txt', stg['DocInfo2.txt'].open().read())
+        self.assertEqual(b'docinfo.txt', stg['DocInfo.txt'].open().read())
+        self.assertEqual(['DocInfo', 'DocInfo', 'DocInfo2', 'DocInfo2'],
+                         sorted(self.calls))
+
+        # 이름만 색인하고, 찾을 때마다 other_formats()를 다시 부른다
+        del self.calls[:]
+        stg['DocInfo.txt']
+        self.assertEqual(['DocInfo'], self.calls)
+        self.assertTrue(is_storage(stg['BinData']))
+        self.assertRaises(KeyError, stg.__getitem__, 'DocInfo.xml')
+
+    def test_getitem_opened_twice(self):
+
+        class Item(object):
+            def open(self):
+                return BytesIO(b'docinfo')
+
+            def other_formats(self):
+                # 한 번만 읽을 수 있는 스트림
+                source = iter([b'docinfo.txt'])
+                return {'.txt': lambda: BytesIO(b''.join(source))}
+
+        stg = ExtraItemStorage(dict(DocInfo=Item()))
+        self.assertEqual(b'docinfo.txt', stg['DocInfo.txt'].open().read())
+        self.assertEqual(b'docinfo.txt', stg['DocInfo.txt'].open().read())
@@ -21,6 +21,7 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from unittest import TestCase
 
+from hwp5.utils import map_in_threads
 from hwp5.utils import unicode_escape
 from hwp5.utils import unicode_unescape
 
@@ -40,3 +41,20 @@ class UnicodeEscapeTest(TestCase):
             '\x05HwpSummaryInfo',
             unicode_unescape(s),
         )
+
+
+class MapInThreadsTest(TestCase):
+
+    def test_map_in_threads(self):
+        def square(x):
+            return x * x
+        expected = list(x * x for x in range(100))
+        self.assertEqual(expected, list(map_in_threads(square, range(100))))
+        self.assertEqual(expected, list(map_in_threads(square, range(100),
+                                                       jobs=4)))
+
+    def test_map_in_threads_error(self):
+        def fail(x):
+            raise ValueError(x)
+        results = map_in_threads(fail, range(10), jobs=2)
+        self.assertRaises(ValueError, list, results)
@@ -7,6 +7,9 @@ from unittest import TestCase
 from xml.etree import ElementTree
 import base64
 import io
+import logging
+import shutil
+import zlib
 
 from hwp5 import binmodel
 from hwp5 import xmlmodel
@@ -18,6 +21,11 @@ from hwp5.binmodel import ParaCharShape
 from hwp5.binmodel import ParaLineSeg
 from hwp5.binmodel import ParaText
 from hwp5.binmodel import SectionDef
+from hwp5.binmodel import Text
+from hwp5.dataio import ParseError
+from hwp5.plat import olefileio
+from hwp5.recordstream import dump_record
+from hwp5.recordstream import read_records
 from hwp5.tagids import HWPTAG_PARA_LINE_SEG
 from hwp5.treeop import STARTEVENT, ENDEVENT
 from hwp5.utils import cached_property
@@ -36,6 +44,9 @@ from . import test_binmodel
 from .fixtures import get_fixture_path
 
 
+logger = logging.getLogger(__name__)
+
+
 class TestBase(test_binmodel.TestBase):
 
     @cached_property
@@ -72,6 +83,33 @@ class TestXmlEvents(TestBase):
 
         self.assertTrue(b'&#13;' in xml)
 
+    def test_to_lxml(self):
+        try:
+            from lxml import etree
+        except ImportError:
+            return
+
+        context = dict()
+        ctrlch = (ControlChar, dict(char='\r'), context)
+        text = (Text, dict(text='a\r\nb\rc\x00d', charshape_id=0), context)
+        modelevents = [(STARTEVENT, ctrlch),
+                       (STARTEVENT, text),
+                       (ENDEVENT, text),
+                       (ENDEVENT, ctrlch)]
+        xml = b''.join(XmlEvents(iter(modelevents)).bytechunks())
+        tree = XmlEvents(iter(modelevents)).to_lxml()
+        self.assertEqual('\r', tree.getroot().get('char'))
+        self.assertEqual('a\nb\ncd', tree.getroot()[0].text)
+        self.assertEqual(etree.tostring(etree.fromstring(xml)),
+                         etree.tostring(tree))
+
+        output = BytesIO()
+        self.hwp5file.xmlevents(embedbin=True).dump(output)
+        expected = etree.fromstring(output.getvalue())
+        tree = self.hwp5file.xmlevents(embedbin=True).to_lxml()
+        self.assertEqual(etree.tostring(expected, method='c14n'),
+                         etree.tostring(tree, method='c14n'))
+
 
 class TestModelEventStream(TestBase):
 
@@ -129,6 +167,63 @@ class TestSection(TestBase):
         ev, (tag, attrs, ctx) = events[-1]
         self.assertEqual((ENDEVENT, SectionDef), (ev, tag))
 
+    def test_events_fused(self):
+        section = Section(self.hwp5file_bin['BodyText']['Section0'],
+                          self.hwp5file_bin.fileheader.version)
+        expected = list(section.events(section_idx=0))
+        self.assertEqual(expected, list(section.events(section_idx=0,
+                                                       fused=True)))
+
+        self.assertTrue(Section.fused is False)
+        Section.fused = True
+        try:
+            self.assertEqual(expected, list(section.events(section_idx=0)))
+        finally:
+            Section.fused = False
+
+
+class TestFusedSectionEvents(TestCase):
+    ''' fused_section_events() against the staged pipeline '''
+
+    fixtures = [
+        'footnote-endnote.hwp',
+        'headerfooter.hwp',
+        'issue144-fields-crossing-lineseg-boundary.hwp',
+        'lists.hwp',
+        'matrix.hwp',
+        'multicolumns-in-common-controls.hwp',
+        'multicolumns-layout.hwp',
+        'sample-5017.hwp',
+        'shapecontainer-2.hwp',
+        'table-position.hwp',
+        'viewtext.hwp',
+    ]
+
+    def test_sections(self):
+        for name in self.fixtures:
+            hwp5file = Hwp5File(get_fixture_path(name))
+            try:
+                for idx in hwp5file.bodytext.section_indexes():
+                    section = hwp5file.bodytext.section(idx)
+                    expected = list(section.events(section_idx=idx))
+                    events = list(section.events(section_idx=idx,
+                                                 fused=True))
+                    self.assertEqual(expected, events, (name, idx))
+            finally:
+                hwp5file.close()
+
+    def test_xmlevents(self):
+        name = 'issue144-fields-crossing-lineseg-boundary.hwp'
+        hwp5file = Hwp5File(get_fixture_path(name))
+        try:
+            expected = BytesIO()
+            hwp5file.xmlevents().dump(expected)
+            output = BytesIO()
+            hwp5file.xmlevents(fused=True).dump(output)
+            self.assertEqual(expected.getvalue(), output.getvalue())
+        finally:
+            hwp5file.close()
+
 
 class TestHwp5File(TestBase):
 
@@ -153,7 +248,8 @@ class TestHwp5File(TestBase):
         list(events)
 
     def test_xmlevents_dump(self):
-        with io.open(self.id() + '.xml', 'wb+') as outfile:
+        xml_path = self.get_temp_path(self.id() + '.xml')
+        with io.open(xml_path, 'wb+') as outfile:
             self.hwp5file.xmlevents().dump(outfile)
 
             outfile.seek(0)
@@ -161,6 +257,60 @@ class TestHwp5File(TestBase):
 
         self.assertEqual('HwpDoc', doc.getroot().tag)
 
+    def test_xmlevents_workers(self):
+        path = get_fixture_path('pagedefs.hwp')
+        expected = BytesIO()
+        Hwp5File(path).xmlevents().dump(expected)
+
+        hwp5file = Hwp5File(path, workers=2)
+        self.assertEqual([0, 1], hwp5file.bodytext.section_indexes())
+        output = BytesIO()
+        hwp5file.xmlevents().dump(output)
+        self.assertEqual(expected.getvalue(), output.getvalue())
+
+        # paragraph ids continue over the sections
+        doc = ElementTree.fromstring(output.getvalue())
+        paragraph_ids = list(int(paragraph.get('paragraph-id'))
+                             for paragraph in doc.iter('Paragraph'))
+        self.assertEqual(list(range(len(paragraph_ids))), paragraph_ids)
+
+    def make_corrupt_section_file(self):
+        ''' pagedefs.hwp with a truncated ParaLineSeg in its Section1 '''
+        import olefile
+        path = self.get_temp_path('corrupt.hwp')
+        shutil.copyfile(get_fixture_path('pagedefs.hwp'), path)
+        ole = olefile.OleFileIO(path, write_mode=True)
+        try:
+            name = 'BodyText/Section1'
+            compressed = ole.openstream(name).read()
+            records = read_records(BytesIO(zlib.decompress(compressed, -15)))
+            f = BytesIO()
+            for record in records:
+                if record['tagid'] == HWPTAG_PARA_LINE_SEG:
+                    record['payload'] = record['payload'][:10]
+                dump_record(f, record)
+            compressobj = zlib.compressobj(9, zlib.DEFLATED, -15)
+            data = compressobj.compress(f.getvalue()) + compressobj.flush()
+            # 스트림의 크기는 바꿀 수 없으므로 뒤를 채운다.
+            self.assertTrue(len(data) <= len(compressed))
+            data += b'\0' * (len(compressed) - len(data))
+            ole.write_stream(name, data)
+        finally:
+            ole.close()
+        return path
+
+    def test_xmlevents_workers_corrupt_section(self):
+        if not olefileio.is_enabled():
+            logger.warning('%s: skipped', self.id())
+            return
+        path = self.make_corrupt_section_file()
+        self.assertRaises(ParseError, Hwp5File(path).xmlevents().dump,
+                          BytesIO())
+
+        # 워커에서 실패한 섹션은 다시 렌더링되어 같은 ParseError가 난다.
+        hwp5file = Hwp5File(path, workers=2)
+        self.assertRaises(ParseError, hwp5file.xmlevents().dump, BytesIO())
+
 
 class TestShapedText(TestCase):
     def test_make_shape_range(self):